@@ -5,173 +5,3300 @@ Assistant Vocal Local "Spotify-Link"
 Script Python pour contrôler Spotify via commandes vocales en local.
 """
 
+from __future__ import annotations
+
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import itertools
 import json
+import math
+import mmap
+import queue
+import re
+import shutil
+import struct
 import subprocess
 import os
 import sys
-from typing import Optional
+import threading
+import time
+import unicodedata
+import urllib.parse
+import wave
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class ModuleDiffere:
+    """
+    Module importé au premier accès à l'un de ses attributs.
+    
+    vosk, pyaudio, pyttsx3 et requests représentent l'essentiel du temps
+    d'import du script : ils sont ainsi chargés par les threads de démarrage
+    qui en ont besoin, en parallèle, plutôt qu'en série avant main_loop().
+    """
+    
+    def __init__(self, nom: str):
+        self._nom = nom
+        self._module = None
+        self._verrou = threading.Lock()
+    
+    def __getattr__(self, attribut: str):
+        if self._module is None:
+            with self._verrou:
+                if self._module is None:
+                    self._module = importlib.import_module(self._nom)
+        return getattr(self._module, attribut)
+
+
+def modules_manquants(noms: Sequence[str] = ('vosk', 'pyaudio', 'pyttsx3', 'requests')) -> List[str]:
+    """
+    Vérifie que des modules différés sont installés, sans les importer.
+    
+    Args:
+        noms: Modules à rechercher
+    
+    Returns:
+        list: Noms des modules introuvables
+    """
+    return [nom for nom in noms if importlib.util.find_spec(nom) is None]
+
 
 try:
-    import vosk
-    import pyaudio
-    import pyttsx3
-    import requests
+    import numpy as np
+    from classifieur_intentions import ClassifieurIntentions
+    from controle_lecture import ControleIndisponible, ControleLecture, creer_controle
+    from index_exemples import CacheVecteurs, IndexExemples
 except ImportError as e:
     print(f"❌ Module manquant : {e}")
     print("📦 Installez les dépendances avec : pip install -r requirements.txt")
     sys.exit(1)
 
+vosk = ModuleDiffere('vosk')
+pyaudio = ModuleDiffere('pyaudio')
+pyttsx3 = ModuleDiffere('pyttsx3')
+requests = ModuleDiffere('requests')
+
+from metriques import METRIQUES
+
+
+# ==================== CONFIGURATION ====================
+
+# Chemin vers l'exécutable Spotify (à adapter selon votre installation)
+SPOTIFY_PATH = r"C:\Program Files\WindowsApps\SpotifyAB.SpotifyMusic_1.279.427.0_x64__zpdnekdrzrea0\Spotify.exe"
+
+# Chemin vers le modèle Vosk (sera téléchargé automatiquement si nécessaire)
+VOSK_MODEL_PATH = r"vosk-model-small-fr-0.22"
+
+# Détection et lancement de Spotify
+NOMS_PROCESSUS_SPOTIFY = ('spotify', 'spotify.exe')  # Comparés sans tenir compte de la casse
+DETECTION_PROCESSUS_TTL = 2.0    # Durée (s) pendant laquelle le résultat d'une détection est réutilisé
+LANCEMENT_ATTENTE = 0.5          # Délai (s) pour repérer une commande de lancement qui échoue aussitôt
+LANCEUR_FICHIER = "lanceur_spotify.json"  # Méthode de lancement retenue, None pour ne pas la mémoriser
+
+# Pilotage de la lecture (pause, morceau suivant, volume...) par un canal ouvert une fois
+# au démarrage : 'auto' (MPRIS sous Linux, touches multimédias sous Windows),
+# 'mpris', 'touches', 'factice' ou None pour désactiver
+CONTROLE_LECTURE = "auto"
+LECTEUR_MPRIS = "spotify"   # Lecteur piloté par MPRIS (org.mpris.MediaPlayer2.<lecteur>)
+PAS_VOLUME = 0.1            # Variation du volume par commande (fraction du maximum)
+
+# Configuration Ollama
+OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_MODEL = "mistral"  # Le nom du modèle (peut être mistral, mistral:latest, etc.)
+OLLAMA_KEEP_ALIVE = "30m"  # Durée pendant laquelle Ollama garde le modèle chargé après une requête
+OLLAMA_STREAMING = True    # Lire la réponse en flux et conclure dès que le début suffit à trancher
+OLLAMA_TIMEOUT = 15        # Délai maximal d'une classification par Ollama (s)
+
+# Délai adaptatif : percentile des latences récentes d'Ollama multiplié par un facteur,
+# borné entre un minimum et OLLAMA_TIMEOUT (utilisé tant que les mesures sont trop peu nombreuses)
+OLLAMA_TIMEOUT_PERCENTILE = 95
+OLLAMA_TIMEOUT_FACTEUR = 3.0
+OLLAMA_TIMEOUT_MIN = 2.0
+OLLAMA_TIMEOUT_MESURES_MIN = 5
+
+# Disjoncteur : après des échecs répétés, Ollama n'est plus interrogé (repli local
+# immédiat) ; une requête de sonde est retentée après la pause
+DISJONCTEUR_ECHECS = 3          # Échecs consécutifs (erreur ou timeout) qui ouvrent le disjoncteur
+DISJONCTEUR_TAUX_ECHEC = 0.5    # ... ou proportion d'échecs dans la fenêtre récente
+DISJONCTEUR_FENETRE = 20        # Nombre de requêtes récentes prises en compte
+DISJONCTEUR_PAUSE = 30.0        # Durée (s) pendant laquelle le disjoncteur reste ouvert
+
+# Analyse d'intention asynchrone : une nouvelle phrase annule l'analyse (et la requête
+# Ollama) de la précédente, et le classifieur local est mis en concurrence avec Ollama
+INTENTIONS_ASYNCHRONES = True
+
+# Options de génération pour la classification d'intention
+# (le préchauffage utilise les mêmes, sinon Ollama rechargerait le modèle)
+OPTIONS_OLLAMA = {
+    "temperature": 0.0,   # Température à 0 pour des réponses déterministes
+    "num_predict": 48,    # Assez pour un objet JSON court (intention et paramètres)
+    "num_ctx": 512,       # Le prompt système décrit toutes les intentions (environ 300 tokens)
+    "top_k": 1,           # Réduit les options de génération
+    "top_p": 0.1          # Réduit la diversité
+}
+
+# Variable globale pour stocker le nom exact du modèle trouvé
+OLLAMA_MODEL_ACTUAL = None
+
+# Configuration audio
+SAMPLE_RATE = 16000
+# Lecture de la capture et alimentation de Vosk sont réglées séparément : de petites
+# lectures (le VAD voit plus tôt la fin de la parole) accumulées en lots pour le décodeur
+# (moins d'appels AcceptWaveform). Mesurer avec benchmark_assistant.py --mode decoupage
+CHUNK_SIZE = 800         # Trames lues à la fois dans la capture (50 ms à 16 kHz)
+TAILLE_LOT_VOSK = 3200   # Trames transmises à la fois au décodeur Vosk (200 ms à 16 kHz)
+
+# Périphérique d'entrée : s'il n'accepte pas SAMPLE_RATE en mono, la capture se fait
+# à sa fréquence et son nombre de canaux natifs, puis est rééchantillonnée à SAMPLE_RATE
+CAPTURE_PERIPHERIQUE = None     # Index PyAudio du micro, None pour le périphérique par défaut
+REECHANTILLONNAGE_DEMI_LARGEUR = 8  # Demi-longueur du filtre anti-repliement (en échantillons de sortie)
+
+# Durée d'audio (en secondes) conservée dans le tampon circulaire de capture
+# pendant que la reconnaissance est occupée (analyse d'intention, synthèse vocale)
+DUREE_TAMPON_AUDIO = 30
+
+# Détection d'activité vocale (VAD) : seuls les segments de parole sont transmis à Vosk
+VAD_ACTIVE = True
+VAD_SEUIL_RMS = 300      # Énergie RMS (échelle int16) à partir de laquelle un bloc est de la parole
+VAD_PREROLL_MS = 300     # Audio conservé avant le début détecté de la parole
+VAD_HANGOVER_MS = 800    # Audio encore transmis après la fin de la parole (fin d'énoncé Vosk)
+
+# Synthèse vocale dans un thread dédié : la boucle d'écoute n'attend jamais la fin d'une phrase
+TTS_EXPIRATION = 5.0     # Un message qui n'a pas pu être prononcé dans ce délai (s) est abandonné
+TTS_MARGE_MUET = 0.4     # La reconnaissance reste coupée ce temps (s) après la parole (écho de la pièce)
+
+# Priorités des messages vocaux (la plus petite valeur passe en premier)
+PRIORITE_URGENTE = 0     # Erreurs
+PRIORITE_NORMALE = 1     # Confirmations
+PRIORITE_BASSE = 2       # Messages d'accueil et d'information
+
+# Phrases fixes synthétisées une seule fois en WAV puis rejouées directement
+# (le texte, la voix, la vitesse et le volume forment la clé du cache)
+CACHE_VOCAL_DOSSIER = "cache_vocal"   # None pour toujours synthétiser à la volée
+MESSAGE_BIENVENUE = "Assistant vocal initialisé. Dites 'lance Spotify' pour démarrer l'application."
+PHRASES_PRECALCULEES = [
+    MESSAGE_BIENVENUE,
+    "Spotify lancé",
+    "Spotify est déjà lancé",
+    "Impossible de lancer Spotify. Essayez de l'ouvrir manuellement.",
+    "Erreur lors du lancement de Spotify",
+    "Spotify ne répond pas",
+    "Contrôle de la lecture indisponible",
+    "Au revoir",
+]
+
+# Mesure de la latence de chaque étape (reconnaissance, intention, action, voix)
+METRIQUES_FICHIER = "metriques.json"  # Export JSON périodique, None pour désactiver
+METRIQUES_INTERVALLE = 60             # Période d'export en secondes
+METRIQUES_PORT = None                 # Port HTTP local pour Prometheus (ex : 9464), None pour désactiver
+
+# Seuil de longueur minimale du texte pour l'analyse
+MIN_TEXT_LENGTH = 3
+
+# Phrases qui indiquent chaque intention (analyse par mots-clés et grammaire Vosk) ;
+# elles sont appliquées sans Ollama, même sur un résultat partiel : toujours un verbe
+# de commande ou « spotify », jamais un mot seul (« pause », « suivant ») qu'une
+# conversation ordinaire peut contenir
+INTENTIONS_MOTS_CLES = {
+    'ACTION_SPOTIFY': [
+        'lance spotify', 'ouvre spotify', 'démarre spotify', 'start spotify',
+        'ouvrir spotify', 'démarrer spotify',
+    ],
+    'LECTURE': [
+        'reprends la lecture', 'reprends la musique', 'relance la musique', 'remets la musique',
+    ],
+    'PAUSE': [
+        'mets pause', 'mets en pause', 'mets la musique en pause', 'spotify en pause',
+        'arrête la musique', 'coupe la musique',
+    ],
+    'SUIVANT': [
+        'passe au suivant', 'passe à la suivante', 'passe au morceau suivant', 'passe à la chanson suivante',
+        'passe au titre suivant', 'mets la chanson suivante', 'mets le morceau suivant',
+    ],
+    'PRECEDENT': [
+        'reviens au précédent', 'reviens à la précédente', 'reviens au morceau précédent',
+        'reviens à la chanson précédente', 'remets la chanson précédente', 'remets le morceau précédent',
+    ],
+    'VOLUME_PLUS': ['monte le son', 'monte le volume', 'augmente le son', 'augmente le volume', 'mets plus fort'],
+    'VOLUME_MOINS': ['baisse le son', 'baisse le volume', 'diminue le son', 'diminue le volume', 'mets moins fort'],
+}
+
+# Intentions de pilotage de la lecture : méthode de ControleLecture et ses arguments
+COMMANDES_LECTURE = {
+    'LECTURE': ('lecture',),
+    'PAUSE': ('pause',),
+    'SUIVANT': ('suivant',),
+    'PRECEDENT': ('precedent',),
+    'VOLUME_PLUS': ('changer_volume', PAS_VOLUME),
+    'VOLUME_MOINS': ('changer_volume', -PAS_VOLUME),
+}
+
+# Backend de pilotage ouvert au démarrage (None si indisponible)
+CONTROLEUR_LECTURE = None
+
+# Paramètres qu'Ollama peut extraire d'une commande, avec leur description pour le prompt
+PARAMETRES_INTENTIONS = {
+    'artiste': "nom de l'artiste ou du groupe",
+    'titre': "titre du morceau ou de l'album",
+    'playlist': "nom de la playlist",
+}
+
+# URI ouverte dans le lecteur pour une lecture avec paramètres (ex : « mets du Daft Punk »)
+URI_RECHERCHE = "spotify:search:{requete}"
+
+# Cache des verdicts d'Ollama, indexé par la transcription normalisée
+CACHE_INTENTIONS_TAILLE = 512              # Nombre maximal d'entrées (éviction LRU)
+CACHE_INTENTIONS_TTL = 7 * 24 * 3600       # Durée de validité d'une entrée en secondes
+CACHE_INTENTIONS_FICHIER = "cache_intentions.json"  # None pour ne pas persister sur disque
+
+# Classifieur local consulté avant Ollama
+# (entraînement : python classifieur_intentions.py exemples_intentions.tsv)
+CLASSIFIEUR_FICHIER = "classifieur_intentions.npz"
+# Le seuil mesuré en validation croisée à l'entraînement est enregistré avec le
+# modèle ; CLASSIFIEUR_SEUIL ne sert qu'aux modèles entraînés sans calibration
+CLASSIFIEUR_SEUIL = 0.9   # Confiance minimale pour se passer d'Ollama
+
+# Classifieur chargé au démarrage (None si aucun modèle entraîné)
+CLASSIFIEUR = None
+
+# Index d'exemples vectorisés par Ollama (/api/embed), consulté après le classifieur :
+# la génération n'est sollicitée que si aucun exemple n'est assez proche
+# (construction : python index_exemples.py exemples_intentions.tsv)
+INDEX_EXEMPLES_FICHIER = "index_exemples.npz"
+INDEX_EXEMPLES_SEUIL = 0.85   # Similarité cosinus minimale avec l'exemple le plus proche
+CACHE_VECTEURS_TAILLE = 256   # Embeddings de transcriptions gardés en mémoire (éviction LRU)
+
+# Index chargé au démarrage (None si absent ou si son modèle d'embeddings ne répond pas)
+INDEX_EXEMPLES = None
+
+# Orthographes du modèle Vosk pour les mots de commande absents de son vocabulaire :
+# la grammaire restreinte les utilise à la place du mot (voir construire_grammaire)
+ORTHOGRAPHES_VOSK = {
+    'spotify': ['spot if i', 'spot i fi'],
+}
+
+# Mots cibles tolérant des erreurs de transcription, avec la distance d'édition
+# maximale acceptée (ex : "spotifaï" ou "spoti fi" pour "spotify") ; la correction
+# n'a lieu qu'après un verbe de MOTS_CONTEXTE_COMMANDE, si bien qu'une phrase
+# ordinaire comme "je suis sportif" n'est pas prise pour une commande
+MOTS_CIBLES_TOLERANCE = {
+    'spotify': 2,
+}
+
+# Verbes de commande après lesquels seulement un mot cible approché est corrigé
+MOTS_CONTEXTE_COMMANDE = ('lance', 'ouvre', 'mets', 'démarre', 'start', 'ouvrir', 'démarrer')
+
+# Décodage prioritaire avec une grammaire restreinte aux mots-clés ;
+# le reconnaisseur vocabulaire complet n'est utilisé que si la grammaire répond [unk]
+MODE_GRAMMAIRE = True
+
+# Durée maximale d'un énoncé conservée pour le repli sur le reconnaisseur complet
+DUREE_MAX_ENONCE = 15
+
+# Déclencher l'action dès qu'un résultat partiel contient une commande,
+# sans attendre que Vosk détecte la fin de l'énoncé
+VALIDATION_ANTICIPEE = True
+PARTIELS_STABLES = 2     # Résultats partiels consécutifs concordants requis avant déclenchement
+
+
+# ==================== CAPTURE AUDIO ====================
+
+class TamponCirculaire:
+    """
+    Tampon circulaire d'octets, borné et préalloué, partagé entre le thread de
+    capture (producteur) et la boucle de reconnaissance (consommateur).
+    
+    Si le consommateur prend du retard au point de remplir le tampon, les
+    données les plus anciennes sont écrasées et comptées comme trames perdues.
+    """
+    
+    def __init__(self, capacite: int, octets_par_trame: int = 2):
+        """
+        Args:
+            capacite: Taille du tampon en octets (arrondie à une trame entière)
+            octets_par_trame: Nombre d'octets par trame audio (2 pour int16 mono)
+        """
+        self._octets_par_trame = octets_par_trame
+        self._capacite = max(capacite - capacite % octets_par_trame, octets_par_trame)
+        self._donnees = bytearray(self._capacite)
+        self._debut = 0    # Position de lecture
+        self._taille = 0   # Nombre d'octets en attente de lecture
+        self._ferme = False
+        self._condition = threading.Condition()
+        
+        self.trames_ecrites = 0
+        self.trames_perdues = 0
+    
+    def ecrire(self, data: bytes) -> None:
+        """
+        Ajoute des données au tampon sans jamais bloquer le producteur.
+        
+        Args:
+            data: Octets audio à ajouter
+        """
+        vue = memoryview(data)
+        with self._condition:
+            if len(vue) > self._capacite:
+                # Seule la fin du bloc tient dans le tampon
+                excedent = len(vue) - self._capacite
+                self.trames_perdues += excedent // self._octets_par_trame
+                self.trames_ecrites += excedent // self._octets_par_trame
+                vue = vue[excedent:]
+            
+            n = len(vue)
+            depassement = self._taille + n - self._capacite
+            if depassement > 0:
+                # Écraser les données les plus anciennes non lues
+                self._debut = (self._debut + depassement) % self._capacite
+                self._taille -= depassement
+                self.trames_perdues += depassement // self._octets_par_trame
+            
+            fin = (self._debut + self._taille) % self._capacite
+            premier_segment = min(n, self._capacite - fin)
+            self._donnees[fin:fin + premier_segment] = vue[:premier_segment]
+            if premier_segment < n:
+                self._donnees[:n - premier_segment] = vue[premier_segment:]
+            
+            self._taille += n
+            self.trames_ecrites += n // self._octets_par_trame
+            self._condition.notify()
+    
+    def lire(self, nb_octets: int, timeout: Optional[float] = None) -> bytes:
+        """
+        Attend que nb_octets soient disponibles puis les retire du tampon.
+        
+        Args:
+            nb_octets: Nombre d'octets souhaités
+            timeout: Attente maximale en secondes (None pour attendre indéfiniment)
+            
+        Returns:
+            bytes: Les données lues, b"" si le délai expire avant d'avoir assez de
+            données. Après fermeture, retourne le reliquat éventuel.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._taille >= nb_octets or self._ferme, timeout
+            )
+            if self._taille < nb_octets and not self._ferme:
+                return b""
+            
+            n = min(nb_octets, self._taille)
+            premier_segment = min(n, self._capacite - self._debut)
+            data = bytes(self._donnees[self._debut:self._debut + premier_segment])
+            if premier_segment < n:
+                data += bytes(self._donnees[:n - premier_segment])
+            
+            self._debut = (self._debut + n) % self._capacite
+            self._taille -= n
+            return data
+    
+    def en_attente(self) -> int:
+        """
+        Returns:
+            int: Nombre de trames en attente de lecture
+        """
+        with self._condition:
+            return self._taille // self._octets_par_trame
+    
+    @property
+    def epuise(self) -> bool:
+        """
+        True une fois le tampon fermé et entièrement lu.
+        """
+        with self._condition:
+            return self._ferme and self._taille == 0
+    
+    def vider(self) -> None:
+        """
+        Abandonne les données en attente (sans les compter comme perdues).
+        """
+        with self._condition:
+            self._debut = 0
+            self._taille = 0
+    
+    def fermer(self) -> None:
+        """
+        Réveille le consommateur : plus aucune donnée ne sera écrite.
+        """
+        with self._condition:
+            self._ferme = True
+            self._condition.notify_all()
+
+
+class ReechantillonneurPolyphase:
+    """
+    Rééchantillonneur rationnel en flux (polyphase), avec mixage en mono.
+    
+    Le rapport de fréquences est réduit à L/M (ex : 48000 -> 16000 donne
+    1/3, 44100 -> 16000 donne 160/441). Un filtre passe-bas à fenêtre de
+    Kaiser est découpé en L phases ; chaque échantillon de sortie est le
+    produit scalaire d'une phase et d'une fenêtre de l'entrée. Tous les
+    échantillons d'un bloc sont calculés en une seule opération NumPy, et
+    les dernières trames de chaque bloc sont conservées pour le suivant :
+    le flux découpé en blocs donne le même résultat que le signal entier.
+    """
+    
+    def __init__(self, frequence_entree: int, frequence_sortie: int = SAMPLE_RATE, canaux: int = 1,
+                 demi_largeur: int = REECHANTILLONNAGE_DEMI_LARGEUR):
+        """
+        Args:
+            frequence_entree: Fréquence d'échantillonnage du périphérique en Hz
+            frequence_sortie: Fréquence souhaitée en Hz
+            canaux: Nombre de canaux entrelacés en entrée (mixés en mono)
+            demi_largeur: Demi-longueur du filtre ; plus elle est grande, plus
+                la coupure est franche et le calcul coûteux
+        """
+        diviseur = math.gcd(frequence_entree, frequence_sortie)
+        self.interpolation = frequence_sortie // diviseur   # L
+        self.decimation = frequence_entree // diviseur      # M
+        self.canaux = canaux
+        
+        # Coefficients par phase, dans l'ordre où ils multiplient la fenêtre d'entrée
+        L, M = self.interpolation, self.decimation
+        self.taille_fenetre = int(math.ceil(2 * demi_largeur * max(1.0, M / L)))
+        longueur = self.taille_fenetre * L
+        coupure = 0.45 / max(L, M)  # En fraction de la fréquence suréchantillonnée
+        t = np.arange(longueur) - (longueur - 1) / 2
+        filtre = 2 * coupure * L * np.sinc(2 * coupure * t) * np.kaiser(longueur, 8.0)
+        self._phases = filtre.reshape(self.taille_fenetre, L).T[:, ::-1].astype(np.float32)
+        
+        self._historique = np.zeros(self.taille_fenetre - 1, dtype=np.float32)
+        self._debut = -(self.taille_fenetre - 1)  # Indice (global) du premier échantillon de l'historique
+        self._prochaine_sortie = 0                 # Indice (global) du prochain échantillon produit
+    
+    @property
+    def identite(self) -> bool:
+        return self.interpolation == self.decimation == 1
+    
+    def traiter(self, data: bytes) -> bytes:
+        """
+        Args:
+            data: Bloc PCM int16 entrelacé à la fréquence d'entrée
+        
+        Returns:
+            bytes: Bloc PCM int16 mono à la fréquence de sortie
+        """
+        echantillons = np.frombuffer(data, dtype=np.int16)
+        if self.canaux > 1:
+            echantillons = echantillons.reshape(-1, self.canaux).mean(axis=1, dtype=np.float32)
+        if self.identite:
+            return echantillons.astype(np.int16).tobytes() if self.canaux > 1 else bytes(data)
+        if not len(echantillons):
+            return b''
+        
+        L, M, K = self.interpolation, self.decimation, self.taille_fenetre
+        tampon = np.concatenate((self._historique, echantillons.astype(np.float32, copy=False)))
+        fin = self._debut + len(tampon)  # Indice global qui suit le dernier échantillon reçu
+        
+        # Sorties n dont l'échantillon d'entrée le plus récent, n*M // L, est disponible
+        indices = np.arange(self._prochaine_sortie, -(-fin * L // M), dtype=np.int64)
+        positions = indices * M
+        fenetres = np.lib.stride_tricks.sliding_window_view(tampon, K)[positions // L - (K - 1) - self._debut]
+        sortie = np.einsum('nk,nk->n', fenetres, self._phases[positions % L])
+        
+        if len(indices):
+            self._prochaine_sortie = int(indices[-1]) + 1
+        self._historique = tampon[len(tampon) - (K - 1):]
+        self._debut = fin - (K - 1)
+        return np.clip(np.rint(sortie), -32768, 32767).astype(np.int16).tobytes()
+
+
+class CaptureMicro:
+    """
+    Capture du microphone découplée de la reconnaissance.
+    
+    PyAudio est utilisé en mode callback : PortAudio appelle _callback depuis
+    son propre thread, qui se contente de copier les échantillons dans un
+    TamponCirculaire. La boucle de reconnaissance vide ce tampon à son rythme,
+    si bien qu'une analyse d'intention ou une synthèse vocale longue ne fait
+    plus perdre l'audio prononcé entre-temps (dans la limite du tampon).
+    
+    Si le micro n'accepte pas sample_rate en mono (nombreux micros USB et
+    périphériques de bouclage : 44,1 ou 48 kHz stéréo uniquement), il est
+    ouvert à sa fréquence et son nombre de canaux natifs, et le callback
+    mixe et rééchantillonne chaque bloc avant de l'écrire dans le tampon.
+    """
+    
+    def __init__(self, sample_rate: int = SAMPLE_RATE, taille_bloc: int = CHUNK_SIZE,
+                 duree_tampon: float = DUREE_TAMPON_AUDIO, peripherique: Optional[int] = CAPTURE_PERIPHERIQUE):
+        """
+        Args:
+            sample_rate: Fréquence d'échantillonnage fournie à la reconnaissance en Hz
+            taille_bloc: Nombre de trames (à sample_rate) par callback PyAudio
+            duree_tampon: Capacité du tampon circulaire en secondes
+            peripherique: Index PyAudio du micro (None pour le périphérique par défaut)
+        """
+        self.sample_rate = sample_rate
+        self.taille_bloc = taille_bloc
+        self.peripherique = peripherique
+        self.tampon = TamponCirculaire(int(duree_tampon * sample_rate) * 2)
+        
+        # Format effectivement ouvert sur le périphérique
+        self.frequence_peripherique = sample_rate
+        self.canaux_peripherique = 1
+        self.reechantillonneur = None
+        
+        # Nombre de callbacks signalés en débordement par PortAudio
+        self.debordements_entree = 0
+        
+        self._audio = None
+        self._stream = None
+    
+    def _callback(self, in_data, frame_count, time_info, status_flags):
+        if status_flags & pyaudio.paInputOverflow:
+            self.debordements_entree += 1
+        if self.reechantillonneur is not None:
+            in_data = self.reechantillonneur.traiter(in_data)
+        self.tampon.ecrire(in_data)
+        return (None, pyaudio.paContinue)
+    
+    def _choisir_format(self) -> None:
+        """
+        Garde sample_rate en mono si le périphérique l'accepte, sinon
+        retient sa fréquence par défaut et jusqu'à deux canaux.
+        """
+        if self.peripherique is None:
+            infos = self._audio.get_default_input_device_info()
+        else:
+            infos = self._audio.get_device_info_by_index(self.peripherique)
+        try:
+            if self._audio.is_format_supported(self.sample_rate, input_device=infos['index'],
+                                               input_channels=1, input_format=pyaudio.paInt16):
+                return
+        except ValueError:
+            pass  # PortAudio signale un format non pris en charge par une exception
+        
+        self.frequence_peripherique = int(infos['defaultSampleRate'])
+        self.canaux_peripherique = max(1, min(2, int(infos['maxInputChannels'])))
+        self.reechantillonneur = ReechantillonneurPolyphase(
+            self.frequence_peripherique, self.sample_rate, self.canaux_peripherique
+        )
+        print(f"🎚️  Micro ouvert à {self.frequence_peripherique} Hz, {self.canaux_peripherique} canal(aux), "
+              f"rééchantillonné à {self.sample_rate} Hz mono")
+    
+    def demarrer(self) -> None:
+        """
+        Ouvre le microphone et démarre la capture en arrière-plan.
+        """
+        self._audio = pyaudio.PyAudio()
+        self._choisir_format()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=self.canaux_peripherique,
+            rate=self.frequence_peripherique,
+            input=True,
+            input_device_index=self.peripherique,
+            # Même durée de bloc qu'à sample_rate
+            frames_per_buffer=self.taille_bloc * self.frequence_peripherique // self.sample_rate,
+            stream_callback=self._callback
+        )
+        self._stream.start_stream()
+    
+    def lire(self, nb_trames: int, timeout: Optional[float] = 0.5) -> bytes:
+        """
+        Retire nb_trames du tampon de capture.
+        
+        Args:
+            nb_trames: Nombre de trames (échantillons int16) souhaitées
+            timeout: Attente maximale en secondes
+            
+        Returns:
+            bytes: Données PCM int16, b"" si rien n'est disponible à temps
+        """
+        return self.tampon.lire(nb_trames * 2, timeout)
+    
+    @property
+    def epuisee(self) -> bool:
+        """
+        True une fois la capture arrêtée et le tampon entièrement lu.
+        """
+        return self.tampon.epuise
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Compteurs de capture (trames capturées, perdues, en attente,
+            débordements signalés par PortAudio)
+        """
+        return {
+            'trames_capturees': self.tampon.trames_ecrites,
+            'trames_perdues': self.tampon.trames_perdues,
+            'trames_en_attente': self.tampon.en_attente(),
+            'debordements_entree': self.debordements_entree,
+        }
+    
+    def arreter(self) -> None:
+        """
+        Arrête la capture et libère le microphone.
+        """
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+        self.tampon.fermer()
+
+
+class SourceAudioFichier:
+    """
+    Source audio de remplacement du microphone, alimentée par des données PCM
+    (fichier WAV enregistré ou audio synthétisé).
+    
+    Elle expose la même interface que CaptureMicro : un thread producteur écrit
+    l'audio dans un TamponCirculaire, au rythme réel ou accéléré, puis ferme le
+    tampon une fois tout l'audio écrit.
+    """
+    
+    def __init__(self, audio: bytes, sample_rate: int = SAMPLE_RATE, taille_bloc: int = CHUNK_SIZE,
+                 vitesse: float = 1.0, silence_final: float = 0.0,
+                 duree_tampon: float = DUREE_TAMPON_AUDIO):
+        """
+        Args:
+            audio: Données PCM int16 mono
+            sample_rate: Fréquence d'échantillonnage en Hz
+            taille_bloc: Nombre de trames écrites à la fois
+            vitesse: Facteur de rythme (1.0 = temps réel, 0 = aussi vite que possible)
+            silence_final: Silence ajouté après l'audio, en secondes
+            duree_tampon: Capacité du tampon circulaire en secondes
+        """
+        self.audio = audio + bytes(int(silence_final * sample_rate) * 2)
+        self.fin_audio = len(audio)
+        self.sample_rate = sample_rate
+        self.taille_bloc = taille_bloc
+        self.vitesse = vitesse
+        # Sans rythme imposé, le tampon doit pouvoir contenir tout le fichier
+        if not vitesse:
+            duree_tampon = max(duree_tampon, len(self.audio) / 2 / sample_rate + 1)
+        self.tampon = TamponCirculaire(int(duree_tampon * sample_rate) * 2)
+        self.debordements_entree = 0
+        
+        # Instant (time.perf_counter) où la dernière trame de l'audio utile a été écrite
+        self.horodatage_fin_audio = None
+        
+        self._arret = threading.Event()
+        self._thread = None
+    
+    @classmethod
+    def depuis_wav(cls, chemin: str, **options) -> "SourceAudioFichier":
+        """
+        Args:
+            chemin: Fichier WAV 16 bits, ramené à SAMPLE_RATE mono si nécessaire
+            **options: Options transmises au constructeur
+        
+        Returns:
+            SourceAudioFichier: Source lisant le fichier
+        """
+        with wave.open(chemin, 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{chemin} : seuls les WAV 16 bits sont pris en charge")
+            audio = wav.readframes(wav.getnframes())
+            if wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1:
+                reechantillonneur = ReechantillonneurPolyphase(wav.getframerate(), SAMPLE_RATE, wav.getnchannels())
+                audio = reechantillonneur.traiter(audio + bytes(2 * wav.getnchannels() * reechantillonneur.taille_fenetre))
+        return cls(audio, **options)
+    
+    def _produire(self) -> None:
+        octets_bloc = self.taille_bloc * 2
+        debut = time.perf_counter()
+        for position in range(0, len(self.audio), octets_bloc):
+            if self._arret.is_set():
+                break
+            if self.vitesse:
+                # Respecter le rythme réel de l'audio (ou un multiple)
+                echeance = debut + (position + octets_bloc) / 2 / self.sample_rate / self.vitesse
+                attente = echeance - time.perf_counter()
+                if attente > 0:
+                    time.sleep(attente)
+            self.tampon.ecrire(self.audio[position:position + octets_bloc])
+            if self.horodatage_fin_audio is None and position + octets_bloc >= self.fin_audio:
+                self.horodatage_fin_audio = time.perf_counter()
+        self.tampon.fermer()
+    
+    def demarrer(self) -> None:
+        """
+        Démarre l'écriture de l'audio en arrière-plan.
+        """
+        self._thread = threading.Thread(target=self._produire, name="source-audio", daemon=True)
+        self._thread.start()
+    
+    def lire(self, nb_trames: int, timeout: Optional[float] = 0.5) -> bytes:
+        """
+        Voir CaptureMicro.lire.
+        """
+        return self.tampon.lire(nb_trames * 2, timeout)
+    
+    @property
+    def epuisee(self) -> bool:
+        """
+        True une fois tout l'audio écrit puis lu.
+        """
+        return self.tampon.epuise
+    
+    def statistiques(self) -> dict:
+        """
+        Voir CaptureMicro.statistiques.
+        """
+        return {
+            'trames_capturees': self.tampon.trames_ecrites,
+            'trames_perdues': self.tampon.trames_perdues,
+            'trames_en_attente': self.tampon.en_attente(),
+            'debordements_entree': self.debordements_entree,
+        }
+    
+    def arreter(self) -> None:
+        """
+        Interrompt l'écriture de l'audio.
+        """
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.tampon.fermer()
+
+
+class DetecteurActiviteVocale:
+    """
+    Porte de détection d'activité vocale basée sur l'énergie des blocs audio.
+    
+    Les blocs silencieux ne sont pas transmis au décodeur Vosk. Un pré-roll
+    conserve les derniers blocs de silence pour ne pas couper l'attaque du
+    premier mot, et un maintien (hangover) continue de transmettre l'audio
+    quelque temps après la fin de la parole.
+    """
+    
+    def __init__(self, seuil_rms: float = VAD_SEUIL_RMS, preroll_ms: int = VAD_PREROLL_MS,
+                 hangover_ms: int = VAD_HANGOVER_MS, sample_rate: int = SAMPLE_RATE):
+        """
+        Args:
+            seuil_rms: Énergie RMS (échelle int16) au-delà de laquelle un bloc est de la parole
+            preroll_ms: Durée d'audio conservée avant le début de la parole
+            hangover_ms: Durée d'audio transmise après la fin de la parole
+            sample_rate: Fréquence d'échantillonnage en Hz
+        """
+        self.seuil_rms = seuil_rms
+        self._octets_preroll_max = int(preroll_ms * sample_rate / 1000) * 2
+        self._trames_hangover = int(hangover_ms * sample_rate / 1000)
+        
+        self._preroll = collections.deque()
+        self._octets_preroll = 0
+        self._trames_maintien = 0
+        self.en_parole = False
+        
+        self.trames_total = 0
+        self.trames_ignorees = 0
+    
+    @staticmethod
+    def energie_rms(data: bytes) -> float:
+        """
+        Calcule l'énergie RMS d'un bloc PCM int16 de façon vectorisée.
+        
+        Args:
+            data: Octets PCM int16
+            
+        Returns:
+            float: Énergie RMS sur l'échelle int16
+        """
+        echantillons = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        if echantillons.size == 0:
+            return 0.0
+        return float(np.sqrt(np.dot(echantillons, echantillons) / echantillons.size))
+    
+    def filtrer(self, data: bytes) -> Tuple[List[bytes], bool]:
+        """
+        Décide quels blocs transmettre au décodeur.
+        
+        Args:
+            data: Bloc PCM int16 issu de la capture
+            
+        Returns:
+            tuple: (blocs à transmettre à Vosk, True si la parole vient de se terminer)
+        """
+        nb_trames = len(data) // 2
+        self.trames_total += nb_trames
+        
+        if self.energie_rms(data) >= self.seuil_rms:
+            blocs = []
+            if not self.en_parole:
+                # Début de parole : restituer le pré-roll
+                blocs.extend(self._preroll)
+                self.trames_ignorees -= self._octets_preroll // 2
+                self._preroll.clear()
+                self._octets_preroll = 0
+                self.en_parole = True
+            self._trames_maintien = self._trames_hangover
+            blocs.append(data)
+            return blocs, False
+        
+        if self.en_parole:
+            self._trames_maintien -= nb_trames
+            if self._trames_maintien > 0:
+                return [data], False
+            self.en_parole = False
+            return [data], True
+        
+        # Silence : garder seulement les derniers blocs pour le pré-roll
+        self.trames_ignorees += nb_trames
+        self._preroll.append(data)
+        self._octets_preroll += len(data)
+        while self._preroll and self._octets_preroll - len(self._preroll[0]) >= self._octets_preroll_max:
+            self._octets_preroll -= len(self._preroll.popleft())
+        return [], False
+    
+    def reinitialiser(self) -> None:
+        """
+        Oublie l'état de parole et le pré-roll (les compteurs sont conservés).
+        """
+        self._preroll.clear()
+        self._octets_preroll = 0
+        self._trames_maintien = 0
+        self.en_parole = False
+    
+    @property
+    def proportion_ignoree(self) -> float:
+        """
+        Returns:
+            float: Fraction de l'audio qui n'a pas été transmise à Vosk (0.0 à 1.0)
+        """
+        if not self.trames_total:
+            return 0.0
+        return self.trames_ignorees / self.trames_total
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Trames analysées, trames ignorées et proportion ignorée
+        """
+        return {
+            'trames_total': self.trames_total,
+            'trames_ignorees': self.trames_ignorees,
+            'proportion_ignoree': self.proportion_ignoree,
+        }
+
+
+# ==================== RECONNAISSANCE ====================
+
+_PHRASES_HORS_VOCABULAIRE_SIGNALEES = set()
+
+
+def construire_grammaire(model: "vosk.Model") -> List[str]:
+    """
+    Construit la grammaire Vosk restreinte au vocabulaire des commandes.
+    
+    Vosk retire d'une phrase de grammaire les mots absents du vocabulaire du
+    modèle, avec un simple avertissement : "lance spotify" deviendrait "lance",
+    qui n'est pas [unk] et empêcherait le repli sur le reconnaisseur complet.
+    Ces mots sont donc remplacés par leurs orthographes ORTHOGRAPHES_VOSK, et
+    les phrases qui contiennent encore un mot inconnu sont écartées.
+    
+    Args:
+        model: Modèle Vosk dont le vocabulaire est consulté
+    
+    Returns:
+        list: Phrases de commande (sans doublons) suivies de '[unk]'
+    """
+    phrases = []
+    ecartees = []
+    for phrase in (phrase for exemples in INTENTIONS_MOTS_CLES.values() for phrase in exemples):
+        variantes = [phrase]
+        for mot, orthographes in ORTHOGRAPHES_VOSK.items():
+            variantes += [
+                ' '.join(orthographe if m == mot else m for m in variante.split())
+                for variante in variantes if mot in variante.split()
+                for orthographe in orthographes
+            ]
+        connues = [variante for variante in variantes
+                   if all(model.vosk_model_find_word(m) != -1 for m in variante.split())]
+        phrases.extend(connues)
+        if not connues:
+            ecartees.append(phrase)
+    
+    nouvelles = [phrase for phrase in ecartees if phrase not in _PHRASES_HORS_VOCABULAIRE_SIGNALEES]
+    if nouvelles:
+        _PHRASES_HORS_VOCABULAIRE_SIGNALEES.update(nouvelles)
+        print(f"⚠️  Phrases hors du vocabulaire Vosk, exclues de la grammaire : {', '.join(nouvelles)}")
+    return list(dict.fromkeys(phrases)) + ['[unk]']
+
+
+class SessionReconnaissance:
+    """
+    Décodage d'un flux audio 16 kHz int16 à partir d'un modèle Vosk chargé.
+    
+    Un reconnaisseur à grammaire restreinte (phrases de commande + [unk]) sert
+    de décodeur principal : il est bien plus rapide que le décodage à grand
+    vocabulaire. L'audio de l'énoncé en cours est conservé ; si la grammaire
+    ne reconnaît pas la phrase ([unk]), il est redécodé par le reconnaisseur
+    complet, partagé sur le même vosk.Model.
+    """
+    
+    def __init__(self, model: "vosk.Model", sample_rate: int = SAMPLE_RATE,
+                 grammaire: bool = MODE_GRAMMAIRE, vad: bool = VAD_ACTIVE,
+                 validation_anticipee: bool = VALIDATION_ANTICIPEE, taille_lot: int = TAILLE_LOT_VOSK):
+        """
+        Args:
+            model: Modèle Vosk déjà chargé
+            sample_rate: Fréquence d'échantillonnage du flux en Hz
+            grammaire: Utiliser la grammaire restreinte comme décodeur principal
+            vad: Filtrer le silence avant le décodage
+            validation_anticipee: Déclencher les commandes sur les résultats partiels
+            taille_lot: Nombre de trames accumulées avant chaque appel au décodeur
+                (0 pour transmettre chaque bloc tel quel)
+        """
+        self.sample_rate = sample_rate
+        
+        self.reconnaisseur_complet = vosk.KaldiRecognizer(model, sample_rate)
+        self.reconnaisseur_complet.SetWords(True)
+        
+        self.reconnaisseur_grammaire = None
+        if grammaire:
+            self.reconnaisseur_grammaire = vosk.KaldiRecognizer(
+                model, sample_rate, json.dumps(construire_grammaire(model), ensure_ascii=False)
+            )
+        
+        self.vad = DetecteurActiviteVocale(sample_rate=sample_rate) if vad else None
+        
+        # Audio accepté par le VAD, en attente d'un lot complet pour le décodeur
+        self._lot = bytearray()
+        self._octets_lot = max(taille_lot, 0) * 2
+        
+        # Audio de l'énoncé en cours, rejoué sur le reconnaisseur complet en cas de repli
+        self._audio_enonce = bytearray()
+        self._octets_enonce_max = int(DUREE_MAX_ENONCE * sample_rate) * 2
+        
+        # Validation anticipée : intention vue dans les derniers résultats partiels
+        self.validation_anticipee = validation_anticipee
+        self._intention_partielle = None
+        self._concordances = 0
+        self._intention_anticipee = None
+        
+        self.enonces = 0
+        self.replis = 0
+        self.validations_anticipees = 0
+    
+    @property
+    def _decodeur(self) -> "vosk.KaldiRecognizer":
+        return self.reconnaisseur_grammaire or self.reconnaisseur_complet
+    
+    def traiter(self, data: bytes) -> List[Tuple[str, Optional[str]]]:
+        """
+        Décode un bloc audio.
+        
+        Args:
+            data: Bloc PCM int16 mono
+            
+        Returns:
+            list: Couples (texte, intention). L'intention est renseignée lorsqu'une
+            commande a été validée sur un résultat partiel ; elle vaut None pour
+            les énoncés terminés, qui restent à analyser.
+        """
+        blocs, fin_segment = self.vad.filtrer(data) if self.vad else ([data], False)
+        
+        evenements = []
+        for bloc in blocs:
+            self._lot += bloc
+            if len(self._lot) >= self._octets_lot:
+                evenements.extend(self._decoder_lot())
+        
+        if fin_segment:
+            # Fin de parole détectée par le VAD : décoder le lot entamé puis
+            # forcer Vosk à finaliser l'énoncé
+            evenements.extend(self._decoder_lot())
+            evenements.append((self._finaliser(self._decodeur.FinalResult()), None))
+        
+        return [(texte, intention) for texte, intention in evenements if texte]
+    
+    def _decoder_lot(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        Transmet le lot accumulé au décodeur.
+        
+        Returns:
+            list: Couples (texte, intention) produits par ce lot (voir traiter)
+        """
+        if not self._lot:
+            return []
+        bloc = bytes(self._lot)
+        self._lot.clear()
+        
+        if self.reconnaisseur_grammaire:
+            self._memoriser_audio(bloc)
+        
+        if self._decodeur.AcceptWaveform(bloc):
+            return [(self._finaliser(self._decodeur.Result()), None)]
+        if self.validation_anticipee and self._intention_anticipee is None:
+            # Résultat partiel (en cours de reconnaissance)
+            partial = json.loads(self._decodeur.PartialResult())
+            partial_text = partial.get('partial', '').strip()
+            intention = self._valider_partiel(partial_text)
+            if intention:
+                return [(partial_text, intention)]
+        return []
+    
+    def reinitialiser(self) -> None:
+        """
+        Abandonne l'énoncé en cours sans produire de résultat (ex : audio capturé
+        pendant que l'assistant parlait).
+        """
+        self.reconnaisseur_complet.Reset()
+        if self.reconnaisseur_grammaire:
+            self.reconnaisseur_grammaire.Reset()
+        if self.vad:
+            self.vad.reinitialiser()
+        self._lot.clear()
+        self._audio_enonce.clear()
+        self._intention_partielle = None
+        self._concordances = 0
+        self._intention_anticipee = None
+    
+    def terminer(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        Termine le flux : finalise l'énoncé en cours de décodage.
+        
+        Returns:
+            list: Couples (texte, intention) de l'énoncé éventuellement en attente
+        """
+        evenements = self._decoder_lot()
+        evenements.append((self._finaliser(self._decodeur.FinalResult()), None))
+        return [(texte, intention) for texte, intention in evenements if texte]
+    
+    def _valider_partiel(self, texte: str) -> Optional[str]:
+        """
+        Retourne l'intention d'un résultat partiel une fois qu'elle est stable,
+        c'est-à-dire retrouvée dans PARTIELS_STABLES résultats partiels consécutifs.
+        """
+        intention = CORRESPONDANCE_MOTS_CLES.analyser_partiel(texte) if texte else None
+        if intention and intention == self._intention_partielle:
+            self._concordances += 1
+        else:
+            self._intention_partielle = intention
+            self._concordances = 1 if intention else 0
+        
+        if intention and self._concordances >= PARTIELS_STABLES:
+            self._intention_anticipee = intention
+            self.validations_anticipees += 1
+            return intention
+        return None
+    
+    def _memoriser_audio(self, bloc: bytes) -> None:
+        self._audio_enonce += bloc
+        excedent = len(self._audio_enonce) - self._octets_enonce_max
+        if excedent > 0:
+            del self._audio_enonce[:excedent]
+    
+    def _finaliser(self, resultat_json: str) -> str:
+        """
+        Extrait le texte d'un résultat Vosk, avec repli sur le reconnaisseur
+        complet si la grammaire n'a pas reconnu l'énoncé.
+        """
+        texte = json.loads(resultat_json).get('text', '').strip()
+        audio = self._audio_enonce
+        self._audio_enonce = bytearray()
+        
+        intention_anticipee = self._intention_anticipee
+        self._intention_partielle = None
+        self._concordances = 0
+        self._intention_anticipee = None
+        
+        if not texte:
+            return ""
+        self.enonces += 1
+        
+        if intention_anticipee:
+            # La commande a déjà été déclenchée sur un résultat partiel
+            return ""
+        
+        if self.reconnaisseur_grammaire and '[unk]' in texte.split():
+            self.replis += 1
+            with METRIQUES.mesurer('asr_repli_vocabulaire_complet'):
+                self.reconnaisseur_complet.AcceptWaveform(bytes(audio))
+                texte = json.loads(self.reconnaisseur_complet.FinalResult()).get('text', '').strip()
+        
+        return texte
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Nombre d'énoncés décodés, de replis sur le reconnaisseur complet
+            et de commandes validées sur un résultat partiel
+        """
+        return {
+            'enonces': self.enonces,
+            'replis_vocabulaire_complet': self.replis,
+            'validations_anticipees': self.validations_anticipees,
+        }
+
+
+# ==================== ANALYSE PAR MOTS-CLÉS ====================
+
+_RE_SEPARATEURS = re.compile(r'[\W_]+')
+
+
+def normaliser_texte(texte: str) -> str:
+    """
+    Normalise un texte pour la comparaison : minuscules, sans accents ni
+    ponctuation, espaces simples.
+    
+    Args:
+        texte: Texte à normaliser
+        
+    Returns:
+        str: Texte normalisé (ex : "Démarre  Spotify !" -> "demarre spotify")
+    """
+    decompose = unicodedata.normalize('NFKD', texte.casefold())
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return _RE_SEPARATEURS.sub(' ', sans_accents).strip()
+
+
+def distance_edition(a: str, b: str, maximum: int) -> int:
+    """
+    Distance de Levenshtein bornée entre deux chaînes.
+    
+    Args:
+        a: Première chaîne
+        b: Seconde chaîne
+        maximum: Distance au-delà de laquelle le calcul est abandonné
+        
+    Returns:
+        int: La distance, ou maximum + 1 si elle dépasse maximum
+    """
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    
+    precedente = list(range(len(b) + 1))
+    for i, car_a in enumerate(a, 1):
+        courante = [i]
+        for j, car_b in enumerate(b, 1):
+            courante.append(min(
+                precedente[j] + 1,
+                courante[j - 1] + 1,
+                precedente[j - 1] + (car_a != car_b)
+            ))
+        if min(courante) > maximum:
+            return maximum + 1
+        precedente = courante
+    return precedente[-1]
+
+
+class CorrespondanceMotsCles:
+    """
+    Détecteur d'intentions par mots-clés, compilé une seule fois.
+    
+    Toutes les phrases de toutes les intentions sont normalisées puis réunies
+    dans une unique expression régulière (les plus longues en premier). Si le
+    texte ne correspond pas tel quel, les mots cibles mal transcrits par Vosk
+    sont corrigés par distance d'édition sur des fenêtres de 1 à 3 mots
+    recollés, puis la recherche est relancée. Cette correction n'a lieu que
+    juste après un verbe de commande ("lance spotifaï"), pour qu'une phrase
+    ordinaire ne soit pas prise pour une commande. Les orthographes connues du
+    modèle Vosk ("spot if i"), que la grammaire produit, correspondent telles
+    quelles.
+    """
+    
+    def __init__(self, intentions: Dict[str, List[str]], tolerances: Dict[str, int],
+                 contexte: Sequence[str] = (), orthographes: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            intentions: Phrases déclenchantes par code d'intention
+            tolerances: Distance d'édition maximale par mot cible
+            contexte: Verbes de commande qui doivent précéder un mot cible corrigé
+            orthographes: Orthographes acceptées telles quelles, par mot des phrases
+        """
+        phrases = {}
+        for code_intention, exemples in intentions.items():
+            for phrase in exemples:
+                phrase = normaliser_texte(phrase)
+                phrases.setdefault(phrase, code_intention)
+                for mot, variantes in (orthographes or {}).items():
+                    if mot in phrase.split():
+                        for variante in variantes:
+                            phrases.setdefault(
+                                ' '.join(variante if m == mot else m for m in phrase.split()),
+                                code_intention,
+                            )
+        
+        # Débuts stricts des phrases, mot par mot : "spotify" commence "spotify en pause"
+        self._debuts = {
+            ' '.join(phrase.split()[:longueur])
+            for phrase in phrases for longueur in range(1, len(phrase.split()))
+        }
+        
+        self._intentions = []
+        alternatives = []
+        for index, phrase in enumerate(sorted(phrases, key=len, reverse=True)):
+            self._intentions.append(phrases[phrase])
+            alternatives.append(f"(?P<p{index}>{re.escape(phrase)})")
+        self._motif = re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b')
+        
+        self._tolerances = {normaliser_texte(mot): maximum for mot, maximum in tolerances.items()}
+        self._contexte = {normaliser_texte(mot) for mot in contexte}
+    
+    def _rechercher(self, texte_normalise: str) -> Optional[str]:
+        correspondance = self._motif.search(texte_normalise)
+        if correspondance:
+            return self._intentions[int(correspondance.lastgroup[1:])]
+        return None
+    
+    def _corriger(self, texte_normalise: str) -> Tuple[str, int]:
+        """
+        Remplace les fenêtres de mots proches d'un mot cible par ce mot cible.
+        
+        Returns:
+            tuple: (texte corrigé, somme des distances d'édition appliquées)
+        """
+        mots = texte_normalise.split()
+        corriges = []
+        distance_totale = 0
+        i = 0
+        while i < len(mots):
+            meilleur = None  # (distance, largeur, cible)
+            # Seul un mot qui suit un verbe de commande est corrigé
+            cibles = self._tolerances.items() if i and mots[i - 1] in self._contexte else ()
+            for cible, maximum in cibles:
+                for largeur in (3, 2, 1):
+                    if i + largeur > len(mots):
+                        continue
+                    candidat = ''.join(mots[i:i + largeur])
+                    # Vosk se trompe rarement sur la première lettre : filtre bon marché
+                    if candidat[0] != cible[0]:
+                        continue
+                    distance = distance_edition(candidat, cible, maximum)
+                    # À distance égale, préférer la fenêtre la plus large
+                    if distance <= maximum and (meilleur is None or distance < meilleur[0]):
+                        meilleur = (distance, largeur, cible)
+            
+            if meilleur:
+                distance, largeur, cible = meilleur
+                corriges.append(cible)
+                distance_totale += distance
+                i += largeur
+            else:
+                corriges.append(mots[i])
+                i += 1
+        return ' '.join(corriges), distance_totale
+    
+    def analyser_partiel(self, texte: str) -> Optional[str]:
+        """
+        Recherche une intention dans un résultat partiel, encore susceptible de
+        s'allonger : seules les correspondances exactes comptent, et aucune
+        tant que la fin du texte peut encore devenir une phrase plus longue
+        ("spotify" avant "spotify en pause").
+        
+        Args:
+            texte: Résultat partiel transcrit
+            
+        Returns:
+            str: Code d'intention, None si aucune ou si la phrase peut encore changer
+        """
+        texte_normalise = normaliser_texte(texte)
+        correspondance = self._motif.search(texte_normalise)
+        if not correspondance or texte_normalise[correspondance.start():] in self._debuts:
+            return None
+        return self._intentions[int(correspondance.lastgroup[1:])]
+    
+    def analyser(self, texte: str) -> Optional[Tuple[str, int]]:
+        """
+        Recherche une intention dans le texte.
+        
+        Args:
+            texte: Texte transcrit
+            
+        Returns:
+            tuple: (code d'intention, distance d'édition des corrections appliquées,
+            0 pour une correspondance exacte), None si aucune intention
+        """
+        texte_normalise = normaliser_texte(texte)
+        intention = self._rechercher(texte_normalise)
+        if intention:
+            return intention, 0
+        
+        if self._tolerances:
+            texte_corrige, distance = self._corriger(texte_normalise)
+            # Une distance nulle peut venir de mots recollés ("spot ify")
+            if texte_corrige != texte_normalise:
+                intention = self._rechercher(texte_corrige)
+                if intention:
+                    return intention, distance
+        return None
+
+
+CORRESPONDANCE_MOTS_CLES = CorrespondanceMotsCles(
+    INTENTIONS_MOTS_CLES, MOTS_CIBLES_TOLERANCE, MOTS_CONTEXTE_COMMANDE, ORTHOGRAPHES_VOSK
+)
+
+
+# ==================== REGISTRE DES INTENTIONS ====================
+
+class Intention:
+    """
+    Intention reconnue par l'assistant.
+    """
+    
+    def __init__(self, nom: str, description: str, exemples: List[str],
+                 gestionnaire: Optional[Callable[[pyttsx3.Engine, Dict[str, str]], None]] = None,
+                 parametres: Tuple[str, ...] = ()):
+        """
+        Args:
+            nom: Code d'intention (ex : 'PAUSE')
+            description: Description donnée à Ollama
+            exemples: Phrases déclenchantes (mots-clés, grammaire Vosk, exemples du prompt)
+            gestionnaire: Action exécutée, appelée avec (engine, paramètres) ; None pour ne rien faire
+            parametres: Noms des paramètres qu'Ollama peut extraire (clés de PARAMETRES_INTENTIONS)
+        """
+        self.nom = nom
+        self.description = description
+        self.exemples = exemples
+        self.gestionnaire = gestionnaire
+        self.parametres = parametres
+
+
+class RegistreIntentions:
+    """
+    Intentions connues, indexées par code : executer_action y trouve
+    l'action à exécuter en un accès au dictionnaire, et la requête Ollama
+    (prompt système et schéma JSON de la réponse) en est déduite.
+    
+    Le prompt système et le schéma ne dépendent que du registre : ils sont
+    construits une fois, à l'identique d'une requête à l'autre, pour
+    qu'Ollama réutilise le cache KV de ce préfixe et n'évalue que le texte
+    de la commande.
+    """
+    
+    def __init__(self, descriptions_parametres: Dict[str, str] = PARAMETRES_INTENTIONS):
+        """
+        Args:
+            descriptions_parametres: Description de chaque paramètre pour le prompt
+        """
+        self.descriptions_parametres = descriptions_parametres
+        self._intentions: Dict[str, Intention] = {}
+        self._prompt_systeme = None
+        self._schema = None
+    
+    def enregistrer(self, nom: str, description: str, gestionnaire=None,
+                    exemples: Optional[List[str]] = None, parametres: Tuple[str, ...] = ()) -> Intention:
+        """
+        Ajoute (ou remplace) une intention.
+        
+        Args:
+            nom: Code d'intention
+            description: Description donnée à Ollama
+            gestionnaire: Action appelée avec (engine, paramètres), None pour ne rien faire
+            exemples: Phrases déclenchantes (INTENTIONS_MOTS_CLES[nom] par défaut)
+            parametres: Paramètres qu'Ollama peut extraire
+        
+        Returns:
+            Intention: L'intention enregistrée
+        """
+        inconnus = [parametre for parametre in parametres if parametre not in self.descriptions_parametres]
+        if inconnus:
+            raise ValueError(f"Paramètres non décrits pour {nom} : {inconnus}")
+        
+        intention = Intention(nom, description, INTENTIONS_MOTS_CLES.get(nom, []) if exemples is None else exemples,
+                              gestionnaire, tuple(parametres))
+        self._intentions[nom] = intention
+        self._prompt_systeme = None
+        self._schema = None
+        return intention
+    
+    def obtenir(self, nom: str) -> Optional[Intention]:
+        return self._intentions.get(nom)
+    
+    def __contains__(self, nom: str) -> bool:
+        return nom in self._intentions
+    
+    def noms(self) -> List[str]:
+        """
+        Returns:
+            list: Codes d'intention dans l'ordre d'enregistrement
+        """
+        return list(self._intentions)
+    
+    def prompt_systeme(self) -> str:
+        """
+        Returns:
+            str: Consignes de classification, identiques pour toutes les requêtes
+        """
+        if self._prompt_systeme is None:
+            lignes = [
+                "Tu classes les commandes vocales, transcrites et parfois imparfaites, "
+                "d'un assistant qui pilote Spotify.",
+                "Intentions possibles :",
+            ]
+            for intention in self._intentions.values():
+                ligne = f"- {intention.nom} : {intention.description}"
+                if intention.exemples:
+                    ligne += " (ex : " + ", ".join(f"« {exemple} »" for exemple in intention.exemples[:3]) + ")"
+                if intention.parametres:
+                    ligne += " ; paramètres : " + ", ".join(intention.parametres)
+                lignes.append(ligne)
+            
+            parametres = self._parametres_utilises()
+            if parametres:
+                lignes.append("Paramètres, à ne remplir que s'ils sont dits dans la phrase :")
+                lignes.extend(f"- {parametre} : {self.descriptions_parametres[parametre]}"
+                              for parametre in parametres)
+            lignes.append('Réponds uniquement par un objet JSON : {"intention": <code>} '
+                          "suivi des paramètres mentionnés.")
+            self._prompt_systeme = "\n".join(lignes)
+        return self._prompt_systeme
+    
+    def schema(self) -> dict:
+        """
+        Returns:
+            dict: Schéma JSON imposé à la réponse d'Ollama (champ format) ;
+            l'intention vient en premier pour pouvoir conclure en streaming
+            avant la fin de l'objet
+        """
+        if self._schema is None:
+            proprietes = {'intention': {'type': 'string', 'enum': self.noms()}}
+            for parametre in self._parametres_utilises():
+                proprietes[parametre] = {'type': 'string'}
+            self._schema = {'type': 'object', 'properties': proprietes, 'required': ['intention']}
+        return self._schema
+    
+    def empreinte(self, modele: str) -> str:
+        """
+        Args:
+            modele: Modèle Ollama qui rend les verdicts
+        
+        Returns:
+            str: Condensé du modèle, du prompt système et du schéma : il change
+            dès qu'un verdict mémorisé pourrait ne plus être celui d'Ollama
+        """
+        contenu = json.dumps([modele, self.prompt_systeme(), self.schema()], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+    
+    def accepte_parametres(self, nom: str) -> bool:
+        """
+        Args:
+            nom: Code d'intention
+        
+        Returns:
+            bool: True si l'intention est connue et déclare des paramètres, que
+            seule la génération par Ollama sait extraire
+        """
+        intention = self._intentions.get(nom)
+        return intention is not None and bool(intention.parametres)
+    
+    def extraire_parametres(self, nom: str, reponse: dict) -> Dict[str, str]:
+        """
+        Args:
+            nom: Code d'intention retenu
+            reponse: Objet JSON renvoyé par Ollama
+        
+        Returns:
+            dict: Paramètres déclarés pour cette intention et renseignés (non vides)
+        """
+        parametres = {}
+        for parametre in self._intentions[nom].parametres:
+            valeur = reponse.get(parametre)
+            if isinstance(valeur, str) and valeur.strip():
+                parametres[parametre] = valeur.strip()
+        return parametres
+    
+    def _parametres_utilises(self) -> List[str]:
+        # Ordre de PARAMETRES_INTENTIONS, pour un prompt et un schéma stables
+        utilises = {parametre for intention in self._intentions.values() for parametre in intention.parametres}
+        return [parametre for parametre in self.descriptions_parametres if parametre in utilises]
+
+
+# Rempli dans la section FONCTIONS, une fois les actions définies
+INTENTIONS = RegistreIntentions()
+
+
+# ==================== CACHE DES INTENTIONS ====================
+
+class CacheIntentions:
+    """
+    Cache LRU des verdicts d'intention (code et paramètres), indexé par la
+    transcription normalisée.
+    
+    Les entrées expirent après ttl secondes et peuvent être persistées dans un
+    fichier JSON pour survivre aux redémarrages. Les horodatages utilisent
+    l'heure murale pour rester valables d'une exécution à l'autre. Le fichier
+    porte l'empreinte du modèle et de la requête qui ont rendu les verdicts :
+    il est ignoré si elle ne correspond plus. Tant que cette empreinte n'est
+    pas connue (modèle pas encore résolu), le fichier n'est ni lu ni écrit.
+    """
+    
+    def __init__(self, taille_max: int = CACHE_INTENTIONS_TAILLE, ttl: float = CACHE_INTENTIONS_TTL,
+                 fichier: Optional[str] = CACHE_INTENTIONS_FICHIER, empreinte: Optional[str] = None):
+        """
+        Args:
+            taille_max: Nombre maximal d'entrées conservées
+            ttl: Durée de validité d'une entrée en secondes
+            fichier: Fichier JSON de persistance (None pour rester en mémoire)
+            empreinte: Empreinte des verdicts (voir RegistreIntentions.empreinte) ;
+                None si elle n'est pas encore connue (voir definir_empreinte)
+        """
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self.fichier = fichier
+        self.empreinte = empreinte
+        
+        self._entrees = collections.OrderedDict()  # clé -> (verdict, horodatage, paramètres)
+        self._verrou = threading.Lock()
+        self._modifie = False
+        
+        self.succes = 0
+        self.echecs = 0
+        
+        if fichier and empreinte is not None:
+            self.charger()
+    
+    def definir_empreinte(self, empreinte: str) -> None:
+        """
+        Fixe l'empreinte des verdicts une fois le modèle résolu, puis charge le
+        fichier de persistance ; les entrées d'une autre empreinte sont oubliées.
+        
+        Args:
+            empreinte: Empreinte du modèle effectivement utilisé
+        """
+        if empreinte == self.empreinte:
+            return
+        with self._verrou:
+            if self.empreinte is not None and self._entrees:
+                self._entrees.clear()
+                self._modifie = True
+            self.empreinte = empreinte
+        if self.fichier:
+            self.charger()
+    
+    def obtenir(self, texte: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Args:
+            texte: Transcription brute
+            
+        Returns:
+            tuple: (verdict, paramètres) en cache, None si absent ou expiré
+        """
+        cle = normaliser_texte(texte)
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None or time.time() - entree[1] > self.ttl:
+                if entree is not None:
+                    del self._entrees[cle]
+                    self._modifie = True
+                self.echecs += 1
+                return None
+            
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return entree[0], entree[2]
+    
+    def enregistrer(self, texte: str, verdict: str, parametres: Optional[Dict[str, str]] = None) -> None:
+        """
+        Args:
+            texte: Transcription brute
+            verdict: Code d'intention à mémoriser
+            parametres: Paramètres extraits avec le verdict
+        """
+        cle = normaliser_texte(texte)
+        with self._verrou:
+            self._entrees[cle] = (verdict, time.time(), parametres or {})
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+            self._modifie = True
+    
+    def charger(self) -> None:
+        """
+        Charge les entrées encore valides depuis le fichier de persistance.
+        """
+        if not self.fichier or self.empreinte is None or not os.path.exists(self.fichier):
+            return
+        try:
+            with open(self.fichier, 'r', encoding='utf-8') as f:
+                contenu = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Cache des intentions illisible, ignoré : {e}")
+            return
+        
+        # Fichier d'une version précédente (liste sans en-tête) ou verdicts
+        # rendus par un autre modèle ou pour d'autres intentions
+        if not isinstance(contenu, dict) or contenu.get('empreinte') != self.empreinte:
+            print("🔄 Cache des intentions obsolète (modèle ou intentions modifiés), ignoré")
+            self._modifie = True
+            return
+        
+        maintenant = time.time()
+        with self._verrou:
+            # Le fichier est trié de la plus ancienne à la plus récente utilisation ;
+            # les entrées sans paramètres d'une version précédente sont écartées
+            for entree in contenu.get('entrees', [])[-self.taille_max:]:
+                if not isinstance(entree, list) or len(entree) != 4:
+                    continue
+                cle, verdict, horodatage, parametres = entree
+                if maintenant - horodatage <= self.ttl:
+                    self._entrees[cle] = (verdict, horodatage, parametres)
+    
+    def sauvegarder(self) -> None:
+        """
+        Écrit le cache dans le fichier de persistance s'il a été modifié.
+        """
+        if not self.fichier or not self._modifie or self.empreinte is None:
+            return
+        with self._verrou:
+            entrees = [[cle, verdict, horodatage, parametres]
+                       for cle, (verdict, horodatage, parametres) in self._entrees.items()]
+            self._modifie = False
+        
+        try:
+            fichier_temporaire = self.fichier + '.tmp'
+            with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+                json.dump({'empreinte': self.empreinte, 'entrees': entrees}, f, ensure_ascii=False)
+            os.replace(fichier_temporaire, self.fichier)
+        except OSError as e:
+            print(f"⚠️  Impossible d'enregistrer le cache des intentions : {e}")
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Nombre d'entrées, de succès et d'échecs du cache
+        """
+        return {
+            'entrees': len(self._entrees),
+            'succes': self.succes,
+            'echecs': self.echecs,
+        }
+
+
+CACHE_VECTEURS = CacheVecteurs(CACHE_VECTEURS_TAILLE)
+
+
+# ==================== CLIENT OLLAMA ====================
+
+class ClientOllama:
+    """
+    Client HTTP réutilisable pour l'API Ollama.
+    
+    Une requests.Session garde les connexions TCP ouvertes d'un appel à
+    l'autre, et le paramètre keep_alive demande à Ollama de garder le modèle
+    chargé en mémoire entre deux commandes.
+    """
+    
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, keep_alive: str = OLLAMA_KEEP_ALIVE,
+                 taille_pool: int = 4):
+        """
+        Args:
+            base_url: URL du serveur Ollama (ex : http://localhost:11434)
+            keep_alive: Durée de maintien du modèle en mémoire (format Ollama, ex : "30m")
+            taille_pool: Nombre maximal de connexions conservées
+        """
+        self.base_url = base_url.rstrip('/')
+        self.keep_alive = keep_alive
+        self.taille_pool = taille_pool
+        self.prechauffage = None  # Thread du dernier préchauffage lancé
+        
+        self._session = None
+        self._verrou_session = threading.Lock()
+    
+    @property
+    def session(self) -> requests.Session:
+        """
+        Session HTTP, créée au premier appel (ce qui importe requests).
+        """
+        if self._session is None:
+            with self._verrou_session:
+                if self._session is None:
+                    session = requests.Session()
+                    adaptateur = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.taille_pool)
+                    session.mount('http://', adaptateur)
+                    session.mount('https://', adaptateur)
+                    self._session = session
+        return self._session
+    
+    def lister_modeles(self, timeout: float = 2) -> List[str]:
+        """
+        Returns:
+            list: Noms des modèles installés dans Ollama
+            
+        Raises:
+            requests.exceptions.RequestException: Si Ollama ne répond pas correctement
+        """
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return [model.get('name', '') for model in response.json().get('models', [])]
+    
+    def generer(self, payload: dict, timeout: float) -> dict:
+        """
+        Appelle /api/generate (sans streaming) en ajoutant keep_alive.
+        
+        Args:
+            payload: Corps de la requête Ollama
+            timeout: Délai maximal en secondes
+            
+        Returns:
+            dict: Réponse JSON d'Ollama
+            
+        Raises:
+            requests.exceptions.RequestException: En cas d'erreur réseau ou HTTP
+        """
+        payload = dict(payload)
+        payload.setdefault('keep_alive', self.keep_alive)
+        response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def vectoriser(self, textes: List[str], modele: str, timeout: float) -> np.ndarray:
+        """
+        Calcule les embeddings de plusieurs textes en une requête (/api/embed).
+        
+        Args:
+            textes: Textes à vectoriser
+            modele: Modèle d'embeddings (ex : nomic-embed-text)
+            timeout: Délai maximal en secondes
+            
+        Returns:
+            np.ndarray: Un embedding par ligne, forme (textes, dimension)
+            
+        Raises:
+            requests.exceptions.RequestException: En cas d'erreur réseau ou HTTP
+        """
+        response = self.session.post(
+            f"{self.base_url}/api/embed",
+            json={"model": modele, "input": textes, "keep_alive": self.keep_alive},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return np.array(response.json()['embeddings'], dtype=np.float32)
+    
+    def generer_flux(self, payload: dict, timeout: float) -> Iterator[str]:
+        """
+        Appelle /api/generate en streaming et produit les fragments de texte
+        au fil de l'eau. Fermer le générateur ferme la connexion, ce qui
+        interrompt la génération côté Ollama.
+        
+        Args:
+            payload: Corps de la requête Ollama
+            timeout: Délai maximal en secondes (connexion et attente de chaque fragment)
+            
+        Yields:
+            str: Fragments successifs de la réponse
+            
+        Raises:
+            requests.exceptions.RequestException: En cas d'erreur réseau, HTTP ou d'Ollama
+        """
+        payload = dict(payload, stream=True)
+        payload.setdefault('keep_alive', self.keep_alive)
+        with self.session.post(f"{self.base_url}/api/generate", json=payload,
+                               timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for ligne in response.iter_lines():
+                if not ligne:
+                    continue
+                morceau = json.loads(ligne)
+                if 'error' in morceau:
+                    raise requests.exceptions.RequestException(morceau['error'])
+                yield morceau.get('response', '')
+                if morceau.get('done'):
+                    return
+    
+    async def generer_flux_async(self, payload: dict, timeout: float) -> AsyncIterator[str]:
+        """
+        Équivalent asynchrone de generer_flux, sur une connexion asyncio dédiée.
+        
+        Annuler la tâche qui lit le flux (ou fermer le générateur) ferme la
+        connexion sur-le-champ, y compris pendant l'évaluation du prompt,
+        ce qui interrompt la génération côté Ollama. Une requête requests
+        bloquée dans un autre thread ne peut pas être abandonnée ainsi.
+        
+        Args:
+            payload: Corps de la requête Ollama ('stream' à False donne un seul fragment)
+            timeout: Délai maximal en secondes (connexion et attente de chaque ligne)
+            
+        Yields:
+            str: Fragments successifs de la réponse
+            
+        Raises:
+            requests.exceptions.RequestException: En cas d'erreur réseau, HTTP ou d'Ollama
+        """
+        payload = dict(payload)
+        payload.setdefault('keep_alive', self.keep_alive)
+        corps = json.dumps(payload).encode('utf-8')
+        url = urllib.parse.urlsplit(self.base_url)
+        https = url.scheme == 'https'
+        
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(url.hostname, url.port or (443 if https else 80), ssl=https or None),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            raise requests.exceptions.ConnectTimeout(f"Connexion à {self.base_url} trop longue")
+        except OSError as e:
+            raise requests.exceptions.ConnectionError(e)
+        
+        async def lire_ligne() -> bytes:
+            return await asyncio.wait_for(reader.readline(), timeout)
+        
+        try:
+            writer.write(
+                f"POST {url.path.rstrip('/')}/api/generate HTTP/1.1\r\n"
+                f"Host: {url.netloc}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(corps)}\r\n"
+                f"Connection: close\r\n\r\n".encode('ascii') + corps
+            )
+            await writer.drain()
+            
+            statut = (await lire_ligne()).split()
+            entetes = {}
+            while True:
+                ligne = await lire_ligne()
+                if not ligne.strip():
+                    break
+                nom, _, valeur = ligne.decode('latin-1').partition(':')
+                entetes[nom.strip().lower()] = valeur.strip()
+            if len(statut) < 2 or not statut[1].isdigit():
+                raise requests.exceptions.ConnectionError(f"Réponse HTTP invalide : {statut}")
+            if int(statut[1]) >= 400:
+                raise requests.exceptions.HTTPError(f"Erreur HTTP {int(statut[1])} d'Ollama")
+            
+            tampon = b""
+            morceaux = entetes.get('transfer-encoding', '').lower() == 'chunked'
+            while True:
+                if morceaux:
+                    taille = int((await lire_ligne()).split(b';')[0].strip() or b'0', 16)
+                    if taille == 0:
+                        break
+                    tampon += await asyncio.wait_for(reader.readexactly(taille + 2), timeout)
+                    tampon = tampon[:-2]
+                else:
+                    # Corps délimité par la fermeture de la connexion (Connection: close)
+                    ligne = await lire_ligne()
+                    if not ligne:
+                        break
+                    tampon += ligne
+                
+                *lignes, tampon = tampon.split(b'\n')
+                for ligne in lignes:
+                    if not ligne.strip():
+                        continue
+                    morceau = json.loads(ligne)
+                    if 'error' in morceau:
+                        raise requests.exceptions.RequestException(morceau['error'])
+                    yield morceau.get('response', '')
+                    if morceau.get('done'):
+                        return
+            if tampon.strip():
+                yield json.loads(tampon).get('response', '')
+        except requests.exceptions.RequestException:
+            raise  # Dérive d'OSError : ne pas la confondre avec une erreur réseau
+        except asyncio.TimeoutError:
+            raise requests.exceptions.ReadTimeout(f"Pas de réponse d'Ollama en {timeout} s")
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise requests.exceptions.ConnectionError(e)
+        finally:
+            writer.close()
+    
+    def prechauffer(self, modele: str, payload: Optional[dict] = None) -> threading.Thread:
+        """
+        Charge le modèle dans Ollama en arrière-plan pour que la première
+        commande ne paie pas le chargement à froid.
+        
+        Args:
+            modele: Nom exact du modèle (ex : mistral:latest)
+            payload: Requête de classification à envoyer une première fois, pour que
+                son prompt système soit déjà dans le cache KV d'Ollama (facultatif)
+            
+        Returns:
+            threading.Thread: Thread de préchauffage (déjà démarré)
+        """
+        def _prechauffer():
+            debut = time.monotonic()
+            try:
+                # Un prompt vide charge le modèle sans rien générer ; les options doivent
+                # être celles de la classification pour éviter un rechargement ensuite
+                requete = dict(payload) if payload else {"model": modele, "prompt": "", "options": OPTIONS_OLLAMA}
+                requete["stream"] = False
+                self.generer(requete, timeout=120)
+                print(f"🔥 Modèle '{modele}' chargé dans Ollama ({time.monotonic() - debut:.1f} s)")
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️  Préchauffage d'Ollama impossible : {e}")
+        
+        self.prechauffage = threading.Thread(target=_prechauffer, name="prechauffage-ollama", daemon=True)
+        self.prechauffage.start()
+        return self.prechauffage
+
+
+CLIENT_OLLAMA = ClientOllama()
+
+
+# ==================== DISJONCTEUR OLLAMA ====================
+
+class DisjoncteurOllama:
+    """
+    Disjoncteur (circuit breaker) et délai adaptatif pour les requêtes à Ollama.
+    
+    - Fermé : les requêtes passent ; leur latence et leur issue sont suivies
+      sur une fenêtre glissante.
+    - Ouvert : après echecs_max échecs consécutifs, ou une proportion
+      d'échecs trop élevée dans la fenêtre, les requêtes sont refusées et
+      l'appelant passe directement au repli local, sans attendre un timeout.
+    - Semi-ouvert : une fois la pause écoulée, une seule requête de sonde est
+      autorisée ; sa réussite referme le disjoncteur, son échec le rouvre.
+    
+    Le délai accordé à chaque requête suit le percentile des latences
+    récentes (multiplié par un facteur) au lieu d'un délai fixe.
+    """
+    
+    FERME = 'ferme'
+    OUVERT = 'ouvert'
+    SEMI_OUVERT = 'semi_ouvert'
+    
+    def __init__(self, echecs_max: int = DISJONCTEUR_ECHECS, taux_echec_max: float = DISJONCTEUR_TAUX_ECHEC,
+                 fenetre: int = DISJONCTEUR_FENETRE, pause: float = DISJONCTEUR_PAUSE,
+                 timeout_max: float = OLLAMA_TIMEOUT, timeout_min: float = OLLAMA_TIMEOUT_MIN,
+                 facteur: float = OLLAMA_TIMEOUT_FACTEUR, percentile: float = OLLAMA_TIMEOUT_PERCENTILE):
+        """
+        Args:
+            echecs_max: Échecs consécutifs qui ouvrent le disjoncteur
+            taux_echec_max: Proportion d'échecs dans la fenêtre qui l'ouvre (fenêtre pleine uniquement)
+            fenetre: Nombre de requêtes récentes suivies
+            pause: Durée d'ouverture avant la requête de sonde, en secondes
+            timeout_max: Délai utilisé sans mesures, et borne supérieure du délai adaptatif
+            timeout_min: Borne inférieure du délai adaptatif
+            facteur: Multiplicateur appliqué au percentile des latences
+            percentile: Percentile des latences récentes (0 à 100)
+        """
+        self.echecs_max = echecs_max
+        self.taux_echec_max = taux_echec_max
+        self.pause = pause
+        self.timeout_max = timeout_max
+        self.timeout_min = timeout_min
+        self.facteur = facteur
+        self.percentile = percentile
+        
+        self.etat = self.FERME
+        self._issues = collections.deque(maxlen=fenetre)      # True pour un échec
+        self._latences = collections.deque(maxlen=fenetre)    # Durées des requêtes réussies (s)
+        self._echecs_consecutifs = 0
+        self._reouverture = 0.0    # Instant (time.monotonic) de la prochaine sonde
+        self._sonde_en_cours = False
+        self._verrou = threading.Lock()
+        
+        self.ouvertures = 0
+        self.refus = 0
+    
+    def autoriser(self) -> bool:
+        """
+        Indique si une requête peut être envoyée. Une réponse positive doit
+        être suivie d'un appel à succes, echec ou abandon.
+        
+        Returns:
+            bool: False si le disjoncteur est ouvert (passer au repli local)
+        """
+        with self._verrou:
+            if self.etat == self.OUVERT and time.monotonic() >= self._reouverture:
+                self.etat = self.SEMI_OUVERT
+            if self.etat == self.FERME:
+                return True
+            if self.etat == self.SEMI_OUVERT and not self._sonde_en_cours:
+                self._sonde_en_cours = True
+                return True
+            self.refus += 1
+            return False
+    
+    def timeout(self) -> float:
+        """
+        Returns:
+            float: Délai à accorder à la prochaine requête, en secondes
+        """
+        with self._verrou:
+            if len(self._latences) < OLLAMA_TIMEOUT_MESURES_MIN:
+                return self.timeout_max
+            latences = sorted(self._latences)
+            rang = min(len(latences) - 1, math.ceil(self.percentile / 100 * len(latences)) - 1)
+            return min(self.timeout_max, max(self.timeout_min, latences[max(rang, 0)] * self.facteur))
+    
+    def succes(self, duree: float) -> None:
+        """
+        Args:
+            duree: Durée de la requête réussie en secondes
+        """
+        with self._verrou:
+            self._issues.append(False)
+            self._latences.append(duree)
+            self._echecs_consecutifs = 0
+            self._sonde_en_cours = False
+            if self.etat != self.FERME:
+                self.etat = self.FERME
+                print("🔌 Ollama répond de nouveau : disjoncteur refermé")
+    
+    def echec(self) -> None:
+        """
+        Enregistre une requête en erreur ou hors délai.
+        """
+        with self._verrou:
+            self._issues.append(True)
+            self._echecs_consecutifs += 1
+            self._sonde_en_cours = False
+            fenetre_pleine = len(self._issues) == self._issues.maxlen
+            if (self.etat == self.SEMI_OUVERT or self._echecs_consecutifs >= self.echecs_max
+                    or (fenetre_pleine and sum(self._issues) / len(self._issues) >= self.taux_echec_max)):
+                if self.etat != self.OUVERT:
+                    self.ouvertures += 1
+                    print(f"🔌 Ollama en échec : disjoncteur ouvert, repli local pendant {self.pause:.0f} s")
+                self.etat = self.OUVERT
+                self._reouverture = time.monotonic() + self.pause
+    
+    def abandon(self) -> None:
+        """
+        Requête autorisée puis annulée avant sa réponse : ni succès ni échec.
+        """
+        with self._verrou:
+            self._sonde_en_cours = False
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: État, nombre d'ouvertures, requêtes refusées, proportion
+            d'échecs récente et délai actuellement accordé
+        """
+        timeout = self.timeout()
+        with self._verrou:
+            return {
+                'etat': self.etat,
+                'ouvertures': self.ouvertures,
+                'refus': self.refus,
+                'taux_echec_recent': sum(self._issues) / len(self._issues) if self._issues else 0.0,
+                'timeout_s': timeout,
+            }
+
+
+DISJONCTEUR_OLLAMA = DisjoncteurOllama()
+
+
+# ==================== SYNTHÈSE VOCALE ====================
+
+class CacheVocal:
+    """
+    Cache de phrases pré-synthétisées en fichiers WAV.
+    
+    Les phrases fixes sont rendues une fois avec engine.save_to_file, puis
+    rejouées en projetant le fichier en mémoire (mmap) et en écrivant les
+    échantillons directement dans un flux de sortie PyAudio : ni synthèse ni
+    copie du fichier à chaque confirmation. Les autres textes restent
+    synthétisés à la volée.
+    """
+    
+    # Nombre de trames écrites à la fois (permet d'interrompre la lecture)
+    TRAMES_PAR_ECRITURE = 1024
+    
+    def __init__(self, dossier: str = CACHE_VOCAL_DOSSIER):
+        """
+        Args:
+            dossier: Dossier des fichiers WAV (créé si nécessaire)
+        """
+        self.dossier = dossier
+        self._signature = None  # Voix, vitesse et volume du moteur
+        self._audio = None
+        self._flux: Dict[Tuple[int, int, int], "pyaudio.Stream"] = {}
+        self.lectures = 0
+    
+    def chemin(self, texte: str) -> Optional[str]:
+        """
+        Args:
+            texte: Phrase à prononcer
+        
+        Returns:
+            str: Fichier WAV de la phrase pour le moteur courant (None avant preparer())
+        """
+        if self._signature is None:
+            return None
+        cle = hashlib.sha1(f"{texte}|{self._signature}".encode('utf-8')).hexdigest()
+        return os.path.join(self.dossier, f"{cle}.wav")
+    
+    def preparer(self, engine: pyttsx3.Engine, phrases: List[str]) -> int:
+        """
+        Synthétise en WAV les phrases absentes du cache.
+        
+        Doit être appelée depuis le thread propriétaire du moteur.
+        
+        Args:
+            engine: Moteur TTS configuré
+            phrases: Phrases à pré-synthétiser
+        
+        Returns:
+            int: Nombre de phrases nouvellement synthétisées
+        """
+        self._signature = "|".join(
+            str(engine.getProperty(propriete)) for propriete in ('voice', 'rate', 'volume')
+        )
+        os.makedirs(self.dossier, exist_ok=True)
+        
+        a_rendre = []
+        for texte in dict.fromkeys(phrases):
+            chemin = self.chemin(texte)
+            if not os.path.exists(chemin):
+                engine.save_to_file(texte, chemin + '.tmp')
+                a_rendre.append(chemin)
+        if not a_rendre:
+            return 0
+        engine.runAndWait()
+        
+        nouvelles = 0
+        for chemin in a_rendre:
+            if self._lire_entete(chemin + '.tmp') is not None:
+                os.replace(chemin + '.tmp', chemin)
+                nouvelles += 1
+            else:
+                # Certains pilotes (ex : macOS) produisent un autre format que WAV
+                with contextlib.suppress(OSError):
+                    os.remove(chemin + '.tmp')
+        return nouvelles
+    
+    @staticmethod
+    def _lire_entete(chemin: str, contenu=None) -> Optional[Tuple[int, int, int, int, int]]:
+        """
+        Parcourt les blocs RIFF d'un fichier WAV PCM.
+        
+        Args:
+            chemin: Fichier WAV
+            contenu: Contenu déjà projeté en mémoire (sinon le fichier est lu)
+        
+        Returns:
+            tuple: (canaux, fréquence, octets par échantillon, début et taille
+            des données) ou None si le fichier n'est pas un WAV PCM exploitable
+        """
+        try:
+            if contenu is None:
+                with open(chemin, 'rb') as f:
+                    contenu = f.read()
+            if len(contenu) < 12 or contenu[0:4] != b'RIFF' or contenu[8:12] != b'WAVE':
+                return None
+            
+            format_audio = None
+            position = 12
+            while position + 8 <= len(contenu):
+                identifiant, taille = struct.unpack_from('<4sI', contenu, position)
+                position += 8
+                if identifiant == b'fmt ':
+                    code, canaux, frequence, _, _, bits = struct.unpack_from('<HHIIHH', contenu, position)
+                    if code not in (1, 0xFFFE):  # PCM entier uniquement
+                        return None
+                    format_audio = (canaux, frequence, bits // 8)
+                elif identifiant == b'data' and format_audio:
+                    # Certains pilotes laissent une taille nulle ou fausse dans l'en-tête
+                    taille = min(taille, len(contenu) - position) or len(contenu) - position
+                    return format_audio + (position, taille)
+                position += taille + (taille & 1)  # Les blocs sont alignés sur 2 octets
+        except (OSError, struct.error):
+            pass
+        return None
+    
+    def jouer(self, texte: str, interruption: Optional[threading.Event] = None) -> bool:
+        """
+        Joue la phrase depuis le cache si elle y figure.
+        
+        Args:
+            texte: Phrase à prononcer
+            interruption: Événement qui arrête la lecture en cours lorsqu'il est levé
+        
+        Returns:
+            bool: True si la phrase a été jouée (ou interrompue) depuis le cache,
+            False si elle doit être synthétisée à la volée
+        """
+        chemin = self.chemin(texte)
+        if chemin is None or not os.path.exists(chemin):
+            return False
+        
+        try:
+            with open(chemin, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contenu:
+                entete = self._lire_entete(chemin, contenu)
+                if entete is None:
+                    return False
+                canaux, frequence, largeur, debut, taille = entete
+                flux = self._flux_sortie(canaux, frequence, largeur)
+                pas = self.TRAMES_PAR_ECRITURE * canaux * largeur
+                with memoryview(contenu) as vue:
+                    for position in range(debut, debut + taille, pas):
+                        if interruption is not None and interruption.is_set():
+                            break
+                        flux.write(vue[position:min(position + pas, debut + taille)])
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Lecture de la phrase en cache impossible : {e}")
+            return False
+        
+        self.lectures += 1
+        return True
+    
+    def _flux_sortie(self, canaux: int, frequence: int, largeur: int) -> "pyaudio.Stream":
+        """
+        Flux de sortie PyAudio, ouvert une fois par format puis réutilisé.
+        """
+        format_audio = (canaux, frequence, largeur)
+        if format_audio not in self._flux:
+            if self._audio is None:
+                self._audio = pyaudio.PyAudio()
+            self._flux[format_audio] = self._audio.open(
+                format=self._audio.get_format_from_width(largeur),
+                channels=canaux,
+                rate=frequence,
+                output=True,
+            )
+        return self._flux[format_audio]
+    
+    def fermer(self) -> None:
+        """
+        Ferme les flux de sortie audio.
+        """
+        for flux in self._flux.values():
+            flux.stop_stream()
+            flux.close()
+        self._flux.clear()
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+
+class TravailleurVocal:
+    """
+    Thread propriétaire du moteur pyttsx3, alimenté par une file à priorités.
+    
+    Le moteur est créé dans le thread qui l'utilise (certains pilotes, comme
+    SAPI5 sous Windows, ne tolèrent pas d'être appelés depuis un autre thread).
+    Les messages portent une clé : un nouveau message remplace ceux de même clé
+    encore en attente, et les messages trop anciens sont abandonnés plutôt que
+    prononcés en retard. Pendant que l'assistant parle, la propriété muet
+    indique à la boucle d'écoute de ne pas transcrire sa propre voix.
+    """
+    
+    def __init__(self, fabrique_moteur=None, expiration: float = TTS_EXPIRATION,
+                 marge_muet: float = TTS_MARGE_MUET, cache_vocal: Optional[CacheVocal] = None):
+        """
+        Args:
+            fabrique_moteur: Fonction créant le moteur pyttsx3 (initialiser_voix par défaut)
+            expiration: Délai au-delà duquel un message en attente est abandonné (s)
+            marge_muet: Durée pendant laquelle muet reste vrai après la parole (s)
+            cache_vocal: Cache des phrases fixes pré-synthétisées (None pour s'en passer)
+        """
+        self.fabrique_moteur = fabrique_moteur or initialiser_voix
+        self.cache_vocal = cache_vocal
+        self.expiration = expiration
+        self.marge_muet = marge_muet
+        self.engine = None
+        
+        self._file = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._dernier_par_cle: Dict[str, int] = {}
+        self._verrou = threading.Lock()
+        self._en_attente = 0
+        self._fin_parole = 0.0
+        self._interrompre = threading.Event()
+        self._pret = threading.Event()
+        self._thread = None
+        self.en_train_de_parler = threading.Event()
+        
+        self.messages_prononces = 0
+        self.messages_remplaces = 0
+        self.messages_expires = 0
+        self.messages_interrompus = 0
+    
+    def demarrer(self) -> bool:
+        """
+        Démarre le thread et attend que le moteur soit initialisé.
+        
+        Returns:
+            bool: True si le moteur de synthèse est prêt
+        """
+        self._thread = threading.Thread(target=self._executer, name="synthese-vocale", daemon=True)
+        self._thread.start()
+        self._pret.wait()
+        return self.engine is not None
+    
+    def _executer(self) -> None:
+        try:
+            self.engine = self.fabrique_moteur()
+            self.engine.connect('started-word', self._sur_mot)
+        except (Exception, SystemExit):
+            # initialiser_voix() a déjà affiché l'erreur
+            self.engine = None
+        self._pret.set()
+        if self.engine is None:
+            return
+        
+        if self.cache_vocal is not None:
+            # Les messages arrivés entre-temps attendent dans la file
+            try:
+                nouvelles = self.cache_vocal.preparer(self.engine, PHRASES_PRECALCULEES)
+                if nouvelles:
+                    print(f"🔊 {nouvelles} phrase(s) pré-synthétisée(s) dans {self.cache_vocal.dossier}")
+            except Exception as e:
+                print(f"⚠️  Pré-synthèse des phrases impossible : {e}")
+        
+        while True:
+            _, sequence, texte, echeance, cle = self._file.get()
+            if texte is None:
+                break
+            try:
+                if cle is not None and self._dernier_par_cle.get(cle) != sequence:
+                    self.messages_remplaces += 1
+                elif time.monotonic() > echeance:
+                    self.messages_expires += 1
+                else:
+                    self._prononcer(texte)
+            finally:
+                with self._verrou:
+                    self._en_attente -= 1
+                    if cle is not None and self._dernier_par_cle.get(cle) == sequence:
+                        del self._dernier_par_cle[cle]
+    
+    def _prononcer(self, texte: str) -> None:
+        self._interrompre.clear()
+        self.en_train_de_parler.set()
+        try:
+            debut = time.perf_counter()
+            if self.cache_vocal is not None and self.cache_vocal.jouer(texte, self._interrompre):
+                METRIQUES.enregistrer('parler_cache', time.perf_counter() - debut)
+                if self._interrompre.is_set():
+                    self._interrompre.clear()
+                    self.messages_interrompus += 1
+            else:
+                self.engine.say(texte)
+                self.engine.runAndWait()
+                METRIQUES.enregistrer('parler', time.perf_counter() - debut)
+            self.messages_prononces += 1
+        except Exception as e:
+            print(f"❌ Erreur lors de la synthèse vocale : {e}")
+        finally:
+            self._fin_parole = time.monotonic()
+            self.en_train_de_parler.clear()
+    
+    def _sur_mot(self, name, location, length) -> None:
+        # Appelé par pyttsx3 dans le thread de synthèse, à chaque mot prononcé
+        if self._interrompre.is_set():
+            self._interrompre.clear()
+            self.messages_interrompus += 1
+            self.engine.stop()
+    
+    def annoncer(self, texte: str, priorite: int = PRIORITE_NORMALE, cle: Optional[str] = None,
+                 interrompre: bool = False) -> None:
+        """
+        Ajoute un message à prononcer, sans attendre.
+        
+        Args:
+            texte: Texte à prononcer
+            priorite: PRIORITE_URGENTE, PRIORITE_NORMALE ou PRIORITE_BASSE
+            cle: Clé de regroupement (le texte lui-même par défaut) ; seul le
+                dernier message en attente pour une clé est prononcé
+            interrompre: Couper la phrase en cours de prononciation
+        """
+        cle = texte if cle is None else cle
+        with self._verrou:
+            sequence = next(self._sequence)
+            self._dernier_par_cle[cle] = sequence
+            self._en_attente += 1
+        if interrompre and self.en_train_de_parler.is_set():
+            self._interrompre.set()
+        self._file.put((priorite, sequence, texte, time.monotonic() + self.expiration, cle))
+    
+    @property
+    def muet(self) -> bool:
+        """
+        True si l'assistant parle, va parler, ou vient de parler.
+        """
+        if self._en_attente or self.en_train_de_parler.is_set():
+            return True
+        return time.monotonic() - self._fin_parole < self.marge_muet
+    
+    def attendre(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend que tous les messages en attente aient été traités.
+        
+        Args:
+            timeout: Délai maximal en secondes (None pour attendre indéfiniment)
+        
+        Returns:
+            bool: True si la file est vide
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._en_attente or self.en_train_de_parler.is_set():
+            if self._thread is None or not self._thread.is_alive():
+                return False
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.02)
+        return True
+    
+    def arreter(self, timeout: float = 10.0) -> None:
+        """
+        Prononce les messages encore en attente puis arrête le thread.
+        
+        Args:
+            timeout: Délai maximal d'attente en secondes
+        """
+        if self._thread is None:
+            return
+        self._file.put((float('inf'), next(self._sequence), None, 0.0, None))
+        self._thread.join(timeout)
+        if self.cache_vocal is not None and not self._thread.is_alive():
+            self.cache_vocal.fermer()
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Nombre de messages prononcés, remplacés, expirés et interrompus
+        """
+        return {
+            'prononces': self.messages_prononces,
+            'remplaces': self.messages_remplaces,
+            'expires': self.messages_expires,
+            'interrompus': self.messages_interrompus,
+        }
+
+
+# ==================== LANCEMENT DE SPOTIFY ====================
+
+class DetecteurProcessus:
+    """
+    Détection d'un processus en cours d'exécution, avec un cache de courte durée.
+    
+    Sous Linux, /proc est parcouru directement (aucun sous-processus) ;
+    ailleurs, tasklist (Windows) ou pgrep (macOS, BSD) sont appelés au plus
+    une fois par période de validité du cache.
+    """
+    
+    def __init__(self, noms=NOMS_PROCESSUS_SPOTIFY, ttl: float = DETECTION_PROCESSUS_TTL,
+                 racine_proc: str = '/proc'):
+        """
+        Args:
+            noms: Noms d'exécutables recherchés (casse ignorée)
+            ttl: Durée de validité d'un résultat en secondes
+            racine_proc: Point de montage de procfs sous Linux
+        """
+        self.noms = {nom.lower() for nom in noms}
+        self.ttl = ttl
+        self.racine_proc = racine_proc
+        self._resultat = None
+        self._horodatage = 0.0
+        self.detections = 0
+    
+    def est_lance(self) -> bool:
+        """
+        Returns:
+            bool: True si l'un des processus recherchés tourne
+        """
+        if self._resultat is not None and time.monotonic() - self._horodatage < self.ttl:
+            return self._resultat
+        self.detections += 1
+        self.marquer(self._detecter())
+        return self._resultat
+    
+    def marquer(self, lance: bool) -> None:
+        """
+        Impose le résultat (ex : juste après un lancement réussi) jusqu'à expiration du cache.
+        """
+        self._resultat = lance
+        self._horodatage = time.monotonic()
+    
+    def invalider(self) -> None:
+        self._resultat = None
+    
+    def _detecter(self) -> bool:
+        if sys.platform.startswith('linux') and os.path.isdir(self.racine_proc):
+            return self._detecter_proc()
+        if sys.platform == 'win32':
+            result = subprocess.run(['tasklist', '/FO', 'CSV', '/NH'], capture_output=True, text=True, timeout=5)
+            images = {ligne.split('","', 1)[0].strip('"').lower() for ligne in result.stdout.splitlines()}
+            return not self.noms.isdisjoint(images)
+        return any(
+            subprocess.run(['pgrep', '-i', '-x', nom], capture_output=True, timeout=5).returncode == 0
+            for nom in self.noms
+        )
+    
+    def _detecter_proc(self) -> bool:
+        # /proc/<pid>/comm contient le nom de l'exécutable (tronqué à 15 caractères)
+        with os.scandir(self.racine_proc) as entrees:
+            for entree in entrees:
+                if not entree.name.isdigit():
+                    continue
+                try:
+                    with open(os.path.join(entree.path, 'comm'), 'r', encoding='utf-8', errors='replace') as f:
+                        if f.read().strip().lower() in self.noms:
+                            return True
+                except OSError:
+                    continue  # Processus terminé entre-temps
+        return False
+
+
+def methode_commande(commande, shell: bool = False, attente: float = LANCEMENT_ATTENTE) -> Callable[[], bool]:
+    """
+    Crée une méthode de lancement qui exécute une commande.
+    
+    La commande est considérée comme réussie si elle tourne encore après
+    attente secondes (l'application elle-même) ou si elle s'est terminée
+    avec le code 0 (lanceur qui rend la main, comme start ou xdg-open).
+    
+    Args:
+        commande: Commande (liste d'arguments, ou chaîne avec shell=True)
+        shell: Exécuter la commande via le shell
+        attente: Délai d'observation en secondes
+    
+    Returns:
+        callable: Fonction sans argument retournant True si le lancement a réussi
+    """
+    def lancer() -> bool:
+        try:
+            processus = subprocess.Popen(
+                commande,
+                shell=shell,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return False
+        try:
+            return processus.wait(attente) == 0
+        except subprocess.TimeoutExpired:
+            return True
+    return lancer
+
+
+def methodes_lancement_spotify() -> List[Tuple[str, Callable[[], bool]]]:
+    """
+    Returns:
+        list: Méthodes de lancement adaptées au système, dans l'ordre d'essai par défaut
+    """
+    if sys.platform == 'win32':
+        methodes = [('uri', methode_commande('start spotify:', shell=True))]
+        if os.path.exists(SPOTIFY_PATH):
+            # shell=True pour contourner les restrictions de WindowsApps
+            methodes.append(('chemin_direct', methode_commande(f'"{SPOTIFY_PATH}"', shell=True)))
+        methodes.append(('powershell', methode_commande(
+            ['powershell', '-Command', f'Start-Process "{SPOTIFY_PATH}"'], attente=10)))
+        methodes.append(('commande', methode_commande('spotify', shell=True)))
+        return methodes
+    
+    if sys.platform == 'darwin':
+        return [
+            ('application', methode_commande(['open', '-a', 'Spotify'])),
+            ('uri', methode_commande(['open', 'spotify:'])),
+        ]
+    
+    methodes = []
+    if shutil.which('spotify'):
+        methodes.append(('commande', methode_commande(['spotify'])))
+    if shutil.which('flatpak'):
+        methodes.append(('flatpak', methode_commande(['flatpak', 'run', 'com.spotify.Client'])))
+    if shutil.which('snap'):
+        methodes.append(('snap', methode_commande(['snap', 'run', 'spotify'])))
+    methodes.append(('uri', methode_commande(['xdg-open', 'spotify:'])))
+    return methodes
+
+
+class LanceurSpotify:
+    """
+    Chaîne de méthodes de lancement qui retient celle qui a fonctionné.
+    
+    La méthode gagnante est essayée en premier aux lancements suivants et
+    enregistrée dans un fichier JSON pour les prochaines exécutions.
+    """
+    
+    def __init__(self, methodes: Optional[List[Tuple[str, Callable[[], bool]]]] = None,
+                 fichier: Optional[str] = LANCEUR_FICHIER):
+        """
+        Args:
+            methodes: Couples (nom, fonction de lancement) ; ceux du système par défaut
+            fichier: Fichier JSON de la méthode retenue (None pour rester en mémoire)
+        """
+        self.methodes = methodes if methodes is not None else methodes_lancement_spotify()
+        self.fichier = fichier
+        self.methode_preferee = None
+        
+        if fichier and os.path.exists(fichier):
+            try:
+                with open(fichier, 'r', encoding='utf-8') as f:
+                    self.methode_preferee = json.load(f).get('methode_preferee')
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"⚠️  Fichier du lanceur illisible, ignoré : {e}")
+    
+    def ordre(self) -> List[Tuple[str, Callable[[], bool]]]:
+        """
+        Returns:
+            list: Méthodes dans l'ordre d'essai (la méthode retenue d'abord)
+        """
+        return sorted(self.methodes, key=lambda methode: methode[0] != self.methode_preferee)
+    
+    def lancer(self) -> Optional[str]:
+        """
+        Essaie les méthodes jusqu'à ce que l'une réussisse.
+        
+        Returns:
+            str: Nom de la méthode qui a fonctionné, None si toutes ont échoué
+        """
+        for nom, methode in self.ordre():
+            try:
+                reussi = methode()
+            except Exception as e:
+                print(f"⚠️  Méthode de lancement {nom} échouée : {e}")
+                reussi = False
+            if reussi:
+                if nom != self.methode_preferee:
+                    self.methode_preferee = nom
+                    self._sauvegarder()
+                return nom
+        return None
+    
+    def _sauvegarder(self) -> None:
+        if not self.fichier:
+            return
+        try:
+            fichier_temporaire = self.fichier + '.tmp'
+            with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+                json.dump({'methode_preferee': self.methode_preferee}, f)
+            os.replace(fichier_temporaire, self.fichier)
+        except OSError as e:
+            print(f"⚠️  Impossible d'enregistrer la méthode de lancement : {e}")
+
+
+DETECTEUR_SPOTIFY = DetecteurProcessus()
+LANCEUR_SPOTIFY = LanceurSpotify()
+
+
+# ==================== ANALYSE ASYNCHRONE DES INTENTIONS ====================
+
+class MoteurIntentions:
+    """
+    Analyse d'intention asynchrone, dans une boucle asyncio tournant sur un
+    thread dédié.
+    
+    - Chaque nouvelle phrase remplace la précédente : son analyse est annulée,
+      et la requête Ollama en cours est abandonnée (connexion fermée) au lieu
+      de faire attendre les phrases suivantes jusqu'à 15 s.
+    - Après les mots-clés et le cache (instantanés), le classifieur local et
+      Ollama sont lancés en concurrence : la première réponse sûre l'emporte
+      et l'autre est annulée.
+    - Une seule requête Ollama est en vol à la fois.
+    """
+    
+    def __init__(self, utiliser_ollama: bool = True, timeout: Optional[float] = None):
+        """
+        Args:
+            utiliser_ollama: Si False, s'arrêter aux analyses locales (voir analyser_commande)
+            timeout: Délai maximal d'une requête Ollama en secondes
+                (None pour le délai adaptatif de DISJONCTEUR_OLLAMA)
+        """
+        self.utiliser_ollama = utiliser_ollama
+        self.timeout = timeout
+        
+        self._boucle = None
+        self._thread = None
+        self._tache = None       # Analyse en cours (dans la boucle)
+        self._verrou_llm = None  # asyncio.Lock créé dans la boucle
+        
+        self.analyses = 0
+        self.remplacees = 0
+        self.requetes_ollama = 0
+        self.requetes_ollama_annulees = 0
+        self.reponses_exemples = 0   # Intentions données par l'index d'exemples, sans génération
+        self.gagnants = collections.Counter()  # Étape ayant fourni chaque intention
+    
+    def demarrer(self) -> None:
+        """
+        Démarre la boucle asyncio en arrière-plan.
+        """
+        self._boucle = asyncio.new_event_loop()
+        pret = threading.Event()
+        
+        def _executer():
+            asyncio.set_event_loop(self._boucle)
+            self._verrou_llm = asyncio.Lock()
+            self._boucle.call_soon(pret.set)
+            self._boucle.run_forever()
+        
+        self._thread = threading.Thread(target=_executer, name="moteur-intentions", daemon=True)
+        self._thread.start()
+        pret.wait()
+    
+    def soumettre(self, texte: str) -> concurrent.futures.Future:
+        """
+        Lance l'analyse d'une phrase en annulant celle de la phrase précédente.
+        
+        Args:
+            texte: Texte transcrit à analyser
+            
+        Returns:
+            concurrent.futures.Future: (intention, paramètres) (voir analyser_commande) ;
+            le futur est annulé si une phrase plus récente est soumise entre-temps
+        """
+        return asyncio.run_coroutine_threadsafe(self._remplacer(texte), self._boucle)
+    
+    def annuler(self) -> None:
+        """
+        Abandonne l'analyse en cours (ex : commande déjà déclenchée sur un résultat partiel).
+        """
+        self._boucle.call_soon_threadsafe(self._annuler_tache)
+    
+    def _annuler_tache(self) -> None:
+        if self._tache is not None and not self._tache.done():
+            self._tache.cancel()
+            self.remplacees += 1
+        self._tache = None
+    
+    async def _remplacer(self, texte: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        self._annuler_tache()
+        self._tache = asyncio.current_task()
+        self.analyses += 1
+        debut = time.perf_counter()
+        resultat = await self.analyser(texte)
+        METRIQUES.enregistrer('intention', time.perf_counter() - debut)
+        return resultat
+    
+    async def analyser(self, texte: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Version asynchrone d'analyser_commande.
+        
+        Args:
+            texte: Texte transcrit à analyser
+            
+        Returns:
+            tuple: (code d'intention ou 'IGNORE', paramètres), None en cas d'erreur
+        """
+        if not texte or len(texte.strip()) < MIN_TEXT_LENGTH:
+            return None
+        
+        intention = analyser_intention_mots_cles(texte)
+        if intention:
+            print("🔍 Intention détectée par mots-clés (rapide)")
+            self.gagnants['mots_cles'] += 1
+            return intention, {}
+        
+        resultat = CACHE_INTENTIONS.obtenir(texte)
+        if resultat:
+            print("💾 Intention trouvée dans le cache")
+            self.gagnants['cache'] += 1
+            return resultat
+        
+        # Disjoncteur ouvert : le classifieur est seul en lice, puis repli local
+        disjoncte = self.utiliser_ollama and not DISJONCTEUR_OLLAMA.autoriser()
+        
+        concurrents = {}
+        if CLASSIFIEUR is not None:
+            classifieur = self._classifier(texte, self.utiliser_ollama and not disjoncte)
+            concurrents[asyncio.create_task(classifieur)] = 'classifieur'
+        if self.utiliser_ollama and not disjoncte:
+            concurrents[asyncio.create_task(self._interroger_ollama(texte))] = 'ollama'
+        
+        try:
+            en_cours = set(concurrents)
+            while en_cours:
+                terminees, en_cours = await asyncio.wait(en_cours, return_when=asyncio.FIRST_COMPLETED)
+                for tache in terminees:
+                    resultat = tache.result()
+                    if resultat:
+                        self.gagnants[concurrents[tache]] += 1
+                        return resultat
+        finally:
+            # Perdants, ou tous les concurrents si l'analyse elle-même est annulée
+            for tache in concurrents:
+                tache.cancel()
+        
+        if disjoncte:
+            print("🔌 Ollama indisponible - Utilisation de la détection par mots-clés")
+            self.gagnants['repli_local'] += 1
+            return repli_local(texte)
+        return None if self.utiliser_ollama else ('IGNORE', {})
+    
+    async def _classifier(self, texte: str, ollama_en_lice: bool) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Args:
+            texte: Texte transcrit à analyser
+            ollama_en_lice: Ollama est interrogé en parallèle et peut extraire les paramètres
+        
+        Returns:
+            tuple: (intention du classifieur local, paramètres vides) si sa confiance
+            atteint seuil_classifieur(), None sinon ou si l'intention attend des
+            paramètres qu'Ollama peut extraire
+        """
+        debut = time.perf_counter()
+        intention, confiance = await asyncio.get_running_loop().run_in_executor(
+            None, CLASSIFIEUR.predire, normaliser_texte(texte)
+        )
+        METRIQUES.enregistrer('intention_classifieur', time.perf_counter() - debut)
+        if ollama_en_lice and INTENTIONS.accepte_parametres(intention):
+            return None
+        if confiance >= seuil_classifieur():
+            print(f"🧮 Intention détectée par le classifieur local ({confiance:.0%})")
+            return intention, {}
+        return None
+    
+    async def _interroger_ollama(self, texte: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Returns:
+            tuple: (intention, paramètres) donnés par Ollama (repli local après
+            un timeout), None en cas d'erreur
+        """
+        # L'autorisation du disjoncteur a été obtenue par analyser
+        envoyee = False
+        try:
+            if INDEX_EXEMPLES is not None:
+                # Hors du verrou : le calcul d'un embedding ne fait pas la queue derrière une génération
+                timeout = self.timeout if self.timeout is not None else DISJONCTEUR_OLLAMA.timeout()
+                resultat = await asyncio.get_running_loop().run_in_executor(
+                    None, intention_exemples, texte, timeout
+                )
+                if resultat:
+                    self.reponses_exemples += 1
+                    DISJONCTEUR_OLLAMA.abandon()
+                    return resultat
+            
+            async with self._verrou_llm:
+                self.requetes_ollama += 1
+                envoyee = True
+                timeout = self.timeout if self.timeout is not None else DISJONCTEUR_OLLAMA.timeout()
+                debut = time.perf_counter()
+                intention, parametres = await classifier_flux_async(payload_ollama(texte), timeout)
+            duree = time.perf_counter() - debut
+            METRIQUES.enregistrer('intention_ollama', duree)
+            DISJONCTEUR_OLLAMA.succes(duree)
+            CACHE_INTENTIONS.enregistrer(texte, intention, parametres)
+            return intention, parametres
+        except asyncio.CancelledError:
+            if envoyee:
+                self.requetes_ollama_annulees += 1
+            DISJONCTEUR_OLLAMA.abandon()
+            raise
+        except requests.exceptions.Timeout:
+            DISJONCTEUR_OLLAMA.echec()
+            print(f"⏱️  Timeout Ollama - Utilisation de la détection par mots-clés")
+            return repli_local(texte)
+        except requests.exceptions.RequestException as e:
+            DISJONCTEUR_OLLAMA.echec()
+            print(f"❌ Erreur lors de la requête à Ollama : {e}")
+            return None
+        except Exception as e:
+            DISJONCTEUR_OLLAMA.abandon()
+            print(f"❌ Erreur lors de l'analyse de l'intention : {e}")
+            return None
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Analyses lancées, analyses remplacées avant la fin, requêtes
+            Ollama envoyées et annulées, réponses de l'index d'exemples (comptées
+            dans l'étape 'ollama') et nombre d'intentions par étape gagnante
+        """
+        return {
+            'analyses': self.analyses,
+            'remplacees': self.remplacees,
+            'requetes_ollama': self.requetes_ollama,
+            'requetes_ollama_annulees': self.requetes_ollama_annulees,
+            'reponses_exemples': self.reponses_exemples,
+            'gagnants': dict(self.gagnants),
+        }
+    
+    def arreter(self) -> None:
+        """
+        Annule l'analyse en cours et arrête la boucle.
+        """
+        if self._boucle is None:
+            return
+        
+        async def _terminer():
+            # Laisser les tâches annulées fermer leurs connexions avant l'arrêt
+            self._annuler_tache()
+            taches = asyncio.all_tasks() - {asyncio.current_task()}
+            for tache in taches:
+                tache.cancel()
+            await asyncio.gather(*taches, return_exceptions=True)
+        
+        with contextlib.suppress(concurrent.futures.TimeoutError):
+            asyncio.run_coroutine_threadsafe(_terminer(), self._boucle).result(timeout=5)
+        self._boucle.call_soon_threadsafe(self._boucle.stop)
+        self._thread.join()
+        self._boucle.close()
+        self._boucle = None
+
+
+# ==================== FONCTIONS ====================
+
+def initialiser_voix() -> pyttsx3.Engine:
+    """
+    Configure et initialise le moteur de synthèse vocale pyttsx3.
+    
+    Returns:
+        pyttsx3.Engine: Moteur TTS configuré
+    """
+    try:
+        engine = pyttsx3.init()
+        
+        # Configuration de la voix française
+        voices = engine.getProperty('voices')
+        # Chercher une voix française si disponible
+        for voice in voices:
+            if 'french' in voice.name.lower() or 'fr' in voice.id.lower():
+                engine.setProperty('voice', voice.id)
+                break
+        
+        # Configuration de la vitesse (mots par minute)
+        engine.setProperty('rate', 150)
+        
+        # Configuration du volume (0.0 à 1.0)
+        engine.setProperty('volume', 0.9)
+        
+        print("✅ Voix initialisée")
+        return engine
+    
+    except Exception as e:
+        print(f"❌ Erreur lors de l'initialisation de la voix : {e}")
+        sys.exit(1)
+
+
+def parler(engine: pyttsx3.Engine, texte: str, priorite: int = PRIORITE_NORMALE,
+           interrompre: bool = False) -> None:
+    """
+    Fait parler l'assistant avec le texte fourni.
+    
+    Avec un TravailleurVocal, le message est mis en file et la fonction rend
+    la main immédiatement ; avec un moteur pyttsx3, elle attend la fin de la phrase.
+    
+    Args:
+        engine: Moteur TTS ou TravailleurVocal
+        texte: Texte à prononcer
+        priorite: Priorité du message (TravailleurVocal uniquement)
+        interrompre: Couper la phrase en cours (TravailleurVocal uniquement)
+    """
+    if isinstance(engine, TravailleurVocal):
+        engine.annoncer(texte, priorite, interrompre=interrompre)
+        return
+    
+    try:
+        with METRIQUES.mesurer('parler'):
+            engine.say(texte)
+            engine.runAndWait()
+    except Exception as e:
+        print(f"❌ Erreur lors de la synthèse vocale : {e}")
+
+
+def verifier_ollama() -> bool:
+    """
+    Vérifie si Ollama est accessible et si le modèle est disponible.
+    Si c'est le cas, le modèle est préchargé en arrière-plan.
+    
+    Returns:
+        bool: True si Ollama est accessible, False sinon
+    """
+    try:
+        model_names = CLIENT_OLLAMA.lister_modeles()
+        
+        # Vérifier si le modèle existe (exact ou avec variante comme mistral:latest)
+        model_found = False
+        matching_model = None
+        
+        for model_name in model_names:
+            # Vérifier correspondance exacte ou si le nom commence par le modèle (ex: mistral:latest)
+            if model_name == OLLAMA_MODEL or model_name.startswith(OLLAMA_MODEL + ':'):
+                model_found = True
+                matching_model = model_name
+                break
+        
+        if model_found:
+            global OLLAMA_MODEL_ACTUAL
+            OLLAMA_MODEL_ACTUAL = matching_model
+            print(f"✅ Ollama accessible avec le modèle '{matching_model}'")
+            
+            # Verdicts mémorisés valables pour ce modèle seulement
+            CACHE_INTENTIONS.definir_empreinte(INTENTIONS.empreinte(matching_model))
+            
+            # Charger le modèle et évaluer le prompt système maintenant plutôt qu'à la première commande
+            CLIENT_OLLAMA.prechauffer(matching_model, payload_ollama("bonjour"))
+            return True
+        else:
+            print(f"⚠️  Modèle '{OLLAMA_MODEL}' non trouvé. Modèles disponibles : {model_names}")
+            print(f"💡 Installez le modèle avec : ollama pull {OLLAMA_MODEL}")
+            return False
+    except requests.exceptions.RequestException:
+        print("❌ Ollama n'est pas accessible. Assurez-vous qu'Ollama est démarré.")
+        return False
+
+
+def analyser_intention_mots_cles(texte: str) -> Optional[str]:
+    """
+    Analyse rapide basée sur des mots-clés (fallback si Ollama est trop lent).
+    
+    Args:
+        texte: Texte transcrit à analyser
+        
+    Returns:
+        str: Code d'intention de INTENTIONS_MOTS_CLES si détecté (ex : 'ACTION_SPOTIFY'), None sinon
+    """
+    if not texte:
+        return None
+    
+    resultat = CORRESPONDANCE_MOTS_CLES.analyser(texte)
+    return resultat[0] if resultat else None
+
+
+def repli_local(texte: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Intention retenue lorsqu'Ollama ne peut pas répondre (timeout, disjoncteur ouvert).
+    
+    Args:
+        texte: Texte transcrit à analyser
+        
+    Returns:
+        tuple: (intention détectée par mots-clés ou 'IGNORE' par défaut, paramètres vides)
+    """
+    return analyser_intention_mots_cles(texte) or 'IGNORE', {}
+
+
+def charger_classifieur() -> bool:
+    """
+    Charge le classifieur d'intentions local s'il a été entraîné.
+    
+    Returns:
+        bool: True si le classifieur est disponible, False sinon
+    """
+    global CLASSIFIEUR
+    if not CLASSIFIEUR_FICHIER or not os.path.exists(CLASSIFIEUR_FICHIER):
+        print("ℹ️  Pas de classifieur local (python classifieur_intentions.py exemples_intentions.tsv)")
+        return False
+    try:
+        CLASSIFIEUR = ClassifieurIntentions.charger(CLASSIFIEUR_FICHIER)
+        print(f"✅ Classifieur local chargé ({', '.join(CLASSIFIEUR.classes)})")
+    except Exception as e:
+        print(f"⚠️  Classifieur local illisible, ignoré : {e}")
+        return False
+    if CLASSIFIEUR.seuil is None:
+        print(f"⚠️  Classifieur non calibré, seuil par défaut {CLASSIFIEUR_SEUIL} "
+              f"(ré-entraînez-le pour mesurer le sien)")
+    elif math.isinf(CLASSIFIEUR.seuil):
+        print("⚠️  Classifieur trop peu fiable pour se passer d'Ollama (ajoutez des exemples)")
+    else:
+        print(f"🎯 Seuil de confiance du classifieur : {CLASSIFIEUR.seuil:.3f}")
+    return True
+
 
-# ==================== CONFIGURATION ====================
+def seuil_classifieur() -> float:
+    """
+    Returns:
+        float: Confiance minimale pour que le classifieur local se passe
+        d'Ollama : celle mesurée à l'entraînement, ou CLASSIFIEUR_SEUIL si le
+        modèle n'a pas été calibré
+    """
+    return CLASSIFIEUR_SEUIL if CLASSIFIEUR.seuil is None else CLASSIFIEUR.seuil
 
-# Chemin vers l'exécutable Spotify (à adapter selon votre installation)
-SPOTIFY_PATH = r"C:\Program Files\WindowsApps\SpotifyAB.SpotifyMusic_1.279.427.0_x64__zpdnekdrzrea0\Spotify.exe"
 
-# Chemin vers le modèle Vosk (sera téléchargé automatiquement si nécessaire)
-VOSK_MODEL_PATH = r"vosk-model-small-fr-0.22"
+def charger_index_exemples(attendre: bool = True) -> bool:
+    """
+    Charge l'index d'exemples vectorisés et vérifie que son modèle d'embeddings
+    répond (ce qui le charge aussi dans Ollama). INDEX_EXEMPLES n'est renseigné
+    qu'une fois cette vérification réussie.
+    
+    Args:
+        attendre: Si False, la vérification (jusqu'à 120 s pour un modèle froid)
+            se fait en arrière-plan, comme le préchauffage d'Ollama : l'index
+            reste indisponible jusque-là
+    
+    Returns:
+        bool: True si l'index est utilisable (ou en cours de vérification), False sinon
+    """
+    if not INDEX_EXEMPLES_FICHIER or not os.path.exists(INDEX_EXEMPLES_FICHIER):
+        print("ℹ️  Pas d'index d'exemples (python index_exemples.py exemples_intentions.tsv)")
+        return False
+    try:
+        index = IndexExemples.charger(INDEX_EXEMPLES_FICHIER)
+    except Exception as e:
+        print(f"⚠️  Index d'exemples illisible, ignoré : {e}")
+        return False
+    
+    if attendre:
+        return _activer_index_exemples(index)
+    threading.Thread(target=_activer_index_exemples, args=(index,), name="index-exemples", daemon=True).start()
+    return True
 
-# Configuration Ollama
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "mistral"  # Le nom du modèle (peut être mistral, mistral:latest, etc.)
 
-# Variable globale pour stocker le nom exact du modèle trouvé
-OLLAMA_MODEL_ACTUAL = None
+def _activer_index_exemples(index: IndexExemples) -> bool:
+    global INDEX_EXEMPLES
+    try:
+        CLIENT_OLLAMA.vectoriser(["bonjour"], index.modele, timeout=120)
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  Modèle d'embeddings '{index.modele}' indisponible, index d'exemples ignoré : {e}")
+        print(f"💡 Installez le modèle avec : ollama pull {index.modele}")
+        return False
+    
+    INDEX_EXEMPLES = index
+    print(f"✅ Index d'exemples chargé ({len(index.exemples)} exemples, modèle '{index.modele}')")
+    return True
 
-# Configuration audio
-SAMPLE_RATE = 16000
-CHUNK_SIZE = 4000
 
-# Seuil de longueur minimale du texte pour l'analyse
-MIN_TEXT_LENGTH = 3
+def intention_exemples(texte: str, timeout: float) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Compare le texte aux exemples de INDEX_EXEMPLES (similarité cosinus des embeddings).
+    
+    Args:
+        texte: Texte transcrit à analyser
+        timeout: Délai maximal du calcul de l'embedding en secondes
+        
+    Returns:
+        tuple: (intention de l'exemple le plus proche, paramètres vides) si la similarité
+        atteint INDEX_EXEMPLES_SEUIL, None sinon
+        
+    Raises:
+        requests.exceptions.RequestException: Si Ollama ne calcule pas l'embedding
+    """
+    cle = normaliser_texte(texte)
+    vecteur = CACHE_VECTEURS.obtenir(cle)
+    if vecteur is None:
+        with METRIQUES.mesurer('intention_embedding'):
+            vecteur = CLIENT_OLLAMA.vectoriser([texte.strip().lower()], INDEX_EXEMPLES.modele, timeout)[0]
+        CACHE_VECTEURS.enregistrer(cle, vecteur)
+    
+    intention, similarite, exemple = INDEX_EXEMPLES.rechercher(vecteur)
+    if similarite < INDEX_EXEMPLES_SEUIL:
+        return None
+    if INTENTIONS.accepte_parametres(intention):
+        # Seule la génération sait extraire l'artiste, le titre ou la playlist
+        return None
+    print(f"🧭 Intention détectée par similarité ({similarite:.2f} avec « {exemple} »)")
+    return intention, {}
 
 
-# ==================== FONCTIONS ====================
+_RE_INTENTION_JSON = re.compile(r'"intention"\s*:\s*"([^"]*)"')
 
-def initialiser_voix() -> pyttsx3.Engine:
+
+def interpreter_reponse_ollama(reponse: str) -> Tuple[str, Dict[str, str]]:
     """
-    Configure et initialise le moteur de synthèse vocale pyttsx3.
+    Extrait l'intention et ses paramètres d'une réponse complète d'Ollama.
     
+    Args:
+        reponse: Texte généré par le modèle (objet JSON imposé par le schéma)
+        
     Returns:
-        pyttsx3.Engine: Moteur TTS configuré
+        tuple: (code d'intention du registre, 'IGNORE' par défaut si la réponse
+        n'est pas claire ; paramètres extraits)
     """
     try:
-        engine = pyttsx3.init()
-        
-        # Configuration de la voix française
-        voices = engine.getProperty('voices')
-        # Chercher une voix française si disponible
-        for voice in voices:
-            if 'french' in voice.name.lower() or 'fr' in voice.id.lower():
-                engine.setProperty('voice', voice.id)
-                break
-        
-        # Configuration de la vitesse (mots par minute)
-        engine.setProperty('rate', 150)
-        
-        # Configuration du volume (0.0 à 1.0)
-        engine.setProperty('volume', 0.9)
-        
-        print("✅ Voix initialisée")
-        return engine
+        donnees = json.loads(reponse)
+    except ValueError:
+        donnees = None
     
-    except Exception as e:
-        print(f"❌ Erreur lors de l'initialisation de la voix : {e}")
-        sys.exit(1)
+    if not isinstance(donnees, dict):
+        # Réponse tronquée ou version d'Ollama sans sortie contrainte : chercher un code dans le texte
+        reponse_llm = reponse.upper()
+        for nom in INTENTIONS.noms():
+            if nom in reponse_llm:
+                return nom, {}
+        return 'IGNORE', {}
+    
+    intention = str(donnees.get('intention', '')).strip().upper()
+    if intention not in INTENTIONS:
+        return 'IGNORE', {}
+    return intention, INTENTIONS.extraire_parametres(intention, donnees)
 
 
-def parler(engine: pyttsx3.Engine, texte: str) -> None:
+def intention_depuis_prefixe(reponse: str) -> Optional[Tuple[str, Dict[str, str]]]:
     """
-    Fait parler l'assistant avec le texte fourni.
+    Tente de conclure à partir du début de la réponse d'Ollama.
     
     Args:
-        engine: Moteur TTS
-        texte: Texte à prononcer
+        reponse: Texte reçu jusqu'ici
+        
+    Returns:
+        tuple: (code d'intention, paramètres vides) dès que le champ "intention"
+        est complet et que cette intention n'attend aucun paramètre, None s'il
+        faut lire la suite
     """
-    try:
-        engine.say(texte)
-        engine.runAndWait()
-    except Exception as e:
-        print(f"❌ Erreur lors de la synthèse vocale : {e}")
+    correspondance = _RE_INTENTION_JSON.search(reponse)
+    if not correspondance:
+        return None
+    intention = INTENTIONS.obtenir(correspondance.group(1).strip().upper())
+    if intention is None or intention.parametres:
+        # Code inattendu, ou paramètres à lire jusqu'à la fin de l'objet
+        return None
+    return intention.nom, {}
 
 
-def verifier_ollama() -> bool:
+def classifier_flux(payload: dict, timeout: float) -> Tuple[str, Dict[str, str]]:
     """
-    Vérifie si Ollama est accessible et si le modèle est disponible.
+    Classifie via Ollama en streaming et ferme la connexion dès que la
+    réponse est sans ambiguïté, ce qui libère le modèle plus tôt.
     
+    Args:
+        payload: Corps de la requête Ollama
+        timeout: Délai maximal en secondes
+        
     Returns:
-        bool: True si Ollama est accessible, False sinon
+        tuple: (code d'intention, paramètres)
     """
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=2)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            model_names = [model.get('name', '') for model in models]
-            
-            # Vérifier si le modèle existe (exact ou avec variante comme mistral:latest)
-            model_found = False
-            matching_model = None
-            
-            for model_name in model_names:
-                # Vérifier correspondance exacte ou si le nom commence par le modèle (ex: mistral:latest)
-                if model_name == OLLAMA_MODEL or model_name.startswith(OLLAMA_MODEL + ':'):
-                    model_found = True
-                    matching_model = model_name
-                    break
-            
-            if model_found:
-                global OLLAMA_MODEL_ACTUAL
-                OLLAMA_MODEL_ACTUAL = matching_model
-                print(f"✅ Ollama accessible avec le modèle '{matching_model}'")
-                return True
-            else:
-                print(f"⚠️  Modèle '{OLLAMA_MODEL}' non trouvé. Modèles disponibles : {model_names}")
-                print(f"💡 Installez le modèle avec : ollama pull {OLLAMA_MODEL}")
-                return False
-        return False
-    except requests.exceptions.RequestException:
-        print("❌ Ollama n'est pas accessible. Assurez-vous qu'Ollama est démarré.")
-        return False
+    reponse = ""
+    with contextlib.closing(CLIENT_OLLAMA.generer_flux(payload, timeout)) as fragments:
+        for fragment in fragments:
+            reponse += fragment
+            resultat = intention_depuis_prefixe(reponse)
+            if resultat:
+                return resultat
+    return interpreter_reponse_ollama(reponse)
 
 
-def analyser_intention_mots_cles(texte: str) -> Optional[str]:
+async def classifier_flux_async(payload: dict, timeout: float) -> Tuple[str, Dict[str, str]]:
     """
-    Analyse rapide basée sur des mots-clés (fallback si Ollama est trop lent).
+    Équivalent asynchrone de classifier_flux : annuler la tâche appelante
+    ferme la connexion à Ollama.
     
     Args:
-        texte: Texte transcrit à analyser
+        payload: Corps de la requête Ollama
+        timeout: Délai maximal en secondes
         
     Returns:
-        str: 'ACTION_SPOTIFY' si détecté, None sinon
+        tuple: (code d'intention, paramètres)
     """
-    if not texte:
-        return None
-    
-    texte_lower = texte.lower()
-    
-    # Mots-clés qui indiquent une intention de lancer Spotify
-    mots_cles_spotify = [
-        'lance spotify', 'ouvre spotify', 'démarre spotify', 'start spotify',
-        'lance spotify', 'ouvrir spotify', 'démarrer spotify',
-        'spotify', 'ouvre spotify', 'lance spotify'
-    ]
+    reponse = ""
+    async with contextlib.aclosing(CLIENT_OLLAMA.generer_flux_async(payload, timeout)) as fragments:
+        async for fragment in fragments:
+            reponse += fragment
+            resultat = intention_depuis_prefixe(reponse)
+            if resultat:
+                return resultat
+    return interpreter_reponse_ollama(reponse)
+
+
+def payload_ollama(texte: str) -> dict:
+    """
+    Construit la requête de classification d'un texte par Ollama : une seule
+    requête donne l'intention et ses paramètres, sous forme d'objet JSON
+    contraint par le schéma du registre.
     
-    # Vérifier si le texte contient des mots-clés Spotify
-    for mot_cle in mots_cles_spotify:
-        if mot_cle in texte_lower:
-            return 'ACTION_SPOTIFY'
+    Args:
+        texte: Texte transcrit à analyser
+        
+    Returns:
+        dict: Corps de la requête /api/generate
+    """
+    # Utiliser le nom exact du modèle trouvé, ou le nom par défaut
+    model_to_use = OLLAMA_MODEL_ACTUAL if OLLAMA_MODEL_ACTUAL else OLLAMA_MODEL
     
-    return None
+    # Le prompt système, identique d'une requête à l'autre, précède le texte :
+    # Ollama réutilise son cache KV et n'évalue que les quelques tokens de la commande
+    return {
+        "model": model_to_use,
+        "system": INTENTIONS.prompt_systeme(),
+        "prompt": texte,
+        "format": INTENTIONS.schema(),
+        "stream": OLLAMA_STREAMING,
+        "options": OPTIONS_OLLAMA
+    }
 
 
-def analyser_intention(texte: str) -> Optional[str]:
+def analyser_commande(texte: str, utiliser_ollama: bool = True) -> Optional[Tuple[str, Dict[str, str]]]:
     """
-    Analyse l'intention de l'utilisateur via Ollama (Mistral) avec fallback sur mots-clés.
+    Analyse l'intention de l'utilisateur et ses paramètres via Ollama (Mistral)
+    avec fallback sur mots-clés.
     
     Args:
         texte: Texte transcrit à analyser
+        utiliser_ollama: Si False, s'arrêter aux analyses locales et répondre 'IGNORE'
+            plutôt que d'interroger Ollama
         
     Returns:
-        str: 'ACTION_SPOTIFY' si l'utilisateur veut lancer Spotify, 'IGNORE' sinon, None en cas d'erreur
+        tuple: (code d'intention du registre ou 'IGNORE', paramètres extraits par
+        Ollama, ex : {'artiste': 'daft punk'}), None en cas d'erreur
     """
     if not texte or len(texte.strip()) < MIN_TEXT_LENGTH:
         return None
@@ -180,77 +3307,164 @@ def analyser_intention(texte: str) -> Optional[str]:
     intention_mots_cles = analyser_intention_mots_cles(texte)
     if intention_mots_cles:
         print("🔍 Intention détectée par mots-clés (rapide)")
-        return intention_mots_cles
+        return intention_mots_cles, {}
     
-    # Si pas de mots-clés évidents, utiliser Ollama pour une analyse plus fine
-    # Prompt optimisé pour une réponse rapide et concise
-    prompt_system = (
-        "Analyse: l'utilisateur veut-il lancer Spotify? "
-        "Réponds UNIQUEMENT 'ACTION_SPOTIFY' ou 'IGNORE'."
-    )
+    # Réutiliser le verdict d'Ollama si la même phrase a déjà été analysée
+    resultat_cache = CACHE_INTENTIONS.obtenir(texte)
+    if resultat_cache:
+        print("💾 Intention trouvée dans le cache")
+        return resultat_cache
+    
+    # Classifieur local : n'escalader vers Ollama que si sa confiance est insuffisante
+    if CLASSIFIEUR is not None:
+        with METRIQUES.mesurer('intention_classifieur'):
+            intention_classifieur, confiance = CLASSIFIEUR.predire(normaliser_texte(texte))
+        # Le classifieur ne sait pas extraire l'artiste, le titre ou la playlist
+        parametres_attendus = utiliser_ollama and INTENTIONS.accepte_parametres(intention_classifieur)
+        if confiance >= seuil_classifieur() and not parametres_attendus:
+            print(f"🧮 Intention détectée par le classifieur local ({confiance:.0%})")
+            return intention_classifieur, {}
     
-    prompt_complet = f"{prompt_system}\n\nTexte: {texte}\n\nRéponse:"
+    if not utiliser_ollama:
+        return 'IGNORE', {}
     
+    # Ollama en échec répété : ne pas attendre un nouveau timeout
+    if not DISJONCTEUR_OLLAMA.autoriser():
+        print("🔌 Ollama indisponible - Utilisation de la détection par mots-clés")
+        return repli_local(texte)
+    
+    # Si pas de mots-clés évidents, utiliser Ollama pour une analyse plus fine
     try:
-        # Utiliser le nom exact du modèle trouvé, ou le nom par défaut
-        model_to_use = OLLAMA_MODEL_ACTUAL if OLLAMA_MODEL_ACTUAL else OLLAMA_MODEL
-        
-        payload = {
-            "model": model_to_use,
-            "prompt": prompt_complet,
-            "stream": False,
-            "options": {
-                "temperature": 0.0,   # Température à 0 pour des réponses déterministes
-                "num_predict": 3,     # Limite la réponse à très peu de tokens (ACTION_SPOTIFY ou IGNORE)
-                "num_ctx": 64,        # Réduit le contexte pour accélérer
-                "top_k": 1,           # Réduit les options de génération
-                "top_p": 0.1          # Réduit la diversité
-            }
-        }
+        timeout = DISJONCTEUR_OLLAMA.timeout()
         
-        response = requests.post(OLLAMA_URL, json=payload, timeout=15)
-        response.raise_for_status()
+        # Un exemple assez proche dispense de la génération
+        if INDEX_EXEMPLES is not None:
+            resultat_exemples = intention_exemples(texte, timeout)
+            if resultat_exemples:
+                DISJONCTEUR_OLLAMA.abandon()
+                return resultat_exemples
         
-        result = response.json()
-        reponse_llm = result.get('response', '').strip().upper()
+        payload = payload_ollama(texte)
+        debut = time.perf_counter()
+        with METRIQUES.mesurer('intention_ollama'):
+            if OLLAMA_STREAMING:
+                intention, parametres = classifier_flux(payload, timeout=timeout)
+            else:
+                result = CLIENT_OLLAMA.generer(payload, timeout=timeout)
+                intention, parametres = interpreter_reponse_ollama(result.get('response', ''))
+        DISJONCTEUR_OLLAMA.succes(time.perf_counter() - debut)
         
-        # Nettoyer la réponse pour extraire ACTION_SPOTIFY ou IGNORE
-        if 'ACTION_SPOTIFY' in reponse_llm:
-            return 'ACTION_SPOTIFY'
-        elif 'IGNORE' in reponse_llm:
-            return 'IGNORE'
-        else:
-            # Si la réponse n'est pas claire, on ignore par défaut
-            return 'IGNORE'
+        CACHE_INTENTIONS.enregistrer(texte, intention, parametres)
+        return intention, parametres
     
     except requests.exceptions.Timeout:
+        DISJONCTEUR_OLLAMA.echec()
         print(f"⏱️  Timeout Ollama - Utilisation de la détection par mots-clés")
-        # En cas de timeout, utiliser la détection par mots-clés
-        intention_mots_cles = analyser_intention_mots_cles(texte)
-        if intention_mots_cles:
-            return intention_mots_cles
-        return 'IGNORE'  # Par défaut, ignorer si pas de mots-clés
+        return repli_local(texte)
     except requests.exceptions.RequestException as e:
+        DISJONCTEUR_OLLAMA.echec()
         print(f"❌ Erreur lors de la requête à Ollama : {e}")
         return None
     except Exception as e:
+        DISJONCTEUR_OLLAMA.abandon()
         print(f"❌ Erreur lors de l'analyse de l'intention : {e}")
         return None
 
 
-def executer_action(code_intention: str, engine: pyttsx3.Engine) -> None:
+def analyser_intention(texte: str, utiliser_ollama: bool = True) -> Optional[str]:
+    """
+    Comme analyser_commande, sans les paramètres.
+    
+    Args:
+        texte: Texte transcrit à analyser
+        utiliser_ollama: Voir analyser_commande
+    
+    Returns:
+        str: Code d'intention (ex : 'ACTION_SPOTIFY'), 'IGNORE' sinon, None en cas d'erreur
+    """
+    resultat = analyser_commande(texte, utiliser_ollama)
+    return resultat[0] if resultat else None
+
+
+def executer_action(code_intention: str, engine: pyttsx3.Engine,
+                    parametres: Optional[Dict[str, str]] = None) -> None:
+    """
+    Exécute l'action enregistrée pour le code d'intention dans INTENTIONS.
+    
+    Args:
+        code_intention: Code d'intention ('ACTION_SPOTIFY', 'PAUSE', 'IGNORE'...)
+        engine: Moteur TTS pour les réponses vocales
+        parametres: Paramètres extraits de la commande (ex : {'artiste': 'daft punk'})
+    """
+    intention = INTENTIONS.obtenir(code_intention)
+    if intention is None:
+        print(f"⚠️  Intention inconnue : {code_intention}")
+        return
+    if intention.gestionnaire is None:
+        # IGNORE : ne rien faire, juste continuer à écouter
+        return
+    with METRIQUES.mesurer('action'):
+        intention.gestionnaire(engine, parametres or {})
+
+
+def ouvrir_controle_lecture() -> bool:
+    """
+    Ouvre le backend de pilotage de la lecture choisi par CONTROLE_LECTURE.
+    
+    Returns:
+        bool: True si les commandes de lecture sont disponibles
+    """
+    global CONTROLEUR_LECTURE
+    if not CONTROLE_LECTURE:
+        return False
+    try:
+        CONTROLEUR_LECTURE = creer_controle(CONTROLE_LECTURE, LECTEUR_MPRIS)
+        print(f"✅ Pilotage de la lecture via {CONTROLEUR_LECTURE.nom}")
+        return True
+    except ControleIndisponible as e:
+        print(f"⚠️  Pilotage de la lecture indisponible : {e}")
+        return False
+
+
+def piloter_lecture(code_intention: str, engine: pyttsx3.Engine, parametres: Optional[Dict[str, str]] = None,
+                    controle: Optional[ControleLecture] = None) -> None:
     """
-    Exécute l'action correspondant au code d'intention.
+    Exécute une commande de lecture (pause, morceau suivant, volume...) sur le
+    backend déjà ouvert, sans lancer de processus.
     
     Args:
-        code_intention: Code d'intention ('ACTION_SPOTIFY' ou 'IGNORE')
+        code_intention: Clé de COMMANDES_LECTURE (ex : 'PAUSE')
         engine: Moteur TTS pour les réponses vocales
+        parametres: Paramètres de la commande ; pour LECTURE, l'artiste, le titre
+            ou la playlist demandés sont recherchés dans le lecteur
+        controle: Backend à utiliser (CONTROLEUR_LECTURE par défaut)
     """
-    if code_intention == 'ACTION_SPOTIFY':
-        lancer_spotify(engine)
-    elif code_intention == 'IGNORE':
-        # Ne rien faire, juste continuer à écouter
-        pass
+    controle = controle or CONTROLEUR_LECTURE
+    if controle is None:
+        print("⚠️  Pilotage de la lecture indisponible")
+        parler(engine, "Contrôle de la lecture indisponible", PRIORITE_URGENTE, interrompre=True)
+        return
+    
+    methode, *arguments = COMMANDES_LECTURE[code_intention]
+    if code_intention == 'LECTURE' and parametres:
+        requete = " ".join(parametres.values())
+        try:
+            controle.ouvrir(URI_RECHERCHE.format(requete=urllib.parse.quote(requete)))
+            print(f"🔎 Recherche de « {requete} » envoyée ({controle.nom})")
+            return
+        except ControleIndisponible as e:
+            print(f"⚠️  Recherche de « {requete} » impossible, simple reprise de la lecture : {e}")
+    
+    try:
+        getattr(controle, methode)(*arguments)
+        print(f"⏯️  Commande {code_intention} envoyée ({controle.nom})")
+    except ControleIndisponible as e:
+        print(f"⚠️  Commande {code_intention} impossible : {e}")
+        if code_intention == 'LECTURE':
+            # Le lecteur n'est sans doute pas lancé : le démarrer
+            lancer_spotify(engine)
+        else:
+            parler(engine, "Spotify ne répond pas", PRIORITE_URGENTE, interrompre=True)
 
 
 def lancer_spotify(engine: pyttsx3.Engine) -> None:
@@ -262,72 +3476,54 @@ def lancer_spotify(engine: pyttsx3.Engine) -> None:
     """
     try:
         # Vérifier si Spotify est déjà en cours d'exécution
-        # Sur Windows, on peut vérifier avec tasklist
-        result = subprocess.run(
-            ['tasklist', '/FI', 'IMAGENAME eq Spotify.exe'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
+        with METRIQUES.mesurer('detection_spotify'):
+            deja_lance = DETECTEUR_SPOTIFY.est_lance()
         
-        if 'Spotify.exe' in result.stdout:
+        if deja_lance:
             print("ℹ️  Spotify est déjà en cours d'exécution")
             parler(engine, "Spotify est déjà lancé")
             return
         
-        # Méthode 1 : Essayer avec le protocole URI spotify: (méthode la plus fiable)
-        try:
-            subprocess.Popen(['start', 'spotify:'], shell=True)
-            print("✅ Spotify lancé via protocole URI")
-            parler(engine, "Spotify lancé")
-            return
-        except:
-            pass
-        
-        # Méthode 2 : Essayer avec le chemin direct si accessible
-        if os.path.exists(SPOTIFY_PATH):
-            try:
-                # Utiliser shell=True pour contourner les restrictions de WindowsApps
-                subprocess.Popen([SPOTIFY_PATH], shell=True)
-                print("✅ Spotify lancé via chemin direct")
-                parler(engine, "Spotify lancé")
-                return
-            except Exception as e:
-                print(f"⚠️  Méthode chemin direct échouée : {e}")
-        
-        # Méthode 3 : Essayer avec PowerShell pour lancer depuis WindowsApps
-        try:
-            ps_command = f'Start-Process "{SPOTIFY_PATH}"'
-            subprocess.run(
-                ['powershell', '-Command', ps_command],
-                timeout=10,
-                capture_output=True
-            )
-            print("✅ Spotify lancé via PowerShell")
-            parler(engine, "Spotify lancé")
-            return
-        except Exception as e:
-            print(f"⚠️  Méthode PowerShell échouée : {e}")
-        
-        # Méthode 4 : Essayer simplement "spotify" comme commande
-        try:
-            subprocess.Popen(['spotify'], shell=True)
-            print("✅ Spotify lancé via commande simple")
+        # Essayer les méthodes de lancement, la dernière qui a fonctionné en premier
+        methode = LANCEUR_SPOTIFY.lancer()
+        if methode:
+            DETECTEUR_SPOTIFY.marquer(True)
+            print(f"✅ Spotify lancé (méthode : {methode})")
             parler(engine, "Spotify lancé")
             return
-        except:
-            pass
         
         # Si toutes les méthodes échouent
         print("❌ Impossible de lancer Spotify avec les méthodes disponibles")
-        parler(engine, "Impossible de lancer Spotify. Essayez de l'ouvrir manuellement.")
+        parler(engine, "Impossible de lancer Spotify. Essayez de l'ouvrir manuellement.", PRIORITE_URGENTE, interrompre=True)
     
     except subprocess.TimeoutExpired:
         print("⚠️  Timeout lors de la vérification de Spotify")
-        parler(engine, "Erreur lors du lancement de Spotify")
+        parler(engine, "Erreur lors du lancement de Spotify", PRIORITE_URGENTE, interrompre=True)
     except Exception as e:
         print(f"❌ Erreur lors du lancement de Spotify : {e}")
-        parler(engine, "Erreur lors du lancement de Spotify")
+        parler(engine, "Erreur lors du lancement de Spotify", PRIORITE_URGENTE, interrompre=True)
+
+
+# Intentions connues : description pour Ollama, action et paramètres ; les exemples
+# sont les phrases de INTENTIONS_MOTS_CLES. L'ordre d'enregistrement est celui du prompt
+INTENTIONS.enregistrer('ACTION_SPOTIFY', "ouvrir l'application Spotify",
+                       lambda engine, parametres: lancer_spotify(engine))
+for _code, _description, _parametres in (
+    ('LECTURE', "lancer ou reprendre la lecture, éventuellement d'un artiste, d'un titre ou d'une playlist",
+     ('artiste', 'titre', 'playlist')),
+    ('PAUSE', "mettre la musique en pause", ()),
+    ('SUIVANT', "passer au morceau suivant", ()),
+    ('PRECEDENT', "revenir au morceau précédent", ()),
+    ('VOLUME_PLUS', "augmenter le volume", ()),
+    ('VOLUME_MOINS', "baisser le volume", ()),
+):
+    INTENTIONS.enregistrer(_code, _description,
+                           lambda engine, parametres, code=_code: piloter_lecture(code, engine, parametres),
+                           parametres=_parametres)
+INTENTIONS.enregistrer('IGNORE', "aucune de ces commandes (conversation, question, bruit)")
+
+# Le fichier de persistance est lu par verifier_ollama, une fois le modèle résolu
+CACHE_INTENTIONS = CacheIntentions()
 
 
 def telecharger_modele_vosk() -> Optional[str]:
@@ -347,82 +3543,212 @@ def telecharger_modele_vosk() -> Optional[str]:
     return None
 
 
-def ecouter_micro(engine: pyttsx3.Engine) -> None:
+def decrire_intention(intention: str, parametres: Dict[str, str]) -> str:
     """
-    Écoute le microphone en continu et traite les commandes vocales.
+    Returns:
+        str: Intention suivie de ses paramètres pour l'affichage (ex : LECTURE (artiste=daft punk))
+    """
+    if not parametres:
+        return intention
+    return f"{intention} (" + ", ".join(f"{nom}={valeur}" for nom, valeur in parametres.items()) + ")"
+
+
+def executer_analyse(analyse: concurrent.futures.Future, debut_commande: float,
+                     engine: pyttsx3.Engine) -> None:
+    """
+    Exécute l'action d'une analyse d'intention asynchrone terminée.
     
     Args:
-        engine: Moteur TTS
+        analyse: Futur rendu par MoteurIntentions.soumettre
+        debut_commande: Instant (time.perf_counter) où la phrase a été transcrite
+        engine: Moteur TTS pour les réponses vocales
+    """
+    if analyse.cancelled():
+        return  # Remplacée par une phrase plus récente
+    resultat = analyse.result()
+    if resultat:
+        intention, parametres = resultat
+        print(f"🧠 Intention détectée : {decrire_intention(intention, parametres)}")
+        executer_action(intention, engine, parametres)
+        METRIQUES.enregistrer('commande', time.perf_counter() - debut_commande)
+
+
+def traiter_flux(source, session: SessionReconnaissance, engine: pyttsx3.Engine,
+                 taille_lecture: int = CHUNK_SIZE, moteur: Optional[MoteurIntentions] = None) -> None:
+    """
+    Boucle de reconnaissance : vide la source audio, décode et exécute les commandes.
+    
+    Args:
+        source: Source audio démarrée (CaptureMicro, SourceAudioFichier...)
+        session: Session de reconnaissance Vosk
+        engine: Moteur TTS ou TravailleurVocal (la reconnaissance est coupée pendant qu'il parle)
+        taille_lecture: Nombre de trames lues à la fois dans la source
+        moteur: Moteur d'intentions démarré ; sans moteur, chaque phrase est
+            analysée de façon synchrone avant de reprendre la lecture
+    """
+    buffer_texte = ""
+    dernier_texte = ""
+    pertes_signalees = 0
+    fin_flux = False
+    vocal = engine if isinstance(engine, TravailleurVocal) else None
+    reconnaissance_coupee = False
+    analyse = None  # (futur, instant de transcription) de la dernière phrase soumise au moteur
+    
+    while not fin_flux:
+        try:
+            # Exécuter l'action de la dernière phrase dès que son analyse est terminée
+            if analyse is not None and analyse[0].done():
+                analyse, (futur, debut_commande) = None, analyse
+                executer_analyse(futur, debut_commande, engine)
+            
+            data = source.lire(taille_lecture)
+            if data and vocal is not None:
+                # Ne pas transcrire la voix de l'assistant
+                if vocal.muet:
+                    reconnaissance_coupee = True
+                    continue
+                if reconnaissance_coupee:
+                    session.reinitialiser()
+                    reconnaissance_coupee = False
+            
+            if data:
+                with METRIQUES.mesurer('asr_bloc'):
+                    evenements = session.traiter(data)
+            elif source.epuisee:
+                # Fin d'une source finie : récupérer le dernier énoncé
+                evenements = session.terminer()
+                fin_flux = True
+            else:
+                continue
+            
+            for texte, intention_anticipee in evenements:
+                if intention_anticipee and texte != dernier_texte:
+                    print(f"⚡ Commande reconnue avant la fin de l'énoncé : {texte}")
+                    dernier_texte = texte
+                    if analyse is not None:
+                        # L'analyse de la phrase précédente n'a plus d'objet
+                        moteur.annuler()
+                        analyse = None
+                    print(f"🧠 Intention détectée : {intention_anticipee}")
+                    executer_action(intention_anticipee, engine)
+                
+                elif texte and texte != dernier_texte:
+                    print(f"🎤 Vous avez dit : {texte}")
+                    buffer_texte = texte
+                    dernier_texte = texte
+                    
+                    # Analyser l'intention
+                    debut_commande = time.perf_counter()
+                    if moteur is not None:
+                        # Remplace (et annule) l'analyse de la phrase précédente
+                        analyse = (moteur.soumettre(buffer_texte), debut_commande)
+                        buffer_texte = ""
+                        continue
+                    with METRIQUES.mesurer('intention'):
+                        resultat = analyser_commande(buffer_texte)
+                    
+                    if resultat:
+                        intention, parametres = resultat
+                        print(f"🧠 Intention détectée : {decrire_intention(intention, parametres)}")
+                        executer_action(intention, engine, parametres)
+                        METRIQUES.enregistrer('commande', time.perf_counter() - debut_commande)
+                        buffer_texte = ""  # Réinitialiser le buffer
+            
+            # Signaler si la reconnaissance n'a pas suivi le rythme de la capture
+            stats = source.statistiques()
+            if stats['trames_perdues'] > pertes_signalees:
+                secondes_perdues = (stats['trames_perdues'] - pertes_signalees) / SAMPLE_RATE
+                print(f"⚠️  Retard du pipeline : {secondes_perdues:.1f} s d'audio perdues "
+                      f"({stats['debordements_entree']} débordements d'entrée au total)")
+                pertes_signalees = stats['trames_perdues']
+        
+        except KeyboardInterrupt:
+            print("\n\n🛑 Arrêt demandé par l'utilisateur")
+            break
+        except Exception as e:
+            print(f"❌ Erreur lors de l'écoute : {e}")
+            continue
+    
+    if analyse is not None and fin_flux:
+        # Source finie : attendre l'analyse de la dernière phrase
+        futur, debut_commande = analyse
+        concurrent.futures.wait([futur])
+        try:
+            executer_analyse(futur, debut_commande, engine)
+        except Exception as e:
+            print(f"❌ Erreur lors de l'écoute : {e}")
+
+
+def charger_modele_vosk() -> Optional[vosk.Model]:
+    """
+    Vérifie, télécharge si nécessaire et charge le modèle Vosk.
+    
+    Returns:
+        vosk.Model: Modèle chargé, None si introuvable
     """
-    # Vérifier et télécharger le modèle Vosk
     model_path = telecharger_modele_vosk()
     if not model_path:
+        return None
+    return vosk.Model(model_path)
+
+
+def ecouter_micro(engine: pyttsx3.Engine, source=None, model: Optional[vosk.Model] = None) -> None:
+    """
+    Écoute le microphone en continu et traite les commandes vocales.
+    
+    Args:
+        engine: Moteur TTS
+        source: Source audio à utiliser à la place du microphone (ex : SourceAudioFichier)
+        model: Modèle Vosk déjà chargé (sinon il est chargé ici)
+    """
+    if model is None:
+        model = charger_modele_vosk()
+    if model is None:
         print("❌ Modèle Vosk introuvable. Veuillez le télécharger.")
         parler(engine, "Modèle de reconnaissance vocale introuvable")
         return
     
     try:
-        # Charger le modèle Vosk
-        model = vosk.Model(model_path)
-        recognizer = vosk.KaldiRecognizer(model, SAMPLE_RATE)
-        recognizer.SetWords(True)
-        
-        # Initialiser PyAudio
-        audio = pyaudio.PyAudio()
-        stream = audio.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=SAMPLE_RATE,
-            input=True,
-            frames_per_buffer=CHUNK_SIZE
-        )
+        session = SessionReconnaissance(model)
+        
+        # Démarrer la capture en arrière-plan (thread PortAudio + tampon circulaire)
+        capture = source if source is not None else CaptureMicro()
+        capture.demarrer()
+        
+        moteur = None
+        if INTENTIONS_ASYNCHRONES:
+            moteur = MoteurIntentions()
+            moteur.demarrer()
         
         print("🎤 Microphone activé. Dites 'lance Spotify' pour démarrer l'application.")
         print("💬 Appuyez sur Ctrl+C pour arrêter.\n")
         
-        buffer_texte = ""
-        dernier_texte = ""
-        
-        while True:
-            try:
-                data = stream.read(CHUNK_SIZE, exception_on_overflow=False)
-                
-                if recognizer.AcceptWaveform(data):
-                    result = json.loads(recognizer.Result())
-                    texte = result.get('text', '').strip()
-                    
-                    if texte and texte != dernier_texte:
-                        print(f"🎤 Vous avez dit : {texte}")
-                        buffer_texte = texte
-                        dernier_texte = texte
-                        
-                        # Analyser l'intention
-                        intention = analyser_intention(buffer_texte)
-                        
-                        if intention:
-                            print(f"🧠 Intention détectée : {intention}")
-                            executer_action(intention, engine)
-                            buffer_texte = ""  # Réinitialiser le buffer
-                
-                else:
-                    # Résultat partiel (en cours de reconnaissance)
-                    partial = json.loads(recognizer.PartialResult())
-                    partial_text = partial.get('partial', '').strip()
-                    if partial_text:
-                        # Afficher le texte partiel (optionnel, peut être commenté)
-                        pass
-            
-            except KeyboardInterrupt:
-                print("\n\n🛑 Arrêt demandé par l'utilisateur")
-                break
-            except Exception as e:
-                print(f"❌ Erreur lors de l'écoute : {e}")
-                continue
+        traiter_flux(capture, session, engine, moteur=moteur)
         
         # Nettoyage
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+        capture.arreter()
+        if moteur is not None:
+            moteur.arreter()
+            stats = moteur.statistiques()
+            print(f"📊 Intentions : {stats['analyses']} analyses, {stats['remplacees']} abandonnées "
+                  f"pour une phrase plus récente, {stats['requetes_ollama_annulees']}/"
+                  f"{stats['requetes_ollama']} requêtes Ollama annulées, "
+                  f"{stats['reponses_exemples']} réponses de l'index d'exemples")
+        stats = DISJONCTEUR_OLLAMA.statistiques()
+        if stats['ouvertures']:
+            print(f"📊 Disjoncteur Ollama : ouvert {stats['ouvertures']} fois, "
+                  f"{stats['refus']} requêtes passées directement au repli local")
+        stats = capture.statistiques()
+        print(f"📊 Capture : {stats['trames_capturees']} trames, {stats['trames_perdues']} perdues, "
+              f"{stats['debordements_entree']} débordements d'entrée")
+        if session.vad:
+            print(f"📊 VAD : {session.vad.proportion_ignoree:.0%} de l'audio non transmis à Vosk")
+        stats = session.statistiques()
+        if session.reconnaisseur_grammaire:
+            print(f"📊 Grammaire : {stats['enonces']} énoncés, "
+                  f"{stats['replis_vocabulaire_complet']} replis sur le vocabulaire complet")
+        if session.validation_anticipee:
+            print(f"📊 {stats['validations_anticipees']} commandes validées avant la fin de l'énoncé")
         print("✅ Microphone fermé")
     
     except Exception as e:
@@ -439,11 +3765,62 @@ def main_loop() -> None:
     print("=" * 60)
     print()
     
-    # Initialiser la voix
-    engine = initialiser_voix()
+    # Les modules différés ne sont importés qu'à leur premier usage : vérifier
+    # avant de démarrer qu'ils sont tous installés
+    manquants = modules_manquants()
+    if manquants:
+        print(f"❌ Module manquant : {', '.join(manquants)}")
+        print("📦 Installez les dépendances avec : pip install -r requirements.txt")
+        sys.exit(1)
+    
+    # Exporter les métriques de latence
+    if METRIQUES_FICHIER:
+        METRIQUES.demarrer_export_periodique(METRIQUES_FICHIER, METRIQUES_INTERVALLE)
+    if METRIQUES_PORT:
+        try:
+            METRIQUES.demarrer_serveur_http(METRIQUES_PORT)
+            print(f"📈 Métriques disponibles sur http://127.0.0.1:{METRIQUES_PORT}/metrics")
+        except OSError as e:
+            print(f"⚠️  Serveur de métriques impossible à démarrer : {e}")
+    
+    # Charger le modèle Vosk, la voix, le classifieur, l'index d'exemples, le pilotage de la lecture
+    # et sonder Ollama en parallèle
+    engine = TravailleurVocal(cache_vocal=CacheVocal() if CACHE_VOCAL_DOSSIER else None)
+    debut_demarrage = time.perf_counter()
+    durees = {}
+    
+    def chronometrer(etape: str, fonction):
+        debut = time.perf_counter()
+        try:
+            return fonction()
+        finally:
+            durees[etape] = time.perf_counter() - debut
+            METRIQUES.enregistrer(f'demarrage_{etape}', durees[etape])
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=6, thread_name_prefix="demarrage") as executeur:
+        futur_modele = executeur.submit(chronometrer, 'modele_vosk', charger_modele_vosk)
+        futur_voix = executeur.submit(chronometrer, 'voix', engine.demarrer)
+        futur_ollama = executeur.submit(chronometrer, 'ollama', verifier_ollama)
+        executeur.submit(chronometrer, 'classifieur', charger_classifieur)
+        # Seule la lecture du fichier est attendue ; le modèle d'embeddings se charge en arrière-plan
+        executeur.submit(chronometrer, 'index_exemples', lambda: charger_index_exemples(attendre=False))
+        executeur.submit(chronometrer, 'controle_lecture', ouvrir_controle_lecture)
+    
+    duree_totale = time.perf_counter() - debut_demarrage
+    METRIQUES.enregistrer('demarrage', duree_totale)
+    print(f"⏱️  Démarrage en {duree_totale:.2f} s (" + ", ".join(
+        f"{etape} {duree:.2f} s" for etape, duree in sorted(durees.items(), key=lambda e: -e[1])) + ")")
+    
+    if not futur_voix.result():
+        sys.exit(1)
+    try:
+        model = futur_modele.result()
+    except Exception as e:
+        print(f"❌ Erreur lors du chargement du modèle Vosk : {e}")
+        model = None
     
     # Vérifier Ollama
-    if not verifier_ollama():
+    if not futur_ollama.result():
         print("\n⚠️  Ollama n'est pas correctement configuré. Le script continuera mais l'analyse d'intention ne fonctionnera pas.")
         print("   Assurez-vous qu'Ollama est démarré et que le modèle 'mistral' est installé.")
         reponse = input("Voulez-vous continuer quand même ? (o/n) : ")
@@ -451,14 +3828,35 @@ def main_loop() -> None:
             sys.exit(1)
     
     # Message de bienvenue vocal
-    parler(engine, "Assistant vocal initialisé. Dites 'lance Spotify' pour démarrer l'application.")
+    parler(engine, MESSAGE_BIENVENUE, PRIORITE_BASSE)
     
     # Démarrer l'écoute
-    ecouter_micro(engine)
+    if model is not None:
+        ecouter_micro(engine, model=model)
+    else:
+        print("❌ Modèle Vosk introuvable. Veuillez le télécharger.")
+        parler(engine, "Modèle de reconnaissance vocale introuvable")
+    
+    # Conserver les verdicts d'Ollama pour la prochaine exécution
+    stats = CACHE_INTENTIONS.statistiques()
+    print(f"📊 Cache des intentions : {stats['succes']} succès, {stats['echecs']} échecs")
+    CACHE_INTENTIONS.sauvegarder()
+    if INDEX_EXEMPLES is not None:
+        stats = CACHE_VECTEURS.statistiques()
+        print(f"📊 Cache des embeddings : {stats['succes']} succès, {stats['echecs']} échecs")
+    
+    # Récapitulatif des latences par étape
+    METRIQUES.afficher()
+    if METRIQUES_FICHIER:
+        METRIQUES.exporter_json(METRIQUES_FICHIER)
+    
+    if CONTROLEUR_LECTURE is not None:
+        CONTROLEUR_LECTURE.fermer()
     
-    # Message de fin
-    parler(engine, "Au revoir")
+    # Message de fin (prononcé avant l'arrêt du thread de synthèse)
+    parler(engine, "Au revoir", PRIORITE_URGENTE)
     print("\n👋 Au revoir !")
+    engine.arreter()
 
 
 if __name__ == "__main__":
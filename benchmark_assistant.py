@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de bout en bout de l'assistant, sans micro ni Ollama réel.
+
+Un faux serveur Ollama local (/api/tags et /api/generate) simule différents
+profils de latence et de panne, et l'audio (fichiers WAV enregistrés ou
+phrases synthétisées avec pyttsx3) est injecté à la place du microphone
+via SourceAudioFichier. Trois mesures :
+
+- latence : délai entre la fin de la phrase et le déclenchement de l'action,
+  audio joué en temps réel, pour chaque configuration et profil Ollama ;
+- debit : audio traité par seconde et charge CPU, audio injecté sans pause ;
+- decoupage : latence des commandes et charge CPU en temps réel pour chaque
+  couple (taille de lecture de la capture, taille des lots Vosk).
+
+Usage :
+    python benchmark_assistant.py --wav dossier_wav
+    python benchmark_assistant.py --synthese "lance spotify" "mets de la musique" "quelle heure est-il"
+    python benchmark_assistant.py --mode debit --duree 60
+    python benchmark_assistant.py --mode decoupage --wav dossier_wav --decoupages 4000:4000,800:3200,320:1600
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Configurer l'encodage UTF-8 pour la console Windows
+if sys.platform == 'win32' and __name__ == "__main__":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+import assistant_spotify as assistant
+from evaluer_wav import lire_etiquettes, percentile
+
+np = assistant.np
+
+# Profils du faux serveur Ollama (durées en secondes)
+PROFILS_OLLAMA = {
+    'instantane': {'latence_premier_token': 0.0, 'latence_token': 0.0, 'taux_echec': 0.0},
+    'gpu': {'latence_premier_token': 0.15, 'latence_token': 0.03, 'taux_echec': 0.0},
+    'cpu': {'latence_premier_token': 0.8, 'latence_token': 0.15, 'taux_echec': 0.0},
+    'surcharge': {'latence_premier_token': 4.0, 'latence_token': 0.5, 'taux_echec': 0.1},
+}
+
+# Configurations du pipeline comparées
+CONFIGURATIONS = {
+    'reference': {'grammaire': False, 'vad': False, 'validation_anticipee': False, 'streaming': False,
+                  'asynchrone': False},
+    'vad': {'grammaire': False, 'vad': True, 'validation_anticipee': False, 'streaming': False,
+            'asynchrone': False},
+    'grammaire': {'grammaire': True, 'vad': True, 'validation_anticipee': False, 'streaming': True,
+                  'asynchrone': False},
+    'complet': {'grammaire': True, 'vad': True, 'validation_anticipee': True, 'streaming': True,
+                'asynchrone': True},
+}
+
+# Couples (trames par lecture, trames par lot Vosk) comparés en mode decoupage
+DECOUPAGES = ((4000, 4000), (1600, 1600), (1600, 4800), (800, 3200), (800, 800), (320, 1600))
+
+# Mots qui font répondre ACTION_SPOTIFY au faux modèle
+_RE_MUSIQUE = re.compile(r'spotify|musique|chanson|playlist|morceau', re.IGNORECASE)
+
+
+class ServeurOllamaFactice:
+    """
+    Faux serveur Ollama local pour les benchmarks.
+    
+    Il répond {"intention": "ACTION_SPOTIFY"} si le texte à classer parle de
+    musique, {"intention": "IGNORE"} sinon, en découpant la réponse en
+    plusieurs tokens espacés selon le profil de latence. Une fraction des requêtes peut échouer (HTTP 500).
+    """
+    
+    def __init__(self, latence_premier_token: float = 0.0, latence_token: float = 0.0,
+                 taux_echec: float = 0.0, port: int = 0):
+        """
+        Args:
+            latence_premier_token: Délai avant le premier token (évaluation du prompt)
+            latence_token: Délai entre deux tokens
+            taux_echec: Proportion de requêtes /api/generate en erreur (0.0 à 1.0)
+            port: Port d'écoute (0 pour un port libre)
+        """
+        self.latence_premier_token = latence_premier_token
+        self.latence_token = latence_token
+        self.taux_echec = taux_echec
+        self.port = port
+        
+        self.requetes = 0
+        self.echecs = 0
+        self.interruptions = 0  # Flux fermés par le client avant la fin
+        self._verrou = threading.Lock()
+        self._serveur = None
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._serveur.server_address[1]}"
+    
+    @staticmethod
+    def tokens_reponse(prompt: str) -> List[str]:
+        """
+        Args:
+            prompt: Texte à classer (le prompt système est envoyé à part)
+        
+        Returns:
+            list: Tokens de la réponse simulée
+        """
+        if _RE_MUSIQUE.search(prompt):
+            return ['{"intention": "', 'ACTION', '_SP', 'OTIFY', '"}']
+        return ['{"intention": "', 'IGN', 'ORE', '"}']
+    
+    def demarrer(self) -> str:
+        """
+        Démarre le serveur en arrière-plan.
+        
+        Returns:
+            str: URL de base du serveur
+        """
+        serveur_factice = self
+        
+        class Gestionnaire(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Nécessaire pour le transfert par morceaux
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _repondre_json(self, code: int, contenu: dict) -> None:
+                corps = json.dumps(contenu).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+            
+            def _ecrire_morceau(self, contenu: dict) -> None:
+                ligne = (json.dumps(contenu) + '\n').encode('utf-8')
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(ligne), ligne))
+                self.wfile.flush()
+            
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self._repondre_json(200, {'models': [{'name': 'mistral:latest'}]})
+                else:
+                    self._repondre_json(404, {'error': 'not found'})
+            
+            def do_POST(self):
+                longueur = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(longueur) or b'{}')
+                if self.path != '/api/generate':
+                    self._repondre_json(404, {'error': 'not found'})
+                    return
+                
+                with serveur_factice._verrou:
+                    serveur_factice.requetes += 1
+                    echec = random.random() < serveur_factice.taux_echec
+                    if echec:
+                        serveur_factice.echecs += 1
+                if echec:
+                    self._repondre_json(500, {'error': 'surcharge simulée'})
+                    return
+                
+                # Un prompt vide ne fait que charger le modèle
+                tokens = serveur_factice.tokens_reponse(payload.get('prompt', '')) if payload.get('prompt') else []
+                time.sleep(serveur_factice.latence_premier_token)
+                
+                if not payload.get('stream', True):
+                    time.sleep(serveur_factice.latence_token * max(len(tokens) - 1, 0))
+                    self._repondre_json(200, {'response': ''.join(tokens), 'done': True})
+                    return
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    for index, token in enumerate(tokens):
+                        if index:
+                            time.sleep(serveur_factice.latence_token)
+                        self._ecrire_morceau({'response': token, 'done': False})
+                    self._ecrire_morceau({'response': '', 'done': True})
+                    self.wfile.write(b'0\r\n\r\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    with serveur_factice._verrou:
+                        serveur_factice.interruptions += 1
+        
+        self._serveur = ThreadingHTTPServer(('127.0.0.1', self.port), Gestionnaire)
+        self._serveur.daemon_threads = True
+        threading.Thread(target=self._serveur.serve_forever, name="ollama-factice", daemon=True).start()
+        return self.url
+    
+    def arreter(self) -> None:
+        """
+        Arrête le serveur.
+        """
+        if self._serveur is not None:
+            self._serveur.shutdown()
+            self._serveur.server_close()
+            self._serveur = None
+
+
+def synthetiser_phrases(phrases: List[str]) -> List[Tuple[str, bytes]]:
+    """
+    Synthétise des phrases avec pyttsx3 pour obtenir des échantillons de test.
+    
+    Args:
+        phrases: Phrases à prononcer
+    
+    Returns:
+        list: Couples (phrase, audio PCM int16 16 kHz mono)
+    """
+    engine = assistant.initialiser_voix()
+    echantillons = []
+    with tempfile.TemporaryDirectory() as dossier:
+        chemins = []
+        for index, phrase in enumerate(phrases):
+            chemin = os.path.join(dossier, f"phrase_{index}.wav")
+            engine.save_to_file(phrase, chemin)
+            chemins.append(chemin)
+        engine.runAndWait()
+        
+        for phrase, chemin in zip(phrases, chemins):
+            # Les voix produisent souvent du 22,05 kHz : rééchantillonné à SAMPLE_RATE mono
+            echantillons.append((phrase, assistant.SourceAudioFichier.depuis_wav(chemin).audio))
+    return echantillons
+
+
+def charger_wav(dossier: str) -> List[Tuple[str, bytes]]:
+    """
+    Args:
+        dossier: Dossier de fichiers WAV 16 bits
+    
+    Returns:
+        list: Couples (nom de fichier, audio PCM int16 mono à SAMPLE_RATE)
+    """
+    echantillons = []
+    for nom in sorted(os.listdir(dossier)):
+        if nom.lower().endswith('.wav'):
+            echantillons.append((nom, assistant.SourceAudioFichier.depuis_wav(os.path.join(dossier, nom)).audio))
+    return echantillons
+
+
+def generer_audio_synthetique(duree: float, proportion_parole: float = 0.3) -> bytes:
+    """
+    Génère un audio alternant silence et bruit modulé d'énergie comparable à
+    la parole, pour mesurer le débit sans enregistrement.
+    
+    Args:
+        duree: Durée totale en secondes
+        proportion_parole: Fraction du temps occupée par les salves de « parole »
+    
+    Returns:
+        bytes: Audio PCM int16 mono à SAMPLE_RATE
+    """
+    generateur = np.random.default_rng(0)
+    taux = assistant.SAMPLE_RATE
+    audio = generateur.normal(0, 30, int(duree * taux))  # Bruit de fond
+    position = 0
+    while position < len(audio):
+        longueur_salve = int(generateur.uniform(0.5, 2.0) * taux)
+        pause = int(longueur_salve * (1 - proportion_parole) / proportion_parole)
+        debut = position + pause
+        fin = min(debut + longueur_salve, len(audio))
+        if debut < fin:
+            enveloppe = np.abs(np.sin(np.linspace(0, 6 * np.pi, fin - debut)))
+            audio[debut:fin] += generateur.normal(0, 3000, fin - debut) * enveloppe
+        position = fin
+    return np.clip(audio, -32768, 32767).astype(np.int16).tobytes()
+
+
+def configurer_assistant(configuration: dict, url_ollama: str) -> None:
+    """
+    Applique une configuration au module assistant_spotify.
+    """
+    assistant.OLLAMA_STREAMING = configuration['streaming']
+    assistant.CLIENT_OLLAMA = assistant.ClientOllama(url_ollama)
+    assistant.DISJONCTEUR_OLLAMA = assistant.DisjoncteurOllama()
+    assistant.OLLAMA_MODEL_ACTUAL = 'mistral:latest'
+    # Cache vide à chaque essai : chaque phrase doit vraiment être analysée
+    assistant.CACHE_INTENTIONS = assistant.CacheIntentions(fichier=None)
+
+
+def mesurer_latence(model, echantillons: List[Tuple[str, bytes]], configuration: dict,
+                    vitesse: float, taille_lecture: int = assistant.CHUNK_SIZE,
+                    taille_lot: int = assistant.TAILLE_LOT_VOSK) -> List[dict]:
+    """
+    Joue chaque échantillon dans le pipeline et mesure le délai entre la fin
+    de l'audio de la phrase et le déclenchement de l'action.
+    
+    L'audio est écrit dans la source par blocs de taille_lecture trames,
+    comme le ferait le callback du microphone.
+    
+    Returns:
+        list: Un résultat par échantillon (intention obtenue, latence en ms ou None)
+    """
+    actions = []
+    
+    def enregistrer_action(code_intention, engine, *args, **kwargs):
+        actions.append((code_intention, time.perf_counter()))
+    
+    executer_action_original = assistant.executer_action
+    assistant.executer_action = enregistrer_action
+    moteur = assistant.MoteurIntentions() if configuration['asynchrone'] else None
+    if moteur is not None:
+        moteur.demarrer()
+    resultats = []
+    try:
+        for nom, audio in echantillons:
+            actions.clear()
+            session = assistant.SessionReconnaissance(
+                model,
+                grammaire=configuration['grammaire'],
+                vad=configuration['vad'],
+                validation_anticipee=configuration['validation_anticipee'],
+                taille_lot=taille_lot,
+            )
+            source = assistant.SourceAudioFichier(audio, taille_bloc=taille_lecture,
+                                                  vitesse=vitesse, silence_final=1.5)
+            source.demarrer()
+            assistant.traiter_flux(source, session, None, taille_lecture, moteur)
+            
+            if actions:
+                intention, horodatage = actions[0]
+                latence = (horodatage - source.horodatage_fin_audio) * 1000
+            else:
+                intention, latence = None, None
+            resultats.append({'echantillon': nom, 'intention': intention, 'latence_ms': latence})
+    finally:
+        assistant.executer_action = executer_action_original
+        if moteur is not None:
+            moteur.arreter()
+    return resultats
+
+
+def mesurer_decoupage(model, echantillons: List[Tuple[str, bytes]], configuration: dict,
+                      vitesse: float, taille_lecture: int, taille_lot: int) -> dict:
+    """
+    Mesure la latence des commandes et la charge CPU pour un découpage donné.
+    
+    Args:
+        taille_lecture: Trames lues à la fois dans la capture
+        taille_lot: Trames transmises à la fois au décodeur Vosk
+    
+    Returns:
+        dict: Mesures par échantillon et utilisation CPU pendant la lecture
+        (en pourcentage d'un cœur, le décodeur pouvant en occuper plusieurs)
+    """
+    debut, debut_cpu = time.perf_counter(), time.process_time()
+    mesures = mesurer_latence(model, echantillons, configuration, vitesse, taille_lecture, taille_lot)
+    duree, duree_cpu = time.perf_counter() - debut, time.process_time() - debut_cpu
+    return {
+        'taille_lecture': taille_lecture,
+        'taille_lot': taille_lot,
+        'mesures': mesures,
+        'cpu_pourcent': 100 * duree_cpu / duree if duree else 0.0,
+    }
+
+
+def lire_decoupages(texte: str) -> List[Tuple[int, int]]:
+    """
+    Args:
+        texte: Couples lecture:lot séparés par des virgules (ex : "4000:4000,800:3200")
+    
+    Returns:
+        list: Couples (trames par lecture, trames par lot)
+    """
+    decoupages = []
+    for element in texte.split(','):
+        if element.strip():
+            lecture, _, lot = element.partition(':')
+            decoupages.append((int(lecture), int(lot or lecture)))
+    return decoupages
+
+
+def mesurer_debit(model, audio: bytes, configuration: dict) -> dict:
+    """
+    Injecte l'audio sans pause et mesure le débit de traitement et la charge CPU.
+    
+    Returns:
+        dict: Durée d'audio, temps écoulé, facteur temps réel et utilisation CPU
+    """
+    executer_action_original = assistant.executer_action
+    assistant.executer_action = lambda *args, **kwargs: None
+    moteur = assistant.MoteurIntentions() if configuration['asynchrone'] else None
+    if moteur is not None:
+        moteur.demarrer()
+    try:
+        session = assistant.SessionReconnaissance(
+            model,
+            grammaire=configuration['grammaire'],
+            vad=configuration['vad'],
+            validation_anticipee=configuration['validation_anticipee'],
+        )
+        source = assistant.SourceAudioFichier(audio, vitesse=0)
+        debut, debut_cpu = time.perf_counter(), time.process_time()
+        source.demarrer()
+        assistant.traiter_flux(source, session, None, moteur=moteur)
+        duree, duree_cpu = time.perf_counter() - debut, time.process_time() - debut_cpu
+    finally:
+        assistant.executer_action = executer_action_original
+        if moteur is not None:
+            moteur.arreter()
+    
+    duree_audio = len(audio) / 2 / assistant.SAMPLE_RATE
+    return {
+        'duree_audio_s': duree_audio,
+        'duree_traitement_s': duree,
+        'secondes_audio_par_seconde': duree_audio / duree if duree else 0.0,
+        'cpu_pourcent': 100 * duree_cpu / duree if duree else 0.0,
+        'audio_ignore_vad': session.vad.proportion_ignoree if session.vad else 0.0,
+    }
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout de l'assistant vocal")
+    parser.add_argument('--mode', choices=['latence', 'debit', 'decoupage'], default='latence')
+    parser.add_argument('--wav', help="Dossier de phrases enregistrées (WAV 16 bits)")
+    parser.add_argument('--synthese', nargs='+', help="Phrases à synthétiser avec pyttsx3")
+    parser.add_argument('--duree', type=float, default=60, help="Durée d'audio synthétique en mode debit (s)")
+    parser.add_argument('--configurations', default=','.join(CONFIGURATIONS),
+                        help=f"Configurations à comparer parmi : {', '.join(CONFIGURATIONS)}")
+    parser.add_argument('--profils', default='gpu,cpu',
+                        help=f"Profils Ollama parmi : {', '.join(PROFILS_OLLAMA)}")
+    parser.add_argument('--decoupages', default=','.join(f"{lecture}:{lot}" for lecture, lot in DECOUPAGES),
+                        help="Couples lecture:lot (en trames) comparés en mode decoupage")
+    parser.add_argument('--vitesse', type=float, default=1.0,
+                        help="Rythme d'injection en mode latence (1.0 = temps réel)")
+    parser.add_argument('--modele', default=assistant.VOSK_MODEL_PATH, help="Chemin du modèle Vosk")
+    parser.add_argument('--json', help="Fichier où enregistrer les résultats")
+    parser.add_argument('--verbeux', action='store_true', help="Afficher les messages de l'assistant")
+    args = parser.parse_args()
+    
+    configurations = [nom.strip() for nom in args.configurations.split(',') if nom.strip()]
+    profils = [nom.strip() for nom in args.profils.split(',') if nom.strip()]
+    for nom in configurations:
+        if nom not in CONFIGURATIONS:
+            parser.error(f"configuration inconnue : {nom}")
+    for nom in profils:
+        if nom not in PROFILS_OLLAMA:
+            parser.error(f"profil Ollama inconnu : {nom}")
+    try:
+        decoupages = lire_decoupages(args.decoupages)
+    except ValueError:
+        parser.error(f"découpage invalide : {args.decoupages}")
+    
+    print("=" * 60)
+    print("⏱️  Benchmark de l'assistant vocal")
+    print("=" * 60)
+    
+    if not os.path.isdir(args.modele):
+        print(f"❌ Modèle Vosk introuvable : {args.modele}")
+        sys.exit(1)
+    assistant.vosk.SetLogLevel(-1)
+    model = assistant.vosk.Model(args.modele)
+    
+    echantillons = []
+    etiquettes = {}
+    if args.wav:
+        echantillons += charger_wav(args.wav)
+        chemin_etiquettes = os.path.join(args.wav, 'etiquettes.tsv')
+        if os.path.exists(chemin_etiquettes):
+            etiquettes = lire_etiquettes(chemin_etiquettes)
+    if args.synthese:
+        echantillons += synthetiser_phrases(args.synthese)
+    
+    sortie_console = sys.stdout
+    if not args.verbeux:
+        sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+    
+    resultats = []
+    try:
+        if args.mode == 'debit':
+            audio = b''.join(audio for _, audio in echantillons) or generer_audio_synthetique(args.duree)
+            serveur = ServeurOllamaFactice(**PROFILS_OLLAMA['instantane'])
+            url = serveur.demarrer()
+            for nom_configuration in configurations:
+                configurer_assistant(CONFIGURATIONS[nom_configuration], url)
+                mesure = mesurer_debit(model, audio, CONFIGURATIONS[nom_configuration])
+                resultats.append(dict(mesure, configuration=nom_configuration))
+            serveur.arreter()
+        elif not echantillons:
+            sys.stdout = sortie_console
+            print(f"❌ Le mode {args.mode} nécessite --wav ou --synthese")
+            sys.exit(1)
+        elif args.mode == 'decoupage':
+            # Ollama répond instantanément : seul le découpage de l'audio varie
+            serveur = ServeurOllamaFactice(**PROFILS_OLLAMA['instantane'])
+            url = serveur.demarrer()
+            for nom_configuration in configurations:
+                for taille_lecture, taille_lot in decoupages:
+                    configurer_assistant(CONFIGURATIONS[nom_configuration], url)
+                    mesure = mesurer_decoupage(model, echantillons, CONFIGURATIONS[nom_configuration],
+                                               args.vitesse, taille_lecture, taille_lot)
+                    resultats.append(dict(mesure, configuration=nom_configuration))
+            serveur.arreter()
+        else:
+            for nom_profil in profils:
+                serveur = ServeurOllamaFactice(**PROFILS_OLLAMA[nom_profil])
+                url = serveur.demarrer()
+                for nom_configuration in configurations:
+                    configurer_assistant(CONFIGURATIONS[nom_configuration], url)
+                    mesures = mesurer_latence(model, echantillons, CONFIGURATIONS[nom_configuration], args.vitesse)
+                    resultats.append({
+                        'configuration': nom_configuration,
+                        'profil': nom_profil,
+                        'mesures': mesures,
+                        'requetes_ollama': serveur.requetes,
+                        'flux_interrompus': serveur.interruptions,
+                    })
+                    serveur.requetes = serveur.interruptions = 0
+                serveur.arreter()
+    finally:
+        sys.stdout = sortie_console
+    
+    if args.mode == 'debit':
+        print(f"\n{'Configuration':<14} {'Audio/s':>9} {'CPU %':>7} {'Ignoré VAD':>11}")
+        for resultat in resultats:
+            print(f"{resultat['configuration']:<14} {resultat['secondes_audio_par_seconde']:>8.1f}x "
+                  f"{resultat['cpu_pourcent']:>7.0f} {resultat['audio_ignore_vad']:>11.0%}")
+    elif args.mode == 'decoupage':
+        taux_ms = assistant.SAMPLE_RATE / 1000
+        print(f"\n{'Configuration':<14} {'Lecture':>10} {'Lot Vosk':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+              f"{'Sans action':>12} {'CPU %':>7}")
+        for resultat in resultats:
+            latences = [m['latence_ms'] for m in resultat['mesures'] if m['latence_ms'] is not None]
+            manquees = sum(m['latence_ms'] is None for m in resultat['mesures'])
+            lecture = f"{resultat['taille_lecture'] / taux_ms:.0f} ms"
+            lot = f"{resultat['taille_lot'] / taux_ms:.0f} ms"
+            print(f"{resultat['configuration']:<14} {lecture:>10} {lot:>10} "
+                  f"{percentile(latences, 50):>9.0f} {percentile(latences, 95):>9.0f} "
+                  f"{manquees:>12} {resultat['cpu_pourcent']:>7.1f}")
+    else:
+        print(f"\n{'Configuration':<14} {'Profil':<12} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+              f"{'Sans action':>12} {'Exactes':>8} {'Ollama':>7}")
+        for resultat in resultats:
+            latences = [m['latence_ms'] for m in resultat['mesures'] if m['latence_ms'] is not None]
+            manquees = sum(m['latence_ms'] is None for m in resultat['mesures'])
+            etiquetees = [m for m in resultat['mesures'] if etiquettes.get(m['echantillon'], (None,))[0]]
+            exactes = sum((m['intention'] or 'IGNORE') == etiquettes[m['echantillon']][0] for m in etiquetees)
+            print(f"{resultat['configuration']:<14} {resultat['profil']:<12} "
+                  f"{percentile(latences, 50):>9.0f} {percentile(latences, 95):>9.0f} "
+                  f"{manquees:>12} {f'{exactes}/{len(etiquetees)}' if etiquetees else '-':>8} "
+                  f"{resultat['requetes_ollama']:>7}")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'mode': args.mode, 'resultats': resultats}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Résultats enregistrés dans : {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Benchmark interrompu par l'utilisateur")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Erreur fatale : {e}")
+        sys.exit(1)
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classifieur d'intentions local (Naive Bayes multinomial sur n-grammes de caractères).
+
+Sert d'étage intermédiaire entre les mots-clés et Ollama : une prédiction prend
+quelques dizaines de microsecondes. Entraînement à partir d'un fichier TSV
+(une ligne par exemple : INTENTION<TAB>texte) :
+
+    python classifieur_intentions.py exemples_intentions.tsv
+"""
+
+import math
+import sys
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configurer l'encodage UTF-8 pour la console Windows
+if sys.platform == 'win32' and __name__ == "__main__":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# Configuration
+FICHIER_MODELE = "classifieur_intentions.npz"
+TAILLES_N_GRAMMES = (2, 3, 4)
+DIMENSION_HACHAGE = 2 ** 13   # Nombre de cases du hachage des n-grammes
+LISSAGE = 0.5                 # Lissage additif des fréquences (Laplace/Lidstone)
+
+# Naive Bayes additionne la vraisemblance de chaque n-gramme comme s'ils étaient
+# indépendants, ce qui donne des probabilités proches de 0 ou 1 même pour une
+# phrase jamais vue. Les scores sont donc ramenés à une moyenne par n-gramme,
+# multipliée par cette échelle, pour que la confiance reste exploitable comme seuil.
+ECHELLE_CONFIANCE = 3.0
+
+# Cette confiance n'est pas une probabilité calibrée : le seuil au-delà duquel le
+# classifieur se passe d'Ollama est mesuré par validation croisée à l'entraînement,
+# comme la confiance minimale pour que PRECISION_CIBLE des prédictions retenues
+# soient justes sur des exemples que le modèle n'a pas vus
+PLIS_VALIDATION = 5
+PRECISION_CIBLE = 0.95
+
+
+def extraire_n_grammes(texte: str, tailles: Sequence[int] = TAILLES_N_GRAMMES,
+                       dimension: int = DIMENSION_HACHAGE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hache les n-grammes de caractères d'un texte normalisé.
+    
+    crc32 est utilisé plutôt que hash() dont la valeur change à chaque
+    exécution de Python, ce qui rendrait le modèle enregistré inutilisable.
+    
+    Args:
+        texte: Texte normalisé (minuscules, sans accents ni ponctuation)
+        tailles: Tailles de n-grammes à extraire
+        dimension: Nombre de cases du hachage
+    
+    Returns:
+        tuple: (indices des cases présentes, nombre d'occurrences de chacune)
+    """
+    texte = f" {texte} "
+    indices = [
+        zlib.crc32(texte[i:i + n].encode('utf-8')) % dimension
+        for n in tailles
+        for i in range(len(texte) - n + 1)
+    ]
+    return np.unique(np.array(indices, dtype=np.int64), return_counts=True)
+
+
+class ClassifieurIntentions:
+    """
+    Naive Bayes multinomial sur n-grammes de caractères hachés.
+    
+    Le modèle se résume à deux tableaux NumPy (log-probabilités a priori et
+    log-vraisemblances par case de hachage), enregistrés dans un fichier .npz
+    de quelques dizaines de kilo-octets.
+    """
+    
+    def __init__(self, classes: List[str], log_prior: np.ndarray, log_vraisemblance: np.ndarray,
+                 tailles: Sequence[int] = TAILLES_N_GRAMMES, seuil: Optional[float] = None):
+        """
+        Args:
+            classes: Codes d'intention, dans l'ordre des lignes des tableaux
+            log_prior: Log-probabilité a priori de chaque classe, forme (classes,)
+            log_vraisemblance: Log-probabilité de chaque case par classe, forme (classes, dimension)
+            tailles: Tailles de n-grammes utilisées à l'entraînement
+            seuil: Confiance minimale mesurée par calibrer_seuil (inf si aucune ne
+                suffit), None si le modèle n'a pas été calibré
+        """
+        self.classes = list(classes)
+        self.log_prior = log_prior.astype(np.float32)
+        self.log_vraisemblance = log_vraisemblance.astype(np.float32)
+        self.tailles = tuple(int(n) for n in tailles)
+        self.dimension = self.log_vraisemblance.shape[1]
+        self.seuil = seuil
+    
+    @classmethod
+    def entrainer(cls, textes: Sequence[str], etiquettes: Sequence[str],
+                  tailles: Sequence[int] = TAILLES_N_GRAMMES, dimension: int = DIMENSION_HACHAGE,
+                  lissage: float = LISSAGE) -> "ClassifieurIntentions":
+        """
+        Entraîne un classifieur.
+        
+        Args:
+            textes: Textes normalisés
+            etiquettes: Code d'intention de chaque texte
+            tailles: Tailles de n-grammes à extraire
+            dimension: Nombre de cases du hachage
+            lissage: Lissage additif des fréquences
+        
+        Returns:
+            ClassifieurIntentions: Le classifieur entraîné
+        """
+        classes = sorted(set(etiquettes))
+        index_classe = {classe: i for i, classe in enumerate(classes)}
+        
+        comptes = np.zeros((len(classes), dimension), dtype=np.float64)
+        exemples_par_classe = np.zeros(len(classes), dtype=np.float64)
+        for texte, etiquette in zip(textes, etiquettes):
+            indices, occurrences = extraire_n_grammes(texte, tailles, dimension)
+            comptes[index_classe[etiquette], indices] += occurrences
+            exemples_par_classe[index_classe[etiquette]] += 1
+        
+        log_prior = np.log(exemples_par_classe / exemples_par_classe.sum())
+        comptes += lissage
+        log_vraisemblance = np.log(comptes / comptes.sum(axis=1, keepdims=True))
+        return cls(classes, log_prior, log_vraisemblance, tailles)
+    
+    def predire(self, texte: str) -> Tuple[str, float]:
+        """
+        Prédit l'intention d'un texte normalisé.
+        
+        Args:
+            texte: Texte normalisé
+        
+        Returns:
+            tuple: (code d'intention le plus probable, confiance entre 0 et 1)
+        """
+        indices, occurrences = extraire_n_grammes(texte, self.tailles, self.dimension)
+        occurrences = occurrences.astype(np.float32)
+        vraisemblance_moyenne = self.log_vraisemblance[:, indices] @ occurrences / occurrences.sum()
+        scores = self.log_prior + ECHELLE_CONFIANCE * vraisemblance_moyenne
+        
+        # Softmax stable numériquement
+        probabilites = np.exp(scores - scores.max())
+        probabilites /= probabilites.sum()
+        meilleure = int(np.argmax(probabilites))
+        return self.classes[meilleure], float(probabilites[meilleure])
+    
+    def sauvegarder(self, chemin: str = FICHIER_MODELE) -> None:
+        """
+        Args:
+            chemin: Fichier .npz de destination
+        """
+        np.savez_compressed(
+            chemin,
+            classes=np.array(self.classes),
+            log_prior=self.log_prior,
+            log_vraisemblance=self.log_vraisemblance,
+            tailles=np.array(self.tailles),
+            seuil=np.array(np.nan if self.seuil is None else self.seuil),
+        )
+    
+    @classmethod
+    def charger(cls, chemin: str = FICHIER_MODELE) -> "ClassifieurIntentions":
+        """
+        Args:
+            chemin: Fichier .npz produit par sauvegarder()
+        
+        Returns:
+            ClassifieurIntentions: Le classifieur enregistré
+        """
+        with np.load(chemin, allow_pickle=False) as donnees:
+            # Les modèles entraînés avant la calibration n'ont pas de seuil
+            seuil = float(donnees['seuil']) if 'seuil' in donnees.files else math.nan
+            return cls(
+                [str(classe) for classe in donnees['classes']],
+                donnees['log_prior'],
+                donnees['log_vraisemblance'],
+                donnees['tailles'],
+                None if math.isnan(seuil) else seuil,
+            )
+
+
+def valider(textes: Sequence[str], etiquettes: Sequence[str],
+            plis: int = PLIS_VALIDATION) -> List[Tuple[str, str, float]]:
+    """
+    Validation croisée : chaque exemple est prédit par un modèle entraîné sans lui.
+    
+    Les exemples de chaque intention sont répartis à tour de rôle entre les
+    plis, pour que chaque modèle voie toutes les intentions.
+    
+    Args:
+        textes: Textes normalisés
+        etiquettes: Code d'intention de chaque texte
+        plis: Nombre de plis
+    
+    Returns:
+        list: (intention attendue, intention prédite, confiance) de chaque exemple
+    """
+    rangs = {}
+    pli_de = []
+    for etiquette in etiquettes:
+        pli_de.append(rangs.get(etiquette, 0) % plis)
+        rangs[etiquette] = rangs.get(etiquette, 0) + 1
+    
+    predictions = []
+    for pli in range(plis):
+        entrainement = [i for i, p in enumerate(pli_de) if p != pli]
+        test = [i for i, p in enumerate(pli_de) if p == pli]
+        if not test or len({etiquettes[i] for i in entrainement}) < 2:
+            continue
+        modele = ClassifieurIntentions.entrainer([textes[i] for i in entrainement],
+                                                 [etiquettes[i] for i in entrainement])
+        for i in test:
+            predite, confiance = modele.predire(textes[i])
+            predictions.append((etiquettes[i], predite, confiance))
+    return predictions
+
+
+def calibrer_seuil(predictions: Sequence[Tuple[str, str, float]],
+                   precision_cible: float = PRECISION_CIBLE) -> float:
+    """
+    Plus petite confiance à partir de laquelle les prédictions sont assez justes.
+    
+    Args:
+        predictions: (intention attendue, intention prédite, confiance), voir valider()
+        precision_cible: Proportion minimale de prédictions justes au-dessus du seuil
+    
+    Returns:
+        float: Seuil de confiance, inf si aucun seuil n'atteint la précision cible
+    """
+    seuil = math.inf
+    justes = retenues = 0
+    triees = sorted(predictions, key=lambda prediction: -prediction[2])
+    for i, (attendue, predite, confiance) in enumerate(triees):
+        justes += attendue == predite
+        retenues += 1
+        # Les confiances égales sont retenues ensemble par le seuil
+        if i + 1 < len(triees) and triees[i + 1][2] == confiance:
+            continue
+        if justes >= precision_cible * retenues:
+            seuil = confiance
+    return seuil
+
+
+def lire_exemples(chemin: str) -> Tuple[List[str], List[str]]:
+    """
+    Lit un fichier d'exemples étiquetés.
+    
+    Args:
+        chemin: Fichier TSV (INTENTION<TAB>texte), lignes vides et # ignorées
+    
+    Returns:
+        tuple: (textes bruts, étiquettes)
+    """
+    textes, etiquettes = [], []
+    with open(chemin, 'r', encoding='utf-8') as f:
+        for numero, ligne in enumerate(f, 1):
+            ligne = ligne.strip()
+            if not ligne or ligne.startswith('#'):
+                continue
+            if '\t' not in ligne:
+                print(f"⚠️  Ligne {numero} ignorée (tabulation manquante) : {ligne}")
+                continue
+            etiquette, texte = ligne.split('\t', 1)
+            etiquettes.append(etiquette.strip())
+            textes.append(texte.strip())
+    return textes, etiquettes
+
+
+def main() -> None:
+    """Fonction principale"""
+    if len(sys.argv) < 2:
+        print("Usage : python classifieur_intentions.py exemples.tsv [modele.npz]")
+        sys.exit(1)
+    
+    fichier_exemples = sys.argv[1]
+    fichier_modele = sys.argv[2] if len(sys.argv) > 2 else FICHIER_MODELE
+    
+    # Même normalisation que l'assistant au moment de la prédiction
+    from assistant_spotify import normaliser_texte
+    
+    textes, etiquettes = lire_exemples(fichier_exemples)
+    if len(set(etiquettes)) < 2:
+        print("❌ Il faut des exemples d'au moins deux intentions différentes.")
+        sys.exit(1)
+    
+    textes = [normaliser_texte(texte) for texte in textes]
+    predictions = valider(textes, etiquettes)
+    classifieur = ClassifieurIntentions.entrainer(textes, etiquettes)
+    classifieur.seuil = calibrer_seuil(predictions)
+    classifieur.sauvegarder(fichier_modele)
+    
+    for classe in classifieur.classes:
+        print(f"   {classe} : {etiquettes.count(classe)} exemples")
+    corrects = sum(classifieur.predire(texte)[0] == etiquette for texte, etiquette in zip(textes, etiquettes))
+    print(f"📊 Exactitude sur les exemples d'entraînement : {corrects / len(textes):.1%}")
+    if predictions:
+        justes = sum(attendue == predite for attendue, predite, _ in predictions)
+        print(f"📊 Exactitude en validation croisée ({PLIS_VALIDATION} plis) : {justes / len(predictions):.1%}")
+    if math.isinf(classifieur.seuil):
+        print(f"⚠️  Aucune confiance n'atteint {PRECISION_CIBLE:.0%} de prédictions justes : "
+              f"le classifieur laissera toujours décider Ollama (ajoutez des exemples)")
+    else:
+        retenues = [attendue == predite for attendue, predite, confiance in predictions
+                    if confiance >= classifieur.seuil]
+        print(f"🎯 Seuil de confiance : {classifieur.seuil:.3f} ({len(retenues)}/{len(predictions)} "
+              f"exemples décidés sans Ollama, {sum(retenues) / len(retenues):.0%} justes)")
+    print(f"✅ Classifieur enregistré dans : {fichier_modele}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Entraînement interrompu par l'utilisateur")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Erreur fatale : {e}")
+        sys.exit(1)
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pilotage de la lecture (lecture, pause, morceau suivant ou précédent, volume).
+
+Chaque backend ouvre son canal de commande une seule fois puis le réutilise :
+une commande prend quelques millisecondes, sans lancer de processus.
+
+- mpris : interface MPRIS du lecteur sur le bus D-Bus de session (Linux,
+  nécessite jeepney) ;
+- touches : touches multimédias simulées par user32 via ctypes (Windows) ;
+- factice : lecteur simulé en mémoire, pour les tests et les benchmarks.
+
+Essai manuel :
+
+    python controle_lecture.py pause
+    python controle_lecture.py volume+ --backend mpris
+"""
+
+import abc
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import List
+
+# Configurer l'encodage UTF-8 pour la console Windows
+if sys.platform == 'win32' and __name__ == "__main__":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# Configuration
+LECTEUR_MPRIS = "spotify"   # Suffixe du nom de bus org.mpris.MediaPlayer2.<lecteur>
+DBUS_TIMEOUT = 1.0          # Délai maximal d'une commande D-Bus (s)
+PAS_VOLUME_TOUCHE = 0.02    # Variation du volume système par appui sur une touche de volume (Windows)
+
+
+class ControleIndisponible(Exception):
+    """
+    Le backend ne peut pas être ouvert, ou le lecteur ne répond pas à la commande.
+    """
+
+
+class ControleLecture(abc.ABC):
+    """
+    Interface commune des backends de pilotage de la lecture : un backend
+    incomplet ne peut pas être instancié.
+    """
+    
+    nom = "abstrait"
+    
+    @abc.abstractmethod
+    def lecture(self) -> None:
+        """
+        Démarre ou reprend la lecture.
+        """
+    
+    @abc.abstractmethod
+    def pause(self) -> None:
+        """
+        Met la lecture en pause.
+        """
+    
+    @abc.abstractmethod
+    def suivant(self) -> None:
+        """
+        Passe au morceau suivant.
+        """
+    
+    @abc.abstractmethod
+    def precedent(self) -> None:
+        """
+        Revient au morceau précédent.
+        """
+    
+    @abc.abstractmethod
+    def changer_volume(self, pas: float) -> None:
+        """
+        Args:
+            pas: Variation du volume, en fraction du maximum (ex : 0.1 ou -0.1)
+        """
+    
+    def ouvrir(self, uri: str) -> None:
+        """
+        Ouvre une URI dans le lecteur (ex : spotify:search:daft%20punk).
+        
+        Raises:
+            ControleIndisponible: Si le backend ne sait pas ouvrir d'URI
+        """
+        raise ControleIndisponible(f"ouverture d'URI non prise en charge par {self.nom}")
+    
+    def fermer(self) -> None:
+        """
+        Libère le canal de commande.
+        """
+
+
+class ControleMpris(ControleLecture):
+    """
+    Pilotage d'un lecteur MPRIS (Spotify, VLC...) sur le bus D-Bus de session.
+    
+    La connexion au bus est ouverte à la création puis réutilisée pour toutes
+    les commandes ; elle est rouverte une fois si elle a été coupée.
+    """
+    
+    nom = "mpris"
+    
+    def __init__(self, lecteur: str = LECTEUR_MPRIS, timeout: float = DBUS_TIMEOUT):
+        """
+        Args:
+            lecteur: Nom du lecteur (org.mpris.MediaPlayer2.<lecteur>)
+            timeout: Délai maximal d'une commande en secondes
+        
+        Raises:
+            ControleIndisponible: Si jeepney n'est pas installé ou si le bus de session est inaccessible
+        """
+        try:
+            import jeepney
+            from jeepney.io.blocking import open_dbus_connection
+        except ImportError:
+            raise ControleIndisponible("jeepney n'est pas installé (pip install jeepney)")
+        
+        self._jeepney = jeepney
+        self._ouvrir_connexion = open_dbus_connection
+        self.timeout = timeout
+        self._lecteur = jeepney.DBusAddress(
+            '/org/mpris/MediaPlayer2',
+            bus_name=f'org.mpris.MediaPlayer2.{lecteur}',
+            interface='org.mpris.MediaPlayer2.Player',
+        )
+        self._verrou = threading.Lock()
+        self._connexion = None
+        self._connecter()
+    
+    def _connecter(self) -> None:
+        try:
+            self._connexion = self._ouvrir_connexion(bus='SESSION')
+        except (OSError, KeyError, ValueError) as e:
+            raise ControleIndisponible(f"bus D-Bus de session inaccessible : {e}")
+    
+    def _envoyer(self, message) -> tuple:
+        """
+        Envoie un message au lecteur et attend sa réponse.
+        
+        Returns:
+            tuple: Corps de la réponse
+        
+        Raises:
+            ControleIndisponible: Si le lecteur n'est pas lancé ou refuse la commande
+        """
+        with self._verrou:
+            try:
+                reponse = self._connexion.send_and_get_reply(message, timeout=self.timeout)
+            except TimeoutError:
+                raise ControleIndisponible("le lecteur ne répond pas")
+            except OSError:
+                # Connexion coupée (redémarrage de la session D-Bus) : une seule nouvelle tentative
+                self._connecter()
+                try:
+                    reponse = self._connexion.send_and_get_reply(message, timeout=self.timeout)
+                except OSError as e:
+                    raise ControleIndisponible(f"bus D-Bus de session injoignable : {e}")
+        
+        if reponse.header.message_type == self._jeepney.MessageType.error:
+            nom_erreur = reponse.header.fields.get(self._jeepney.HeaderFields.error_name, 'erreur D-Bus')
+            raise ControleIndisponible(f"{nom_erreur} {reponse.body[0] if reponse.body else ''}".strip())
+        return reponse.body
+    
+    def _appeler(self, methode: str) -> None:
+        self._envoyer(self._jeepney.new_method_call(self._lecteur, methode))
+    
+    def lecture(self) -> None:
+        self._appeler('Play')
+    
+    def pause(self) -> None:
+        self._appeler('Pause')
+    
+    def suivant(self) -> None:
+        self._appeler('Next')
+    
+    def precedent(self) -> None:
+        self._appeler('Previous')
+    
+    def changer_volume(self, pas: float) -> None:
+        proprietes = self._jeepney.Properties(self._lecteur)
+        (_, volume), = self._envoyer(proprietes.get('Volume'))
+        self._envoyer(proprietes.set('Volume', 'd', min(1.0, max(0.0, volume + pas))))
+    
+    def ouvrir(self, uri: str) -> None:
+        self._envoyer(self._jeepney.new_method_call(self._lecteur, 'OpenUri', 's', (uri,)))
+    
+    def fermer(self) -> None:
+        if self._connexion is not None:
+            self._connexion.close()
+            self._connexion = None
+
+
+class ControleTouchesMedia(ControleLecture):
+    """
+    Pilotage par touches multimédias simulées (Windows), reçues par le
+    lecteur actif quel qu'il soit.
+    
+    Windows n'a qu'une touche lecture/pause : lecture et pause l'envoient
+    toutes deux, et le volume réglé est celui du système.
+    """
+    
+    nom = "touches"
+    
+    VK_VOLUME_DOWN = 0xAE
+    VK_VOLUME_UP = 0xAF
+    VK_MEDIA_NEXT_TRACK = 0xB0
+    VK_MEDIA_PREV_TRACK = 0xB1
+    VK_MEDIA_PLAY_PAUSE = 0xB3
+    KEYEVENTF_EXTENDEDKEY = 0x1
+    KEYEVENTF_KEYUP = 0x2
+    
+    def __init__(self, pas_touche: float = PAS_VOLUME_TOUCHE):
+        """
+        Args:
+            pas_touche: Variation du volume système par appui sur une touche de volume
+        
+        Raises:
+            ControleIndisponible: Hors de Windows
+        """
+        if sys.platform != 'win32':
+            raise ControleIndisponible("touches multimédias simulées disponibles sous Windows uniquement")
+        import ctypes
+        self._user32 = ctypes.windll.user32
+        self.pas_touche = pas_touche
+    
+    def _appuyer(self, touche: int, repetitions: int = 1) -> None:
+        for _ in range(repetitions):
+            self._user32.keybd_event(touche, 0, self.KEYEVENTF_EXTENDEDKEY, 0)
+            self._user32.keybd_event(touche, 0, self.KEYEVENTF_EXTENDEDKEY | self.KEYEVENTF_KEYUP, 0)
+    
+    def lecture(self) -> None:
+        self._appuyer(self.VK_MEDIA_PLAY_PAUSE)
+    
+    def pause(self) -> None:
+        self._appuyer(self.VK_MEDIA_PLAY_PAUSE)
+    
+    def suivant(self) -> None:
+        self._appuyer(self.VK_MEDIA_NEXT_TRACK)
+    
+    def precedent(self) -> None:
+        self._appuyer(self.VK_MEDIA_PREV_TRACK)
+    
+    def changer_volume(self, pas: float) -> None:
+        touche = self.VK_VOLUME_UP if pas > 0 else self.VK_VOLUME_DOWN
+        self._appuyer(touche, max(1, round(abs(pas) / self.pas_touche)))
+
+    def ouvrir(self, uri: str) -> None:
+        # Transmise au gestionnaire du protocole (spotify:) enregistré dans Windows
+        try:
+            os.startfile(uri)
+        except OSError as e:
+            raise ControleIndisponible(f"impossible d'ouvrir {uri} : {e}")
+
+
+class ControleFactice(ControleLecture):
+    """
+    Lecteur simulé en mémoire : mémorise l'état et les commandes reçues.
+    """
+    
+    nom = "factice"
+    
+    def __init__(self, latence: float = 0.0, disponible: bool = True):
+        """
+        Args:
+            latence: Durée simulée de chaque commande en secondes
+            disponible: Si False, chaque commande lève ControleIndisponible (lecteur non lancé)
+        """
+        self.latence = latence
+        self.disponible = disponible
+        self.en_lecture = False
+        self.piste = 0
+        self.volume = 0.5
+        self.uri = None
+        self.commandes: List[str] = []
+    
+    def _executer(self, commande: str) -> None:
+        if self.latence:
+            time.sleep(self.latence)
+        if not self.disponible:
+            raise ControleIndisponible("lecteur factice indisponible")
+        self.commandes.append(commande)
+    
+    def lecture(self) -> None:
+        self._executer('lecture')
+        self.en_lecture = True
+    
+    def pause(self) -> None:
+        self._executer('pause')
+        self.en_lecture = False
+    
+    def suivant(self) -> None:
+        self._executer('suivant')
+        self.piste += 1
+    
+    def precedent(self) -> None:
+        self._executer('precedent')
+        self.piste = max(0, self.piste - 1)
+    
+    def changer_volume(self, pas: float) -> None:
+        self._executer('volume')
+        self.volume = min(1.0, max(0.0, self.volume + pas))
+    
+    def ouvrir(self, uri: str) -> None:
+        self._executer('ouvrir')
+        self.uri = uri
+        self.en_lecture = True
+
+
+BACKENDS = {
+    'mpris': ControleMpris,
+    'touches': ControleTouchesMedia,
+    'factice': ControleFactice,
+}
+
+
+def creer_controle(nom: str = 'auto', lecteur: str = LECTEUR_MPRIS) -> ControleLecture:
+    """
+    Ouvre le backend de pilotage demandé.
+    
+    Args:
+        nom: 'auto' (selon le système), 'mpris', 'touches' ou 'factice'
+        lecteur: Nom du lecteur MPRIS
+    
+    Returns:
+        ControleLecture: Backend prêt à l'emploi
+    
+    Raises:
+        ControleIndisponible: Si le backend ne peut pas être ouvert sur cette machine
+    """
+    if nom == 'auto':
+        if sys.platform == 'win32':
+            nom = 'touches'
+        elif sys.platform.startswith('linux'):
+            nom = 'mpris'
+        else:
+            raise ControleIndisponible(f"aucun backend de pilotage pour {sys.platform}")
+    
+    if nom not in BACKENDS:
+        raise ControleIndisponible(f"backend inconnu : {nom}")
+    if nom == 'mpris':
+        return ControleMpris(lecteur)
+    return BACKENDS[nom]()
+
+
+def main() -> None:
+    """Fonction principale"""
+    commandes = {
+        'lecture': lambda c: c.lecture(),
+        'pause': lambda c: c.pause(),
+        'suivant': lambda c: c.suivant(),
+        'precedent': lambda c: c.precedent(),
+        'volume+': lambda c: c.changer_volume(0.1),
+        'volume-': lambda c: c.changer_volume(-0.1),
+    }
+    parser = argparse.ArgumentParser(description="Envoie une commande de lecture au lecteur")
+    parser.add_argument('commande', choices=list(commandes))
+    parser.add_argument('--backend', default='auto', choices=['auto'] + list(BACKENDS))
+    parser.add_argument('--lecteur', default=LECTEUR_MPRIS, help="Nom du lecteur MPRIS (Linux)")
+    args = parser.parse_args()
+    
+    debut = time.perf_counter()
+    controle = creer_controle(args.backend, args.lecteur)
+    ouverture = time.perf_counter() - debut
+    try:
+        debut = time.perf_counter()
+        commandes[args.commande](controle)
+        print(f"✅ {args.commande} envoyé via {controle.nom} "
+              f"(ouverture {ouverture * 1000:.1f} ms, commande {(time.perf_counter() - debut) * 1000:.1f} ms)")
+    finally:
+        controle.fermer()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Interrompu par l'utilisateur")
+        sys.exit(0)
+    except ControleIndisponible as e:
+        print(f"❌ Pilotage impossible : {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Erreur fatale : {e}")
+        sys.exit(1)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Évaluation hors ligne de la chaîne Vosk + analyse d'intention sur des fichiers WAV.
+
+Chaque fichier (WAV 16 bits, rééchantillonné à 16 kHz mono si besoin) est
+décodé comme s'il venait du microphone, dans un pool de processus disposant
+chacun de son propre modèle Vosk. Les étiquettes attendues se trouvent dans un fichier TSV optionnel
+(par défaut etiquettes.tsv dans le dossier des WAV) :
+
+    fichier.wav<TAB>INTENTION<TAB>transcription attendue (optionnelle)
+
+Usage :
+    python evaluer_wav.py dossier_wav [--processus 4] [--sans-ollama] [--json rapport.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Configurer l'encodage UTF-8 pour la console Windows
+if sys.platform == 'win32' and __name__ == "__main__":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+import assistant_spotify as assistant
+
+# Modèle Vosk et options propres à chaque processus du pool
+_MODELE = None
+_OPTIONS = {}
+
+
+def lire_etiquettes(chemin: str) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+    Lit le fichier d'étiquettes.
+    
+    Args:
+        chemin: Fichier TSV (fichier.wav, intention, transcription optionnelle)
+    
+    Returns:
+        dict: Nom de fichier -> (intention attendue, transcription attendue)
+    """
+    etiquettes = {}
+    with open(chemin, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.rstrip('\n')
+            if not ligne.strip() or ligne.startswith('#'):
+                continue
+            colonnes = ligne.split('\t')
+            intention = colonnes[1].strip() if len(colonnes) > 1 and colonnes[1].strip() else None
+            transcription = colonnes[2].strip() if len(colonnes) > 2 and colonnes[2].strip() else None
+            etiquettes[colonnes[0].strip()] = (intention, transcription)
+    return etiquettes
+
+
+def taux_erreur_mots(reference: str, hypothese: str) -> float:
+    """
+    Calcule le taux d'erreur de mots (WER) entre deux transcriptions.
+    
+    Args:
+        reference: Transcription attendue
+        hypothese: Transcription obtenue
+    
+    Returns:
+        float: Nombre de substitutions, insertions et suppressions rapporté
+        au nombre de mots de la référence
+    """
+    mots_reference = assistant.normaliser_texte(reference).split()
+    mots_hypothese = assistant.normaliser_texte(hypothese).split()
+    if not mots_reference:
+        return float(bool(mots_hypothese))
+    maximum = len(mots_reference) + len(mots_hypothese)
+    return assistant.distance_edition(mots_reference, mots_hypothese, maximum) / len(mots_reference)
+
+
+def _initialiser_processus(model_path: str, options: dict) -> None:
+    """
+    Charge le modèle Vosk une fois par processus du pool.
+    """
+    global _MODELE, _OPTIONS
+    _OPTIONS = options
+    if not options['verbeux']:
+        sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+    
+    # Cache vide et en mémoire pour mesurer la latence réelle de chaque phrase
+    assistant.CACHE_INTENTIONS = assistant.CacheIntentions(fichier=None)
+    assistant.OLLAMA_MODEL_ACTUAL = options['modele_ollama']
+    # Ne pas réutiliser les connexions HTTP ouvertes par le parent
+    assistant.CLIENT_OLLAMA = assistant.ClientOllama()
+    assistant.charger_classifieur()
+    if options['ollama']:
+        assistant.charger_index_exemples()
+    
+    assistant.vosk.SetLogLevel(-1)
+    _MODELE = assistant.vosk.Model(model_path)
+
+
+def evaluer_fichier(chemin: str) -> dict:
+    """
+    Décode un fichier WAV puis analyse l'intention des énoncés reconnus.
+    
+    Args:
+        chemin: Chemin du fichier WAV
+    
+    Returns:
+        dict: Transcription, intention, facteur temps réel et latences mesurées
+    """
+    resultat = {'fichier': os.path.basename(chemin)}
+    
+    # Les fichiers qui ne sont pas à SAMPLE_RATE mono sont rééchantillonnés
+    try:
+        audio = assistant.SourceAudioFichier.depuis_wav(chemin).audio
+    except (ValueError, wave.Error) as e:
+        resultat['erreur'] = f"format non supporté ({e})"
+        return resultat
+    duree_audio = len(audio) / 2 / assistant.SAMPLE_RATE
+    
+    session = assistant.SessionReconnaissance(
+        _MODELE,
+        grammaire=_OPTIONS['grammaire'],
+        vad=_OPTIONS['vad'],
+        validation_anticipee=_OPTIONS['validation_anticipee'],
+    )
+    
+    # Décodage par blocs de la même taille que la capture micro
+    taille_bloc = assistant.CHUNK_SIZE * 2
+    evenements = []
+    debut = time.perf_counter()
+    for position in range(0, len(audio), taille_bloc):
+        evenements.extend(session.traiter(audio[position:position + taille_bloc]))
+    evenements.extend(session.terminer())
+    duree_decodage = time.perf_counter() - debut
+    
+    # Analyse d'intention de chaque énoncé ; la première action l'emporte
+    intentions = []
+    latences = []
+    for texte, intention_anticipee in evenements:
+        debut = time.perf_counter()
+        intention = intention_anticipee or assistant.analyser_intention(
+            texte, utiliser_ollama=_OPTIONS['ollama']
+        )
+        latences.append(time.perf_counter() - debut)
+        intentions.append(intention)
+    actions = [intention for intention in intentions if intention and intention != 'IGNORE']
+    
+    resultat.update({
+        'transcription': ' '.join(texte for texte, _ in evenements),
+        'intention': actions[0] if actions else 'IGNORE',
+        'duree_audio': duree_audio,
+        'facteur_temps_reel': duree_decodage / duree_audio if duree_audio else 0.0,
+        'latence_intention_ms': 1000 * max(latences) if latences else 0.0,
+    })
+    return resultat
+
+
+def percentile(valeurs: List[float], rang: float) -> float:
+    """
+    Args:
+        valeurs: Mesures
+        rang: Percentile souhaité (0 à 100)
+    
+    Returns:
+        float: Valeur au percentile demandé (plus proche rang), 0 si aucune mesure
+    """
+    if not valeurs:
+        return 0.0
+    valeurs = sorted(valeurs)
+    index = max(0, math.ceil(rang / 100 * len(valeurs)) - 1)
+    return valeurs[index]
+
+
+def afficher_rapport(resultats: List[dict], etiquettes: dict) -> dict:
+    """
+    Affiche le détail par fichier et la synthèse.
+    
+    Returns:
+        dict: Synthèse (exactitude, WER moyen, percentiles de RTF et de latence)
+    """
+    print(f"\n{'Fichier':<30} {'RTF':>6} {'Intent. (ms)':>12}  {'Attendu':<16} {'Obtenu':<16} Transcription")
+    print("-" * 110)
+    
+    corrects, etiquetes, wers = 0, 0, []
+    for resultat in resultats:
+        if 'erreur' in resultat:
+            print(f"{resultat['fichier']:<30} ❌ {resultat['erreur']}")
+            continue
+        
+        attendu, transcription_attendue = etiquettes.get(resultat['fichier'], (None, None))
+        if attendu:
+            etiquetes += 1
+            corrects += attendu == resultat['intention']
+        if transcription_attendue is not None:
+            resultat['wer'] = taux_erreur_mots(transcription_attendue, resultat['transcription'])
+            wers.append(resultat['wer'])
+        
+        marque = '' if not attendu else ('✅' if attendu == resultat['intention'] else '❌')
+        print(f"{resultat['fichier']:<30} {resultat['facteur_temps_reel']:>6.3f} "
+              f"{resultat['latence_intention_ms']:>12.1f}  {attendu or '-':<16} "
+              f"{resultat['intention']:<16} {marque} {resultat['transcription']}")
+    
+    valides = [r for r in resultats if 'erreur' not in r]
+    rtfs = [r['facteur_temps_reel'] for r in valides]
+    latences = [r['latence_intention_ms'] for r in valides]
+    synthese = {
+        'fichiers': len(resultats),
+        'erreurs': len(resultats) - len(valides),
+        'exactitude_intention': corrects / etiquetes if etiquetes else None,
+        'wer_moyen': sum(wers) / len(wers) if wers else None,
+        'rtf_moyen': sum(rtfs) / len(rtfs) if rtfs else None,
+        'rtf_p95': percentile(rtfs, 95),
+        'latence_intention_p50_ms': percentile(latences, 50),
+        'latence_intention_p95_ms': percentile(latences, 95),
+    }
+    
+    print("\n" + "=" * 60)
+    if etiquetes:
+        print(f"🎯 Exactitude des intentions : {corrects}/{etiquetes} ({synthese['exactitude_intention']:.1%})")
+    if wers:
+        print(f"📝 WER moyen : {synthese['wer_moyen']:.1%}")
+    if rtfs:
+        print(f"⏱️  Facteur temps réel : moyen {synthese['rtf_moyen']:.3f}, p95 {synthese['rtf_p95']:.3f}")
+        print(f"🧠 Latence d'intention : p50 {synthese['latence_intention_p50_ms']:.1f} ms, "
+              f"p95 {synthese['latence_intention_p95_ms']:.1f} ms")
+    print("=" * 60)
+    return synthese
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Évaluation hors ligne sur un dossier de fichiers WAV")
+    parser.add_argument('dossier', help="Dossier contenant les fichiers WAV")
+    parser.add_argument('--etiquettes', help="Fichier TSV des résultats attendus (défaut : dossier/etiquettes.tsv)")
+    parser.add_argument('--processus', type=int, default=os.cpu_count(), help="Nombre de processus")
+    parser.add_argument('--modele', default=assistant.VOSK_MODEL_PATH, help="Chemin du modèle Vosk")
+    parser.add_argument('--sans-ollama', action='store_true', help="N'utiliser que les analyses locales")
+    parser.add_argument('--sans-grammaire', action='store_true', help="Désactiver la grammaire restreinte")
+    parser.add_argument('--sans-vad', action='store_true', help="Désactiver la détection d'activité vocale")
+    parser.add_argument('--sans-anticipation', action='store_true',
+                        help="Désactiver la validation sur résultats partiels")
+    parser.add_argument('--json', help="Fichier où enregistrer le rapport complet")
+    parser.add_argument('--verbeux', action='store_true', help="Afficher les messages de l'assistant")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("🧪 Évaluation hors ligne Vosk + intentions")
+    print("=" * 60)
+    
+    fichiers = sorted(
+        os.path.join(args.dossier, nom) for nom in os.listdir(args.dossier) if nom.lower().endswith('.wav')
+    )
+    if not fichiers:
+        print(f"❌ Aucun fichier WAV dans : {args.dossier}")
+        sys.exit(1)
+    
+    chemin_etiquettes = args.etiquettes or os.path.join(args.dossier, 'etiquettes.tsv')
+    etiquettes = lire_etiquettes(chemin_etiquettes) if os.path.exists(chemin_etiquettes) else {}
+    
+    if not os.path.isdir(args.modele):
+        print(f"❌ Modèle Vosk introuvable : {args.modele}")
+        sys.exit(1)
+    
+    # Vérifier Ollama une seule fois et attendre le chargement du modèle
+    # pour ne pas compter le démarrage à froid dans les latences
+    if not args.sans_ollama:
+        if assistant.verifier_ollama():
+            assistant.CLIENT_OLLAMA.prechauffage.join()
+        else:
+            print("⚠️  Ollama indisponible : les phrases non reconnues localement seront en erreur")
+    
+    options = {
+        'ollama': not args.sans_ollama,
+        'grammaire': not args.sans_grammaire,
+        'vad': not args.sans_vad,
+        'validation_anticipee': not args.sans_anticipation,
+        'modele_ollama': assistant.OLLAMA_MODEL_ACTUAL,
+        'verbeux': args.verbeux,
+    }
+    
+    print(f"📂 {len(fichiers)} fichiers, {args.processus} processus")
+    debut = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processus, initializer=_initialiser_processus,
+                             initargs=(args.modele, options)) as pool:
+        resultats = list(pool.map(evaluer_fichier, fichiers))
+    duree = time.perf_counter() - debut
+    
+    synthese = afficher_rapport(resultats, etiquettes)
+    duree_audio = sum(r.get('duree_audio', 0.0) for r in resultats)
+    print(f"⌛ {duree_audio:.1f} s d'audio traitées en {duree:.1f} s")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': options, 'synthese': synthese, 'fichiers': resultats},
+                      f, ensure_ascii=False, indent=2)
+        print(f"💾 Rapport enregistré dans : {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Évaluation interrompue par l'utilisateur")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Erreur fatale : {e}")
+        sys.exit(1)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index d'exemples vectorisés pour reconnaître les intentions par similarité.
+
+Les phrases d'exemple de chaque intention sont vectorisées une seule fois par
+le modèle d'embeddings d'Ollama (/api/embed) et enregistrées dans une matrice
+NumPy normalisée. Une transcription est ensuite comparée à tous les exemples
+d'un seul produit matrice-vecteur (similarité cosinus) : elle est reconnue en
+quelques millisecondes si elle ressemble assez à un exemple, même sans en
+partager les mots, et la génération par Ollama n'est sollicitée qu'en deçà du
+seuil. Construction de l'index :
+
+    ollama pull nomic-embed-text
+    python index_exemples.py exemples_intentions.tsv
+"""
+
+import argparse
+import collections
+import sys
+import threading
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configurer l'encodage UTF-8 pour la console Windows
+if sys.platform == 'win32' and __name__ == "__main__":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# Configuration
+FICHIER_INDEX = "index_exemples.npz"
+MODELE_EMBEDDING = "nomic-embed-text"   # Modèle d'embeddings d'Ollama
+TAILLE_LOT = 64                          # Exemples vectorisés par requête à la construction
+
+
+def normaliser_vecteurs(matrice: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        matrice: Vecteurs en lignes, forme (n, dimension)
+    
+    Returns:
+        np.ndarray: Vecteurs de norme 1 (float32), pour que le produit scalaire
+        soit la similarité cosinus
+    """
+    matrice = np.asarray(matrice, dtype=np.float32)
+    normes = np.linalg.norm(matrice, axis=-1, keepdims=True)
+    return matrice / np.maximum(normes, 1e-12)
+
+
+class IndexExemples:
+    """
+    Exemples d'intentions et leurs embeddings normalisés.
+    
+    Le fichier .npz contient la matrice des embeddings, l'intention et le
+    texte de chaque exemple, ainsi que le modèle qui les a produits : les
+    transcriptions doivent être vectorisées par ce même modèle.
+    """
+    
+    def __init__(self, etiquettes: Sequence[str], exemples: Sequence[str], matrice: np.ndarray, modele: str):
+        """
+        Args:
+            etiquettes: Code d'intention de chaque exemple
+            exemples: Texte de chaque exemple
+            matrice: Embeddings des exemples en lignes, forme (exemples, dimension)
+            modele: Modèle d'embeddings d'Ollama utilisé
+        """
+        self.etiquettes = list(etiquettes)
+        self.exemples = list(exemples)
+        self.matrice = normaliser_vecteurs(matrice)
+        self.modele = modele
+    
+    @classmethod
+    def construire(cls, textes: Sequence[str], etiquettes: Sequence[str],
+                   vectoriser: Callable[[List[str]], np.ndarray], modele: str,
+                   taille_lot: int = TAILLE_LOT) -> "IndexExemples":
+        """
+        Vectorise les exemples par lots.
+        
+        Args:
+            textes: Phrases d'exemple
+            etiquettes: Code d'intention de chaque phrase
+            vectoriser: Fonction qui renvoie les embeddings d'une liste de textes, forme (textes, dimension)
+            modele: Nom du modèle utilisé par vectoriser
+            taille_lot: Nombre de textes par appel à vectoriser
+        
+        Returns:
+            IndexExemples: L'index construit
+        """
+        lots = [vectoriser(list(textes[i:i + taille_lot])) for i in range(0, len(textes), taille_lot)]
+        return cls(etiquettes, textes, np.concatenate(lots), modele)
+    
+    def rechercher(self, vecteur: np.ndarray) -> Tuple[str, float, str]:
+        """
+        Cherche l'exemple le plus proche d'un embedding.
+        
+        Args:
+            vecteur: Embedding de la transcription (même modèle que l'index)
+        
+        Returns:
+            tuple: (intention de l'exemple le plus proche, similarité cosinus, texte de l'exemple)
+        """
+        similarites = self.matrice @ normaliser_vecteurs(vecteur)
+        meilleur = int(np.argmax(similarites))
+        return self.etiquettes[meilleur], float(similarites[meilleur]), self.exemples[meilleur]
+    
+    def evaluer(self) -> Tuple[float, Optional[float]]:
+        """
+        Classe chaque exemple d'après son plus proche voisin parmi les autres.
+        
+        Returns:
+            tuple: (exactitude, plus forte similarité parmi les erreurs ou None) :
+            un seuil au-dessus de cette similarité évite les confusions observées
+        """
+        similarites = self.matrice @ self.matrice.T
+        np.fill_diagonal(similarites, -np.inf)
+        voisins = similarites.argmax(axis=1)
+        etiquettes = np.array(self.etiquettes)
+        erreurs = etiquettes[voisins] != etiquettes
+        if not erreurs.any():
+            return 1.0, None
+        return 1.0 - float(erreurs.mean()), float(similarites.max(axis=1)[erreurs].max())
+    
+    def sauvegarder(self, chemin: str = FICHIER_INDEX) -> None:
+        """
+        Args:
+            chemin: Fichier .npz de destination
+        """
+        np.savez_compressed(
+            chemin,
+            matrice=self.matrice,
+            etiquettes=np.array(self.etiquettes),
+            exemples=np.array(self.exemples),
+            modele=np.array(self.modele),
+        )
+    
+    @classmethod
+    def charger(cls, chemin: str = FICHIER_INDEX) -> "IndexExemples":
+        """
+        Args:
+            chemin: Fichier .npz produit par sauvegarder()
+        
+        Returns:
+            IndexExemples: L'index enregistré
+        """
+        with np.load(chemin, allow_pickle=False) as donnees:
+            return cls(
+                [str(etiquette) for etiquette in donnees['etiquettes']],
+                [str(exemple) for exemple in donnees['exemples']],
+                donnees['matrice'],
+                str(donnees['modele']),
+            )
+
+
+class CacheVecteurs:
+    """
+    Cache LRU en mémoire des embeddings de transcriptions : une phrase
+    répétée n'est vectorisée qu'une fois.
+    """
+    
+    def __init__(self, taille_max: int = 256):
+        """
+        Args:
+            taille_max: Nombre maximal d'embeddings conservés
+        """
+        self.taille_max = taille_max
+        self._entrees = collections.OrderedDict()  # clé -> embedding
+        self._verrou = threading.Lock()
+        
+        self.succes = 0
+        self.echecs = 0
+    
+    def obtenir(self, cle: str) -> Optional[np.ndarray]:
+        """
+        Args:
+            cle: Transcription normalisée
+        
+        Returns:
+            np.ndarray: Embedding en cache, None si absent
+        """
+        with self._verrou:
+            vecteur = self._entrees.get(cle)
+            if vecteur is None:
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return vecteur
+    
+    def enregistrer(self, cle: str, vecteur: np.ndarray) -> None:
+        """
+        Args:
+            cle: Transcription normalisée
+            vecteur: Son embedding
+        """
+        with self._verrou:
+            self._entrees[cle] = vecteur
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Nombre d'entrées, de succès et d'échecs du cache
+        """
+        return {
+            'entrees': len(self._entrees),
+            'succes': self.succes,
+            'echecs': self.echecs,
+        }
+
+
+def main() -> None:
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Construit l'index d'exemples vectorisés par Ollama")
+    parser.add_argument('exemples', nargs='?', help="Fichier TSV d'exemples étiquetés (INTENTION<TAB>texte)")
+    parser.add_argument('--sortie', default=FICHIER_INDEX, help="Fichier .npz de l'index")
+    parser.add_argument('--modele', default=MODELE_EMBEDDING, help="Modèle d'embeddings d'Ollama")
+    args = parser.parse_args()
+    
+    # Exemples du registre d'intentions (phrases de INTENTIONS_MOTS_CLES) et du fichier TSV
+    import assistant_spotify as assistant
+    from classifieur_intentions import lire_exemples
+    
+    exemples = {}
+    for nom in assistant.INTENTIONS.noms():
+        for texte in assistant.INTENTIONS.obtenir(nom).exemples:
+            exemples.setdefault(assistant.normaliser_texte(texte), (nom, texte))
+    if args.exemples:
+        # Une étiquette hors du registre ne correspond à aucune action
+        inconnues = collections.Counter()
+        for texte, etiquette in zip(*lire_exemples(args.exemples)):
+            if etiquette not in assistant.INTENTIONS:
+                inconnues[etiquette] += 1
+                continue
+            exemples.setdefault(assistant.normaliser_texte(texte), (etiquette, texte))
+        for etiquette, nombre in inconnues.items():
+            print(f"⚠️  Intention '{etiquette}' absente du registre : {nombre} exemples ignorés")
+    etiquettes = [etiquette for etiquette, _ in exemples.values()]
+    textes = [texte.lower() for _, texte in exemples.values()]
+    
+    print(f"📥 Vectorisation de {len(textes)} exemples avec '{args.modele}'...")
+    index = IndexExemples.construire(
+        textes, etiquettes,
+        lambda lot: assistant.CLIENT_OLLAMA.vectoriser(lot, args.modele, timeout=120),
+        args.modele,
+    )
+    index.sauvegarder(args.sortie)
+    
+    for etiquette in sorted(set(etiquettes)):
+        print(f"   {etiquette} : {etiquettes.count(etiquette)} exemples")
+    exactitude, similarite_erreurs = index.evaluer()
+    print(f"📊 Exactitude du plus proche voisin (chaque exemple contre les autres) : {exactitude:.1%}")
+    if similarite_erreurs is not None:
+        print(f"💡 Confusions jusqu'à une similarité de {similarite_erreurs:.2f} : "
+              f"gardez INDEX_EXEMPLES_SEUIL au-dessus")
+    print(f"✅ Index enregistré dans : {args.sortie} ({index.matrice.shape[0]} x {index.matrice.shape[1]})")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Construction interrompue par l'utilisateur")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Erreur fatale : {e}")
+        sys.exit(1)
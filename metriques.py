@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesure de la latence de chaque étape de l'assistant.
+
+Les durées sont prises avec une horloge monotone (time.perf_counter) et
+agrégées dans des histogrammes à cases fixes, ce qui garde une mémoire
+constante quelle que soit la durée de fonctionnement. Les percentiles sont
+estimés par interpolation dans les cases. Les métriques peuvent être
+exportées périodiquement en JSON et servies au format texte Prometheus.
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Sequence
+
+# Bornes supérieures des cases des histogrammes, en millisecondes
+BORNES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class HistogrammeLatence:
+    """
+    Histogramme de durées à cases fixes.
+    """
+    
+    def __init__(self, bornes_ms: Sequence[float] = BORNES_MS):
+        """
+        Args:
+            bornes_ms: Bornes supérieures des cases, croissantes, en millisecondes
+        """
+        self.bornes_ms = tuple(bornes_ms)
+        self.comptes = [0] * (len(self.bornes_ms) + 1)  # Dernière case : au-delà de la dernière borne
+        self.nombre = 0
+        self.somme_ms = 0.0
+        self.max_ms = 0.0
+    
+    def ajouter(self, duree_ms: float) -> None:
+        """
+        Args:
+            duree_ms: Durée mesurée en millisecondes
+        """
+        self.comptes[bisect.bisect_left(self.bornes_ms, duree_ms)] += 1
+        self.nombre += 1
+        self.somme_ms += duree_ms
+        self.max_ms = max(self.max_ms, duree_ms)
+    
+    def percentile(self, rang: float) -> float:
+        """
+        Estime un percentile par interpolation linéaire dans la case concernée.
+        
+        Args:
+            rang: Percentile souhaité (0 à 100)
+        
+        Returns:
+            float: Durée estimée en millisecondes (0 si aucune mesure)
+        """
+        if not self.nombre:
+            return 0.0
+        
+        cible = rang / 100 * self.nombre
+        cumul = 0
+        for index, compte in enumerate(self.comptes):
+            if compte and cumul + compte >= cible:
+                borne_basse = self.bornes_ms[index - 1] if index > 0 else 0.0
+                borne_haute = self.bornes_ms[index] if index < len(self.bornes_ms) else self.max_ms
+                estimation = borne_basse + (borne_haute - borne_basse) * (cible - cumul) / compte
+                return min(estimation, self.max_ms)
+            cumul += compte
+        return self.max_ms
+    
+    def resume(self) -> dict:
+        """
+        Returns:
+            dict: Nombre de mesures, moyenne, p50, p95, p99 et maximum en millisecondes
+        """
+        return {
+            'nombre': self.nombre,
+            'moyenne_ms': self.somme_ms / self.nombre if self.nombre else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms,
+        }
+
+
+class RegistreMetriques:
+    """
+    Ensemble d'histogrammes de latence, un par étape nommée.
+    
+    Utilisable depuis plusieurs threads (capture, synthèse vocale, serveur HTTP).
+    """
+    
+    def __init__(self, bornes_ms: Sequence[float] = BORNES_MS):
+        """
+        Args:
+            bornes_ms: Bornes des cases utilisées pour chaque étape
+        """
+        self.bornes_ms = tuple(bornes_ms)
+        self._histogrammes: Dict[str, HistogrammeLatence] = {}
+        self._verrou = threading.Lock()
+        self._serveur = None
+    
+    def enregistrer(self, etape: str, duree_s: float) -> None:
+        """
+        Args:
+            etape: Nom de l'étape (ex : 'asr', 'intention')
+            duree_s: Durée mesurée en secondes
+        """
+        with self._verrou:
+            histogramme = self._histogrammes.get(etape)
+            if histogramme is None:
+                histogramme = self._histogrammes[etape] = HistogrammeLatence(self.bornes_ms)
+            histogramme.ajouter(duree_s * 1000)
+    
+    @contextlib.contextmanager
+    def mesurer(self, etape: str) -> Iterator[None]:
+        """
+        Mesure la durée du bloc with, y compris s'il lève une exception.
+        
+        Args:
+            etape: Nom de l'étape
+        """
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.enregistrer(etape, time.perf_counter() - debut)
+    
+    def resume(self) -> Dict[str, dict]:
+        """
+        Returns:
+            dict: Résumé (voir HistogrammeLatence.resume) par étape
+        """
+        with self._verrou:
+            return {etape: histogramme.resume() for etape, histogramme in sorted(self._histogrammes.items())}
+    
+    def exporter_json(self, chemin: str) -> None:
+        """
+        Écrit le résumé des métriques dans un fichier JSON (remplacement atomique).
+        
+        Args:
+            chemin: Fichier de destination
+        """
+        contenu = {'horodatage': time.time(), 'etapes': self.resume()}
+        fichier_temporaire = chemin + '.tmp'
+        with open(fichier_temporaire, 'w', encoding='utf-8') as f:
+            json.dump(contenu, f, ensure_ascii=False, indent=2)
+        os.replace(fichier_temporaire, chemin)
+    
+    def texte_prometheus(self) -> str:
+        """
+        Returns:
+            str: Les histogrammes au format d'exposition texte Prometheus
+        """
+        lignes = [
+            "# HELP assistant_etape_duree_secondes Durée de chaque étape de l'assistant vocal",
+            "# TYPE assistant_etape_duree_secondes histogram",
+        ]
+        with self._verrou:
+            for etape, histogramme in sorted(self._histogrammes.items()):
+                cumul = 0
+                for borne, compte in zip(histogramme.bornes_ms, histogramme.comptes):
+                    cumul += compte
+                    lignes.append(f'assistant_etape_duree_secondes_bucket{{etape="{etape}",le="{borne / 1000:g}"}} {cumul}')
+                lignes.append(f'assistant_etape_duree_secondes_bucket{{etape="{etape}",le="+Inf"}} {histogramme.nombre}')
+                lignes.append(f'assistant_etape_duree_secondes_sum{{etape="{etape}"}} {histogramme.somme_ms / 1000:.6f}')
+                lignes.append(f'assistant_etape_duree_secondes_count{{etape="{etape}"}} {histogramme.nombre}')
+        return '\n'.join(lignes) + '\n'
+    
+    def demarrer_export_periodique(self, chemin: str, intervalle: float) -> threading.Thread:
+        """
+        Exporte les métriques en JSON toutes les intervalle secondes, en arrière-plan.
+        
+        Args:
+            chemin: Fichier JSON de destination
+            intervalle: Période d'export en secondes
+        
+        Returns:
+            threading.Thread: Thread d'export (démon, déjà démarré)
+        """
+        def _exporter():
+            while True:
+                time.sleep(intervalle)
+                try:
+                    self.exporter_json(chemin)
+                except OSError as e:
+                    print(f"⚠️  Export des métriques impossible : {e}")
+        
+        thread = threading.Thread(target=_exporter, name="export-metriques", daemon=True)
+        thread.start()
+        return thread
+    
+    def demarrer_serveur_http(self, port: int, hote: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Sert les métriques en HTTP : /metrics (texte Prometheus) et /metrics.json.
+        
+        Args:
+            port: Port d'écoute (0 pour un port libre choisi par le système)
+            hote: Adresse d'écoute, locale par défaut
+        
+        Returns:
+            ThreadingHTTPServer: Le serveur démarré (server_address donne le port effectif)
+        """
+        registre = self
+        
+        class GestionnaireMetriques(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    corps = registre.texte_prometheus().encode('utf-8')
+                    type_contenu = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path == '/metrics.json':
+                    corps = json.dumps(registre.resume(), ensure_ascii=False).encode('utf-8')
+                    type_contenu = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', type_contenu)
+                self.send_header('Content-Length', str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+            
+            def log_message(self, format, *args):
+                pass  # Ne pas polluer la console à chaque collecte
+        
+        self._serveur = ThreadingHTTPServer((hote, port), GestionnaireMetriques)
+        self._serveur.daemon_threads = True
+        threading.Thread(target=self._serveur.serve_forever, name="serveur-metriques", daemon=True).start()
+        return self._serveur
+    
+    def arreter_serveur_http(self) -> None:
+        """
+        Arrête le serveur HTTP s'il a été démarré.
+        """
+        if self._serveur is not None:
+            self._serveur.shutdown()
+            self._serveur.server_close()
+            self._serveur = None
+    
+    def afficher(self) -> None:
+        """
+        Affiche un tableau récapitulatif des latences par étape.
+        """
+        resume = self.resume()
+        if not resume:
+            return
+        print(f"\n{'Étape':<26} {'n':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}")
+        for etape, stats in resume.items():
+            print(f"{etape:<26} {stats['nombre']:>6} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+                  f"{stats['p99_ms']:>10.1f} {stats['max_ms']:>10.1f}")
+
+
+# Registre partagé par tous les modules de l'assistant
+METRIQUES = RegistreMetriques()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur de reconnaissance multi-cœurs en mode prefork (Linux, macOS).
+
+Le processus parent charge le modèle Vosk une seule fois puis crée N
+processus de travail par fork : ils héritent du modèle en copie sur
+écriture, et comme Vosk ne modifie plus ces pages après le chargement,
+la mémoire du modèle reste partagée entre tous les processus. Le parent
+accepte les connexions TCP (même protocole que serveur_reconnaissance.py)
+et transmet chaque socket au processus le moins chargé (socket.send_fds).
+
+Un rapport périodique donne pour chaque processus les connexions actives,
+l'utilisation CPU et la mémoire (RSS, PSS et partagée, lues dans /proc).
+
+Usage :
+    python serveur_prefork.py [--processus 4] [--port 2700] [--rapport 30]
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Configurer l'encodage UTF-8 pour la console Windows
+if sys.platform == 'win32' and __name__ == "__main__":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+import assistant_spotify as assistant
+import serveur_reconnaissance
+
+# ==================== CONFIGURATION ====================
+
+PROCESSUS = os.cpu_count() or 2   # Processus de travail (un par cœur)
+THREADS_PAR_PROCESSUS = 1         # Décodages simultanés dans chaque processus
+RAPPORT_INTERVALLE = 30           # Période du rapport de charge en secondes (0 pour désactiver)
+
+# Message envoyé par un processus de travail à la fin de chaque connexion
+FIN_CONNEXION = b'F'
+
+
+# ==================== MESURES /proc ====================
+
+def lire_memoire(pid: int) -> Dict[str, float]:
+    """
+    Lit l'occupation mémoire d'un processus.
+    
+    La PSS (proportional set size) répartit chaque page partagée entre les
+    processus qui la partagent : la somme des PSS donne la mémoire réellement
+    consommée, contrairement à la somme des RSS qui compte le modèle N fois.
+    
+    Args:
+        pid: Identifiant du processus
+    
+    Returns:
+        dict: rss_mo, pss_mo et partagee_mo (vide si /proc est indisponible)
+    """
+    valeurs = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            for ligne in f:
+                champ, _, reste = ligne.partition(':')
+                if champ in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty'):
+                    valeurs[champ] = int(reste.split()[0]) / 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+    return {
+        'rss_mo': valeurs.get('Rss', 0.0),
+        'pss_mo': valeurs.get('Pss', 0.0),
+        'partagee_mo': valeurs.get('Shared_Clean', 0.0) + valeurs.get('Shared_Dirty', 0.0),
+    }
+
+
+def lire_temps_cpu(pid: int) -> Optional[float]:
+    """
+    Args:
+        pid: Identifiant du processus
+    
+    Returns:
+        float: Temps CPU consommé (utilisateur + système) en secondes, None si indisponible
+    """
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            # Le nom du processus (2e champ) peut contenir des espaces : repartir après ')'
+            champs = f.read().rsplit(')', 1)[1].split()
+        return (int(champs[11]) + int(champs[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ==================== PROCESSUS DE TRAVAIL ====================
+
+def executer_travailleur(canal: socket.socket, model, options: dict) -> None:
+    """
+    Boucle d'un processus de travail : reçoit des sockets du parent et les
+    sert avec un ServeurReconnaissance. Ne retourne pas (os._exit).
+    """
+    import asyncio
+    
+    # Ctrl+C est géré par le parent, qui arrête les processus de travail
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    # Ne pas réutiliser les connexions HTTP ouvertes par le parent
+    assistant.CLIENT_OLLAMA = assistant.ClientOllama()
+    
+    # Le cache des intentions hérité reste en mémoire : plusieurs processus
+    # écrivant le même fichier se marcheraient dessus
+    assistant.CACHE_INTENTIONS.fichier = None
+    
+    serveur = serveur_reconnaissance.ServeurReconnaissance(
+        model,
+        threads_decodage=options['threads'],
+        clients_max=options['clients_max'],
+        utiliser_ollama=options['ollama'],
+        grammaire=options['grammaire'],
+        vad=options['vad'],
+    )
+    
+    async def servir_connexion(descripteur: int) -> None:
+        connexion = socket.socket(fileno=descripteur)
+        try:
+            reader, writer = await asyncio.open_connection(sock=connexion)
+            await serveur.gerer_client(reader, writer)
+        finally:
+            with contextlib.suppress(OSError):
+                canal.send(FIN_CONNEXION)
+    
+    async def boucle() -> None:
+        boucle_evenements = asyncio.get_running_loop()
+        fin = boucle_evenements.create_future()
+        connexions = set()
+        
+        def recevoir() -> None:
+            try:
+                _, descripteurs, _, _ = socket.recv_fds(canal, 1, 1)
+            except OSError:
+                descripteurs = []
+            if not descripteurs:
+                # Canal fermé : le parent s'arrête
+                boucle_evenements.remove_reader(canal.fileno())
+                if not fin.done():
+                    fin.set_result(None)
+                return
+            tache = asyncio.create_task(servir_connexion(descripteurs[0]))
+            connexions.add(tache)
+            tache.add_done_callback(connexions.discard)
+        
+        boucle_evenements.add_reader(canal.fileno(), recevoir)
+        await fin
+        # Terminer les connexions en cours avant de quitter
+        if connexions:
+            await asyncio.gather(*connexions, return_exceptions=True)
+    
+    code = 0
+    try:
+        asyncio.run(boucle())
+    except Exception as e:
+        print(f"❌ Processus {os.getpid()} : {e}")
+        code = 1
+    finally:
+        serveur.fermer()
+    os._exit(code)
+
+
+class Travailleur:
+    """
+    Vue du parent sur un processus de travail.
+    """
+    
+    def __init__(self, pid: int, canal: socket.socket):
+        self.pid = pid
+        self.canal = canal
+        self.actifs = 0
+        self.total = 0
+        self._mesure_cpu = (time.monotonic(), lire_temps_cpu(pid) or 0.0)
+    
+    def utilisation_cpu(self) -> float:
+        """
+        Returns:
+            float: Part d'un cœur utilisée depuis l'appel précédent (0.0 à 1.0 par thread)
+        """
+        instant, temps_cpu = time.monotonic(), lire_temps_cpu(self.pid)
+        if temps_cpu is None:
+            return 0.0
+        instant_precedent, temps_precedent = self._mesure_cpu
+        self._mesure_cpu = (instant, temps_cpu)
+        duree = instant - instant_precedent
+        return (temps_cpu - temps_precedent) / duree if duree > 0 else 0.0
+
+
+# ==================== PROCESSUS PARENT ====================
+
+class ServeurPrefork:
+    """
+    Processus parent : accepte les connexions et les répartit sur les
+    processus de travail, remplacés s'ils s'arrêtent.
+    """
+    
+    def __init__(self, model, nb_processus: int = PROCESSUS, options: Optional[dict] = None,
+                 clients_max: int = serveur_reconnaissance.CLIENTS_MAX):
+        """
+        Args:
+            model: Modèle Vosk chargé, hérité par les processus de travail
+            nb_processus: Nombre de processus de travail
+            options: Options transmises à ServeurReconnaissance (threads, ollama, grammaire, vad)
+            clients_max: Nombre maximal de connexions simultanées, tous processus confondus
+        """
+        self.model = model
+        self.nb_processus = nb_processus
+        self.clients_max = clients_max
+        self.options = dict(options or {})
+        self.options.setdefault('threads', THREADS_PAR_PROCESSUS)
+        self.options.setdefault('ollama', True)
+        self.options.setdefault('grammaire', assistant.MODE_GRAMMAIRE)
+        self.options.setdefault('vad', assistant.VAD_ACTIVE)
+        self.options['clients_max'] = clients_max
+        
+        self.travailleurs: Dict[int, Travailleur] = {}  # Descripteur du canal -> travailleur
+        self.selecteur = selectors.DefaultSelector()
+        self.ecoute = None
+        self.connexions_refusees = 0
+        self.redemarrages = 0
+    
+    def _forker(self) -> Travailleur:
+        """
+        Crée un processus de travail relié au parent par un canal Unix.
+        """
+        canal_parent, canal_enfant = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        pid = os.fork()
+        if pid == 0:
+            # Processus de travail : ne garder que son propre canal
+            canal_parent.close()
+            if self.ecoute is not None:
+                self.ecoute.close()
+            for travailleur in self.travailleurs.values():
+                travailleur.canal.close()
+            self.selecteur.close()
+            executer_travailleur(canal_enfant, self.model, self.options)
+        
+        canal_enfant.close()
+        travailleur = Travailleur(pid, canal_parent)
+        self.travailleurs[canal_parent.fileno()] = travailleur
+        self.selecteur.register(canal_parent, selectors.EVENT_READ, travailleur)
+        return travailleur
+    
+    def demarrer(self, hote: str = serveur_reconnaissance.HOTE, port: int = serveur_reconnaissance.PORT) -> int:
+        """
+        Ouvre le socket d'écoute et crée les processus de travail.
+        
+        Returns:
+            int: Port d'écoute effectif
+        """
+        # Sortir les objets existants du ramasse-miettes : sans cela, ses passages
+        # écrivent dans leurs en-têtes et dupliquent les pages héritées
+        gc.freeze()
+        for _ in range(self.nb_processus):
+            self._forker()
+        
+        self.ecoute = socket.create_server((hote, port), backlog=128)
+        self.ecoute.setblocking(False)
+        self.selecteur.register(self.ecoute, selectors.EVENT_READ, None)
+        return self.ecoute.getsockname()[1]
+    
+    def _repartir(self, connexion: socket.socket) -> None:
+        """
+        Transmet une connexion au processus ayant le moins de connexions actives.
+        """
+        if sum(travailleur.actifs for travailleur in self.travailleurs.values()) >= self.clients_max:
+            self.connexions_refusees += 1
+            with connexion:
+                connexion.setblocking(True)
+                connexion.sendall(json.dumps({'type': 'erreur', 'message': 'trop de clients'}).encode('utf-8') + b'\n')
+            return
+        
+        travailleur = min(self.travailleurs.values(), key=lambda t: (t.actifs, t.total))
+        with connexion:
+            socket.send_fds(travailleur.canal, [b'C'], [connexion.fileno()])
+        travailleur.actifs += 1
+        travailleur.total += 1
+    
+    def _lire_canal(self, travailleur: Travailleur) -> None:
+        """
+        Traite les messages d'un processus de travail, et le remplace s'il s'est arrêté.
+        """
+        try:
+            messages = travailleur.canal.recv(4096)
+        except OSError:
+            messages = b""
+        if messages:
+            travailleur.actifs = max(0, travailleur.actifs - messages.count(FIN_CONNEXION))
+            return
+        
+        # Canal fermé : le processus s'est terminé
+        self.selecteur.unregister(travailleur.canal)
+        del self.travailleurs[travailleur.canal.fileno()]
+        travailleur.canal.close()
+        _, statut = os.waitpid(travailleur.pid, 0)
+        print(f"⚠️  Processus {travailleur.pid} arrêté (code {os.waitstatus_to_exitcode(statut)}), remplacement")
+        self.redemarrages += 1
+        self._forker()
+    
+    def rapport(self) -> List[dict]:
+        """
+        Returns:
+            list: Pour chaque processus (parent compris) : connexions, CPU et mémoire
+        """
+        lignes = [dict({'pid': os.getpid(), 'role': 'parent'}, **lire_memoire(os.getpid()))]
+        for travailleur in self.travailleurs.values():
+            lignes.append(dict({
+                'pid': travailleur.pid,
+                'role': 'travail',
+                'actifs': travailleur.actifs,
+                'total': travailleur.total,
+                'cpu': travailleur.utilisation_cpu(),
+            }, **lire_memoire(travailleur.pid)))
+        return lignes
+    
+    def afficher_rapport(self) -> None:
+        lignes = self.rapport()
+        print(f"\n{'PID':>8} {'Rôle':<8} {'Actives':>8} {'Total':>7} {'CPU %':>6} "
+              f"{'RSS (Mo)':>9} {'PSS (Mo)':>9} {'Partagée':>9}")
+        for ligne in lignes:
+            print(f"{ligne['pid']:>8} {ligne['role']:<8} {ligne.get('actifs', '-'):>8} {ligne.get('total', '-'):>7} "
+                  f"{100 * ligne.get('cpu', 0.0):>6.0f} {ligne.get('rss_mo', 0.0):>9.0f} "
+                  f"{ligne.get('pss_mo', 0.0):>9.0f} {ligne.get('partagee_mo', 0.0):>9.0f}")
+        print(f"   Mémoire totale : {sum(l.get('rss_mo', 0.0) for l in lignes):.0f} Mo en RSS, "
+              f"{sum(l.get('pss_mo', 0.0) for l in lignes):.0f} Mo réellement occupés (PSS)")
+    
+    def servir(self, intervalle_rapport: float = RAPPORT_INTERVALLE) -> None:
+        """
+        Boucle du parent, jusqu'à KeyboardInterrupt.
+        
+        Args:
+            intervalle_rapport: Période du rapport de charge (0 pour le désactiver)
+        """
+        prochain_rapport = time.monotonic() + intervalle_rapport
+        while True:
+            attente = max(0.0, prochain_rapport - time.monotonic()) if intervalle_rapport else None
+            for cle, _ in self.selecteur.select(attente):
+                if cle.data is None:
+                    try:
+                        connexion, _ = self.ecoute.accept()
+                    except BlockingIOError:
+                        continue
+                    self._repartir(connexion)
+                else:
+                    self._lire_canal(cle.data)
+            
+            if intervalle_rapport and time.monotonic() >= prochain_rapport:
+                self.afficher_rapport()
+                prochain_rapport = time.monotonic() + intervalle_rapport
+    
+    def arreter(self, timeout: float = 5.0) -> None:
+        """
+        Ferme le socket d'écoute et arrête les processus de travail.
+        """
+        if self.ecoute is not None:
+            self.selecteur.unregister(self.ecoute)
+            self.ecoute.close()
+            self.ecoute = None
+        
+        # Fermer les canaux : chaque processus termine ses connexions puis s'arrête
+        for travailleur in self.travailleurs.values():
+            self.selecteur.unregister(travailleur.canal)
+            travailleur.canal.close()
+        
+        limite = time.monotonic() + timeout
+        for travailleur in self.travailleurs.values():
+            while time.monotonic() < limite:
+                pid, _ = os.waitpid(travailleur.pid, os.WNOHANG)
+                if pid:
+                    break
+                time.sleep(0.05)
+            else:
+                os.kill(travailleur.pid, signal.SIGTERM)
+                os.waitpid(travailleur.pid, 0)
+        self.travailleurs.clear()
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Serveur de reconnaissance vocale multi-cœurs (prefork)")
+    parser.add_argument('--processus', type=int, default=PROCESSUS, help="Nombre de processus de travail")
+    parser.add_argument('--threads', type=int, default=THREADS_PAR_PROCESSUS,
+                        help="Décodages simultanés par processus")
+    parser.add_argument('--hote', default=serveur_reconnaissance.HOTE, help="Adresse d'écoute")
+    parser.add_argument('--port', type=int, default=serveur_reconnaissance.PORT, help="Port d'écoute")
+    parser.add_argument('--clients-max', type=int, default=serveur_reconnaissance.CLIENTS_MAX,
+                        help="Connexions simultanées, tous processus confondus")
+    parser.add_argument('--rapport', type=float, default=RAPPORT_INTERVALLE,
+                        help="Période du rapport de charge en secondes (0 pour désactiver)")
+    parser.add_argument('--modele', default=assistant.VOSK_MODEL_PATH, help="Chemin du modèle Vosk")
+    parser.add_argument('--sans-ollama', action='store_true', help="N'utiliser que les analyses locales")
+    parser.add_argument('--sans-grammaire', action='store_true', help="Désactiver la grammaire restreinte")
+    parser.add_argument('--sans-vad', action='store_true', help="Désactiver la détection d'activité vocale")
+    args = parser.parse_args()
+    
+    if not hasattr(os, 'fork'):
+        print("❌ Le mode prefork nécessite fork (Linux, macOS) ; utilisez serveur_reconnaissance.py")
+        sys.exit(1)
+    
+    print("=" * 60)
+    print("🛰️  Serveur de reconnaissance vocale (prefork)")
+    print("=" * 60)
+    
+    if not os.path.isdir(args.modele):
+        print(f"❌ Modèle Vosk introuvable : {args.modele}")
+        sys.exit(1)
+    
+    assistant.charger_classifieur()
+    if not args.sans_ollama and assistant.verifier_ollama():
+        assistant.charger_index_exemples()
+        # Aucun thread ne doit tourner au moment du fork
+        assistant.CLIENT_OLLAMA.prechauffage.join()
+    
+    debut = time.perf_counter()
+    model = assistant.vosk.Model(args.modele)
+    print(f"✅ Modèle Vosk chargé dans le parent ({time.perf_counter() - debut:.1f} s)")
+    
+    serveur = ServeurPrefork(
+        model,
+        nb_processus=args.processus,
+        clients_max=args.clients_max,
+        options={
+            'threads': args.threads,
+            'ollama': not args.sans_ollama,
+            'grammaire': not args.sans_grammaire,
+            'vad': not args.sans_vad,
+        },
+    )
+    port = serveur.demarrer(args.hote, args.port)
+    print(f"🎧 En écoute sur {args.hote}:{port} ({args.processus} processus × {args.threads} thread(s))")
+    
+    try:
+        serveur.servir(args.rapport)
+    finally:
+        serveur.afficher_rapport()
+        serveur.arreter()
+        print(f"📊 {serveur.connexions_refusees} connexions refusées, {serveur.redemarrages} processus remplacés")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Serveur arrêté par l'utilisateur")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Erreur fatale : {e}")
+        sys.exit(1)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur de reconnaissance multi-clients partageant un seul modèle Vosk.
+
+Chaque client (un micro par pièce, par exemple) ouvre une connexion TCP et y
+envoie l'audio brut : PCM 16 bits mono à 16 kHz, sans en-tête. Le serveur
+répond une ligne JSON par événement :
+
+    {"type": "commande", "texte": "lance spotify", "intention": "ACTION_SPOTIFY", "anticipee": true}
+    {"type": "enonce", "texte": "quelle heure est il", "intention": "IGNORE", "parametres": {}}
+    {"type": "enonce", "texte": "mets du daft punk", "intention": "LECTURE", "parametres": {"artiste": "daft punk"}}
+
+Le client ferme sa moitié d'écriture (shutdown) pour obtenir le dernier
+énoncé avant la fermeture. Le modèle Vosk n'est chargé qu'une fois ; chaque
+connexion a son propre KaldiRecognizer, et le décodage s'exécute sur un pool
+de threads borné (Vosk libère le GIL pendant le décodage).
+
+Usage :
+    python serveur_reconnaissance.py [--port 2700] [--threads 4] [--clients-max 16]
+    python serveur_reconnaissance.py --client phrase.wav [--port 2700]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Configurer l'encodage UTF-8 pour la console Windows
+if sys.platform == 'win32' and __name__ == "__main__":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+import assistant_spotify as assistant
+
+# ==================== CONFIGURATION ====================
+
+HOTE = "127.0.0.1"       # Adresse d'écoute (locale par défaut)
+PORT = 2700
+THREADS_DECODAGE = os.cpu_count() or 2   # Décodages Vosk simultanés
+THREADS_INTENTION = 4    # Analyses d'intention simultanées (appels Ollama)
+CLIENTS_MAX = 16         # Connexions simultanées acceptées
+OCTETS_PAR_LECTURE = assistant.CHUNK_SIZE * 2
+
+
+# ==================== SERVEUR ====================
+
+class ServeurReconnaissance:
+    """
+    Serveur asyncio : une boucle d'événements gère toutes les connexions,
+    les décodages et les analyses d'intention sont confiés à deux pools de
+    threads bornés.
+    
+    Chaque connexion attend la fin du décodage d'un bloc avant de lire le
+    suivant : un client trop rapide est freiné par le contrôle de flux TCP
+    au lieu d'accumuler de l'audio en mémoire.
+    """
+    
+    def __init__(self, model, threads_decodage: int = THREADS_DECODAGE,
+                 threads_intention: int = THREADS_INTENTION, clients_max: int = CLIENTS_MAX,
+                 utiliser_ollama: bool = True, grammaire: bool = assistant.MODE_GRAMMAIRE,
+                 vad: bool = assistant.VAD_ACTIVE,
+                 validation_anticipee: bool = assistant.VALIDATION_ANTICIPEE):
+        """
+        Args:
+            model: Modèle Vosk partagé par toutes les connexions
+            threads_decodage: Taille du pool de décodage
+            threads_intention: Taille du pool d'analyse d'intention
+            clients_max: Nombre maximal de connexions simultanées
+            utiliser_ollama: Consulter Ollama pour les phrases non reconnues localement
+            grammaire: Décoder d'abord avec la grammaire restreinte
+            vad: Filtrer les silences avant Vosk
+            validation_anticipee: Valider les commandes sur les résultats partiels
+        """
+        self.model = model
+        self.clients_max = clients_max
+        self.utiliser_ollama = utiliser_ollama
+        self.options_session = {
+            'grammaire': grammaire,
+            'vad': vad,
+            'validation_anticipee': validation_anticipee,
+        }
+        self.executeur_decodage = ThreadPoolExecutor(threads_decodage, thread_name_prefix="decodage")
+        self.executeur_intention = ThreadPoolExecutor(threads_intention, thread_name_prefix="intention")
+        
+        self.clients_actifs = 0
+        self.connexions = 0
+        self.connexions_refusees = 0
+        self.secondes_audio = 0.0
+        self.enonces = 0
+        self._serveur = None
+    
+    async def gerer_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Traite une connexion jusqu'à sa fermeture par le client.
+        """
+        pair = writer.get_extra_info('peername')
+        if self.clients_actifs >= self.clients_max:
+            self.connexions_refusees += 1
+            writer.write(json.dumps({'type': 'erreur', 'message': 'trop de clients'}).encode('utf-8') + b'\n')
+            await writer.drain()
+            writer.close()
+            return
+        
+        boucle = asyncio.get_running_loop()
+        connexion = {'writer': writer, 'verrou': asyncio.Lock(), 'analyses': set(), 'dernier_texte': ''}
+        reste = b""
+        
+        try:
+            self.clients_actifs += 1
+            self.connexions += 1
+            print(f"🔌 Client connecté : {pair} ({self.clients_actifs} actifs)")
+            
+            session = await boucle.run_in_executor(
+                self.executeur_decodage,
+                lambda: assistant.SessionReconnaissance(self.model, **self.options_session),
+            )
+            while True:
+                data = await reader.read(OCTETS_PAR_LECTURE)
+                if not data:
+                    evenements = await boucle.run_in_executor(self.executeur_decodage, session.terminer)
+                    self._publier(evenements, connexion)
+                    break
+                
+                # Ne transmettre que des échantillons complets (2 octets)
+                data = reste + data
+                if len(data) % 2:
+                    data, reste = data[:-1], data[-1:]
+                else:
+                    reste = b""
+                self.secondes_audio += len(data) / 2 / assistant.SAMPLE_RATE
+                
+                evenements = await boucle.run_in_executor(self.executeur_decodage, session.traiter, data)
+                self._publier(evenements, connexion)
+            
+            if connexion['analyses']:
+                await asyncio.gather(*connexion['analyses'])
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            print(f"⚠️  Connexion {pair} interrompue : {e}")
+        except Exception as e:
+            print(f"❌ Erreur sur la connexion {pair} : {e}")
+        finally:
+            self.clients_actifs -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+            print(f"👋 Client déconnecté : {pair} ({self.clients_actifs} actifs)")
+    
+    def _publier(self, evenements, connexion: dict) -> None:
+        """
+        Lance l'envoi de chaque événement ; l'analyse d'intention des énoncés
+        terminés se fait en tâche de fond pour ne pas retarder le décodage.
+        """
+        for texte, intention_anticipee in evenements:
+            # Comme traiter_flux : un énoncé identique au précédent n'est pas renvoyé
+            if texte == connexion['dernier_texte']:
+                continue
+            connexion['dernier_texte'] = texte
+            self.enonces += 1
+            tache = asyncio.create_task(self._analyser_et_envoyer(texte, intention_anticipee, connexion))
+            connexion['analyses'].add(tache)
+            tache.add_done_callback(connexion['analyses'].discard)
+    
+    async def _analyser_et_envoyer(self, texte: str, intention_anticipee: Optional[str], connexion: dict) -> None:
+        if intention_anticipee:
+            message = {'type': 'commande', 'texte': texte, 'intention': intention_anticipee, 'anticipee': True}
+        else:
+            resultat = await asyncio.get_running_loop().run_in_executor(
+                self.executeur_intention, assistant.analyser_commande, texte, self.utiliser_ollama
+            )
+            intention, parametres = resultat if resultat else (None, {})
+            message = {'type': 'enonce', 'texte': texte, 'intention': intention, 'parametres': parametres}
+        
+        async with connexion['verrou']:
+            connexion['writer'].write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            await connexion['writer'].drain()
+    
+    async def demarrer(self, hote: str = HOTE, port: int = PORT, sock: Optional[socket.socket] = None) -> None:
+        """
+        Ouvre le socket d'écoute.
+        
+        Args:
+            hote: Adresse d'écoute
+            port: Port d'écoute (0 pour un port libre)
+            sock: Socket d'écoute déjà ouvert (remplace hote et port)
+        """
+        if sock is not None:
+            self._serveur = await asyncio.start_server(self.gerer_client, sock=sock)
+        else:
+            self._serveur = await asyncio.start_server(self.gerer_client, hote, port)
+    
+    @property
+    def port(self) -> int:
+        return self._serveur.sockets[0].getsockname()[1]
+    
+    async def servir(self) -> None:
+        """
+        Sert les connexions jusqu'à l'annulation de la tâche.
+        """
+        async with self._serveur:
+            await self._serveur.serve_forever()
+    
+    def fermer(self) -> None:
+        """
+        Arrête les pools de threads (après la fin de servir()).
+        """
+        self.executeur_decodage.shutdown(wait=False, cancel_futures=True)
+        self.executeur_intention.shutdown(wait=False, cancel_futures=True)
+    
+    def statistiques(self) -> dict:
+        """
+        Returns:
+            dict: Connexions servies et refusées, audio reçu et énoncés reconnus
+        """
+        return {
+            'connexions': self.connexions,
+            'connexions_refusees': self.connexions_refusees,
+            'clients_actifs': self.clients_actifs,
+            'secondes_audio': self.secondes_audio,
+            'enonces': self.enonces,
+        }
+
+
+# ==================== CLIENT DE TEST ====================
+
+def envoyer_wav(chemin: str, hote: str = HOTE, port: int = PORT, vitesse: float = 1.0) -> None:
+    """
+    Envoie un fichier WAV au serveur et affiche les réponses.
+    
+    Args:
+        chemin: Fichier WAV 16 bits (rééchantillonné à 16 kHz mono si nécessaire)
+        hote: Adresse du serveur
+        port: Port du serveur
+        vitesse: Rythme d'envoi (1.0 = temps réel, 0 = aussi vite que possible)
+    """
+    source = assistant.SourceAudioFichier.depuis_wav(chemin)
+    
+    with socket.create_connection((hote, port)) as connexion:
+        debut = time.perf_counter()
+        for position in range(0, len(source.audio), OCTETS_PAR_LECTURE):
+            connexion.sendall(source.audio[position:position + OCTETS_PAR_LECTURE])
+            if vitesse:
+                echeance = debut + (position + OCTETS_PAR_LECTURE) / 2 / assistant.SAMPLE_RATE / vitesse
+                time.sleep(max(0.0, echeance - time.perf_counter()))
+        connexion.shutdown(socket.SHUT_WR)
+        
+        with connexion.makefile('r', encoding='utf-8') as reponses:
+            for ligne in reponses:
+                print(f"📨 {ligne.strip()}  (+{time.perf_counter() - debut:.2f} s)")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Serveur de reconnaissance vocale multi-clients")
+    parser.add_argument('--hote', default=HOTE, help="Adresse d'écoute")
+    parser.add_argument('--port', type=int, default=PORT, help="Port d'écoute")
+    parser.add_argument('--threads', type=int, default=THREADS_DECODAGE, help="Décodages Vosk simultanés")
+    parser.add_argument('--clients-max', type=int, default=CLIENTS_MAX, help="Connexions simultanées")
+    parser.add_argument('--modele', default=assistant.VOSK_MODEL_PATH, help="Chemin du modèle Vosk")
+    parser.add_argument('--sans-ollama', action='store_true', help="N'utiliser que les analyses locales")
+    parser.add_argument('--sans-grammaire', action='store_true', help="Désactiver la grammaire restreinte")
+    parser.add_argument('--sans-vad', action='store_true', help="Désactiver la détection d'activité vocale")
+    parser.add_argument('--client', metavar='WAV', help="Envoyer un fichier WAV à un serveur existant")
+    parser.add_argument('--vitesse', type=float, default=1.0, help="Rythme d'envoi du client (0 = sans pause)")
+    args = parser.parse_args()
+    
+    if args.client:
+        envoyer_wav(args.client, args.hote, args.port, args.vitesse)
+        return
+    
+    print("=" * 60)
+    print("🛰️  Serveur de reconnaissance vocale")
+    print("=" * 60)
+    
+    if not os.path.isdir(args.modele):
+        print(f"❌ Modèle Vosk introuvable : {args.modele}")
+        sys.exit(1)
+    
+    assistant.charger_classifieur()
+    if not args.sans_ollama and not assistant.verifier_ollama():
+        print("⚠️  Ollama indisponible : seules les analyses locales seront utilisées")
+    elif not args.sans_ollama:
+        # Le modèle d'embeddings se charge pendant que le serveur démarre
+        assistant.charger_index_exemples(attendre=False)
+    
+    debut = time.perf_counter()
+    model = assistant.vosk.Model(args.modele)
+    print(f"✅ Modèle Vosk chargé une fois pour tous les clients ({time.perf_counter() - debut:.1f} s)")
+    
+    serveur = ServeurReconnaissance(
+        model,
+        threads_decodage=args.threads,
+        clients_max=args.clients_max,
+        utiliser_ollama=not args.sans_ollama,
+        grammaire=not args.sans_grammaire,
+        vad=not args.sans_vad,
+    )
+    
+    async def executer():
+        await serveur.demarrer(args.hote, args.port)
+        print(f"🎧 En écoute sur {args.hote}:{serveur.port} "
+              f"({args.threads} threads de décodage, {args.clients_max} clients au plus)")
+        await serveur.servir()
+    
+    try:
+        asyncio.run(executer())
+    finally:
+        serveur.fermer()
+        stats = serveur.statistiques()
+        print(f"\n📊 {stats['connexions']} connexions ({stats['connexions_refusees']} refusées), "
+              f"{stats['secondes_audio']:.0f} s d'audio, {stats['enonces']} énoncés")
+        assistant.CACHE_INTENTIONS.sauvegarder()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Serveur arrêté par l'utilisateur")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Erreur fatale : {e}")
+        sys.exit(1)
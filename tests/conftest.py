@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Configuration commune des tests : les modules de l'assistant sont à la racine
+du dépôt ; un serveur Ollama local remplace le vrai pour les tests du client.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class OllamaLocal:
+    """
+    Serveur Ollama minimal sur un port local : /api/tags liste un modèle,
+    /api/generate renvoie les fragments de `fragments`, en un seul objet ou
+    en flux NDJSON selon 'stream'. Si `suspendre` est vrai, le flux reste
+    ouvert sans 'done' jusqu'à ce que le client ferme la connexion (au plus 5 s) ;
+    si `erreur` est renseignée, le flux se termine par une ligne d'erreur.
+    """
+    
+    def __init__(self):
+        self.fragments = ['{"intention": "IGNORE"}']
+        self.suspendre = False
+        self.erreur = None
+        self.requetes = []      # (chemin, corps JSON)
+        self.ports_clients = []  # Port source de chaque requête (une nouvelle connexion en change)
+        self.deconnexions = threading.Event()
+        self._serveur = None
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._serveur.server_address[1]}"
+    
+    def demarrer(self) -> None:
+        ollama = self
+        
+        class Gestionnaire(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _repondre(self, contenu: dict) -> None:
+                corps = json.dumps(contenu).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+            
+            def _morceau(self, donnees: bytes) -> None:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(donnees), donnees))
+                self.wfile.flush()
+            
+            def do_GET(self):
+                ollama.requetes.append((self.path, None))
+                ollama.ports_clients.append(self.client_address[1])
+                self._repondre({'models': [{'name': 'mistral:latest'}]})
+            
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                ollama.requetes.append((self.path, payload))
+                ollama.ports_clients.append(self.client_address[1])
+                if not payload.get('stream', True):
+                    self._repondre({'response': ''.join(ollama.fragments), 'done': True})
+                    return
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    for fragment in ollama.fragments:
+                        self._morceau(json.dumps({'response': fragment, 'done': False}).encode() + b'\n')
+                    if ollama.erreur:
+                        self._morceau(json.dumps({'error': ollama.erreur}).encode() + b'\n')
+                    if ollama.suspendre:
+                        for _ in range(50):
+                            time.sleep(0.1)
+                            self._morceau(b'\n')
+                    self._morceau(json.dumps({'response': '', 'done': True}).encode() + b'\n')
+                    self.wfile.write(b'0\r\n\r\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    ollama.deconnexions.set()
+        
+        self._serveur = ThreadingHTTPServer(('127.0.0.1', 0), Gestionnaire)
+        self._serveur.daemon_threads = True
+        threading.Thread(target=self._serveur.serve_forever, args=(0.05,), daemon=True).start()
+    
+    def arreter(self) -> None:
+        self._serveur.shutdown()
+        self._serveur.server_close()
+
+
+@pytest.fixture
+def ollama_local():
+    serveur = OllamaLocal()
+    serveur.demarrer()
+    yield serveur
+    serveur.arreter()
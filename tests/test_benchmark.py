@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Tests des outils du benchmark : faux serveur Ollama, source audio de
+fichier et audio synthétique.
+"""
+
+import pytest
+
+import assistant_spotify as assistant
+import benchmark_assistant
+from assistant_spotify import SourceAudioFichier
+from benchmark_assistant import ServeurOllamaFactice, generer_audio_synthetique
+
+
+@pytest.mark.parametrize('prompt, intention', [
+    ("lance la musique", 'ACTION_SPOTIFY'),
+    ("ouvre Spotify", 'ACTION_SPOTIFY'),
+    ("quelle heure est-il", 'IGNORE'),
+])
+def test_reponse_du_faux_modele(prompt, intention):
+    assert assistant.interpreter_reponse_ollama(''.join(ServeurOllamaFactice.tokens_reponse(prompt))) == \
+        (intention, {})
+
+
+@pytest.fixture
+def serveur():
+    serveur = ServeurOllamaFactice()
+    yield serveur
+    serveur.arreter()
+
+
+def test_faux_serveur_en_flux(serveur, monkeypatch):
+    monkeypatch.setattr(assistant, 'CLIENT_OLLAMA', assistant.ClientOllama(serveur.demarrer()))
+    
+    assert assistant.CLIENT_OLLAMA.lister_modeles() == ['mistral:latest']
+    assert assistant.classifier_flux({'model': 'mistral:latest', 'prompt': "mets de la musique"}, timeout=5) == \
+        ('ACTION_SPOTIFY', {})
+    assert assistant.CLIENT_OLLAMA.generer({'prompt': "bonjour", 'stream': False}, timeout=5)['response'] == \
+        '{"intention": "IGNORE"}'
+    assert serveur.requetes == 2
+
+
+def test_faux_serveur_en_panne(serveur):
+    serveur.taux_echec = 1.0
+    client = assistant.ClientOllama(serveur.demarrer())
+    
+    with pytest.raises(assistant.requests.exceptions.HTTPError):
+        client.generer({'prompt': "bonjour", 'stream': False}, timeout=5)
+    assert serveur.echecs == 1
+
+
+def test_source_fichier_ecrit_l_audio_puis_le_silence():
+    audio = bytes(range(200))
+    source = SourceAudioFichier(audio, sample_rate=1000, taille_bloc=30, vitesse=0, silence_final=0.05)
+    
+    source.demarrer()
+    lu = b''
+    while not source.epuisee:
+        lu += source.lire(30, timeout=1)
+    
+    assert lu == audio + bytes(100)
+    assert source.horodatage_fin_audio is not None
+    assert source.statistiques()['trames_perdues'] == 0
+
+
+def test_source_fichier_arretee():
+    source = SourceAudioFichier(bytes(32000), sample_rate=1000, taille_bloc=10, vitesse=1.0)
+    
+    source.demarrer()
+    source.arreter()
+    
+    # 32 s d'audio au rythme réel : l'écriture s'est arrêtée avant la fin
+    assert source.horodatage_fin_audio is None
+    assert len(source.lire(32000, timeout=0)) < 64000
+    assert source.epuisee
+
+
+def test_audio_synthetique_reproductible():
+    audio = generer_audio_synthetique(2.0)
+    
+    assert len(audio) == 2 * 2 * assistant.SAMPLE_RATE
+    assert audio == generer_audio_synthetique(2.0)
+
+
+def test_audio_synthetique_alterne_silence_et_parole():
+    vad = assistant.DetecteurActiviteVocale(hangover_ms=0, preroll_ms=0)
+    audio = generer_audio_synthetique(20.0, proportion_parole=0.3)
+    
+    bloc = assistant.CHUNK_SIZE * 2
+    for position in range(0, len(audio), bloc):
+        vad.filtrer(audio[position:position + bloc])
+    
+    assert 0.4 < vad.proportion_ignoree < 0.95
+
+
+def test_configurer_assistant(monkeypatch):
+    for nom in ('OLLAMA_STREAMING', 'CLIENT_OLLAMA', 'DISJONCTEUR_OLLAMA', 'OLLAMA_MODEL_ACTUAL', 'CACHE_INTENTIONS'):
+        monkeypatch.setattr(assistant, nom, getattr(assistant, nom))
+    
+    benchmark_assistant.configurer_assistant(benchmark_assistant.CONFIGURATIONS['reference'], 'http://127.0.0.1:1')
+    
+    assert assistant.OLLAMA_STREAMING is False
+    assert assistant.CLIENT_OLLAMA.base_url == 'http://127.0.0.1:1'
+    assert assistant.CACHE_INTENTIONS.fichier is None
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du cache des verdicts d'intention : clé normalisée, éviction LRU,
+expiration et persistance avec empreinte.
+"""
+
+import json
+
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import CacheIntentions
+
+
+@pytest.fixture
+def horloge(monkeypatch):
+    """Heure murale simulée, avancée à la main."""
+    instant = [1_000_000.0]
+    monkeypatch.setattr(assistant.time, 'time', lambda: instant[0])
+    return instant
+
+
+def test_cle_normalisee():
+    cache = CacheIntentions(fichier=None)
+    cache.enregistrer("Mets du Queen !", 'LECTURE', {'artiste': 'queen'})
+    
+    assert cache.obtenir("mets du queen") == ('LECTURE', {'artiste': 'queen'})
+    assert cache.obtenir("mets du abba") is None
+    assert cache.statistiques() == {'entrees': 1, 'succes': 1, 'echecs': 1}
+
+
+def test_eviction_lru():
+    cache = CacheIntentions(taille_max=2, fichier=None)
+    cache.enregistrer("un", 'IGNORE')
+    cache.enregistrer("deux", 'IGNORE')
+    cache.obtenir("un")
+    cache.enregistrer("trois", 'IGNORE')
+    
+    assert cache.obtenir("deux") is None
+    assert cache.obtenir("un") == ('IGNORE', {})
+    assert cache.obtenir("trois") == ('IGNORE', {})
+
+
+def test_expiration(horloge):
+    cache = CacheIntentions(ttl=60, fichier=None)
+    cache.enregistrer("bonjour", 'IGNORE')
+    
+    horloge[0] += 59
+    assert cache.obtenir("bonjour") == ('IGNORE', {})
+    horloge[0] += 2
+    assert cache.obtenir("bonjour") is None
+
+
+def test_persistance(tmp_path, horloge):
+    fichier = str(tmp_path / 'cache.json')
+    cache = CacheIntentions(fichier=fichier, empreinte='a')
+    cache.enregistrer("mets du queen", 'LECTURE', {'artiste': 'queen'})
+    cache.sauvegarder()
+    
+    assert CacheIntentions(fichier=fichier, empreinte='a').obtenir("mets du queen") == \
+        ('LECTURE', {'artiste': 'queen'})
+    
+    horloge[0] += assistant.CACHE_INTENTIONS_TTL + 1
+    assert CacheIntentions(fichier=fichier, empreinte='a').obtenir("mets du queen") is None
+
+
+def test_empreinte_differente_ignoree(tmp_path):
+    fichier = str(tmp_path / 'cache.json')
+    cache = CacheIntentions(fichier=fichier, empreinte='mistral')
+    cache.enregistrer("bonjour", 'IGNORE')
+    cache.sauvegarder()
+    
+    autre = CacheIntentions(fichier=fichier, empreinte='llama')
+    assert autre.obtenir("bonjour") is None
+    autre.sauvegarder()
+    assert json.loads(open(fichier, encoding='utf-8').read()) == {'empreinte': 'llama', 'entrees': []}
+
+
+def test_entrees_anciennes_ecartees(tmp_path, horloge):
+    fichier = tmp_path / 'cache.json'
+    fichier.write_text(json.dumps({'empreinte': 'a', 'entrees': [
+        ["lance la musique", 'ACTION_SPOTIFY', horloge[0]],
+        ["mets du queen", 'LECTURE', horloge[0], {'artiste': 'queen'}],
+    ]}), encoding='utf-8')
+    cache = CacheIntentions(fichier=str(fichier), empreinte='a')
+    
+    assert cache.obtenir("lance la musique") is None
+    assert cache.obtenir("mets du queen") == ('LECTURE', {'artiste': 'queen'})
+
+
+def test_format_sans_en_tete_ignore(tmp_path, horloge):
+    fichier = tmp_path / 'cache.json'
+    fichier.write_text(json.dumps([["bonjour", 'IGNORE', horloge[0], {}]]), encoding='utf-8')
+    
+    assert CacheIntentions(fichier=str(fichier), empreinte='a').obtenir("bonjour") is None
+
+
+def test_fichier_lu_une_fois_le_modele_resolu(tmp_path):
+    fichier = str(tmp_path / 'cache.json')
+    cache = CacheIntentions(fichier=fichier, empreinte='mistral:latest')
+    cache.enregistrer("bonjour", 'IGNORE')
+    cache.sauvegarder()
+    
+    cache = CacheIntentions(fichier=fichier)
+    assert cache.obtenir("bonjour") is None
+    cache.definir_empreinte('mistral:latest')
+    assert cache.obtenir("bonjour") == ('IGNORE', {})
+    
+    cache.definir_empreinte('llama3:latest')
+    assert cache.obtenir("bonjour") is None
+
+
+def test_empreinte_inconnue_n_ecrit_rien(tmp_path):
+    fichier = tmp_path / 'cache.json'
+    cache = CacheIntentions(fichier=str(fichier))
+    cache.enregistrer("bonjour", 'IGNORE')
+    cache.sauvegarder()
+    
+    assert not fichier.exists()
+
+
+def test_empreinte_du_registre_depend_du_modele():
+    assert assistant.INTENTIONS.empreinte('mistral:latest') == assistant.INTENTIONS.empreinte('mistral:latest')
+    assert assistant.INTENTIONS.empreinte('mistral:latest') != assistant.INTENTIONS.empreinte('llama3:latest')
+
+
+def test_verifier_ollama_fixe_l_empreinte_du_modele_resolu(monkeypatch, tmp_path):
+    class OllamaFactice:
+        def lister_modeles(self):
+            return ['llama3:latest', 'mistral:7b']
+        
+        def prechauffer(self, modele, payload):
+            pass
+    
+    monkeypatch.setattr(assistant, 'CLIENT_OLLAMA', OllamaFactice())
+    monkeypatch.setattr(assistant, 'OLLAMA_MODEL_ACTUAL', None)
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', CacheIntentions(fichier=str(tmp_path / 'cache.json')))
+    
+    assert assistant.verifier_ollama()
+    assert assistant.CACHE_INTENTIONS.empreinte == assistant.INTENTIONS.empreinte('mistral:7b')
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du cache de phrases pré-synthétisées : rendu WAV, lecture de
+l'en-tête RIFF et lecture directe dans un flux de sortie.
+"""
+
+import struct
+import threading
+import types
+import wave
+
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import CacheVocal
+
+
+def ecrire_wav(chemin):
+    with wave.open(str(chemin), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(22050)
+        wav.writeframes(b'\x01\x00\x02\x00\x03\x00')
+
+
+class MoteurFactice:
+    """Moteur pyttsx3 simulé qui rend chaque phrase dans un petit WAV."""
+    
+    def __init__(self, format_wav=True):
+        self.proprietes = {'voice': 'fr', 'rate': 150, 'volume': 0.9}
+        self.format_wav = format_wav
+        self.a_rendre = []
+        self.rendus = 0
+    
+    def getProperty(self, nom):
+        return self.proprietes[nom]
+    
+    def save_to_file(self, texte, chemin):
+        self.a_rendre.append(chemin)
+    
+    def runAndWait(self):
+        for chemin in self.a_rendre:
+            if self.format_wav:
+                ecrire_wav(chemin)
+            else:
+                with open(chemin, 'wb') as f:
+                    f.write(b'FORM....AIFF')
+            self.rendus += 1
+        self.a_rendre.clear()
+
+
+class FluxFactice:
+    def __init__(self, **format_audio):
+        self.format_audio = format_audio
+        self.ecrits = []
+        self.ferme = False
+    
+    def write(self, donnees):
+        self.ecrits.append(bytes(donnees))
+    
+    def stop_stream(self):
+        pass
+    
+    def close(self):
+        self.ferme = True
+
+
+class PyAudioFactice:
+    def __init__(self):
+        self.flux = []
+    
+    def get_format_from_width(self, largeur):
+        return largeur
+    
+    def open(self, **format_audio):
+        self.flux.append(FluxFactice(**format_audio))
+        return self.flux[-1]
+    
+    def terminate(self):
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(assistant, 'pyaudio', types.SimpleNamespace(PyAudio=PyAudioFactice))
+    return CacheVocal(str(tmp_path / "cache_vocal"))
+
+
+def test_pas_de_fichier_avant_preparation(cache):
+    assert cache.chemin("Spotify est lancé") is None
+    assert not cache.jouer("Spotify est lancé")
+
+
+def test_preparation_ne_rend_que_les_phrases_absentes(cache):
+    moteur = MoteurFactice()
+    
+    assert cache.preparer(moteur, ["c'est fait", "Spotify est lancé", "c'est fait"]) == 2
+    assert cache.preparer(moteur, ["c'est fait", "Spotify est lancé"]) == 0
+    assert moteur.rendus == 2
+
+
+def test_changement_de_voix_invalide_le_cache(cache):
+    moteur = MoteurFactice()
+    cache.preparer(moteur, ["c'est fait"])
+    chemin = cache.chemin("c'est fait")
+    
+    moteur.proprietes['rate'] = 200
+    
+    assert cache.preparer(moteur, ["c'est fait"]) == 1
+    assert cache.chemin("c'est fait") != chemin
+
+
+def test_rendu_non_wav_ecarte(cache, tmp_path):
+    assert cache.preparer(MoteurFactice(format_wav=False), ["c'est fait"]) == 0
+    assert list((tmp_path / "cache_vocal").iterdir()) == []
+    assert not cache.jouer("c'est fait")
+
+
+def test_jouer_ecrit_les_echantillons_par_blocs(cache, monkeypatch):
+    monkeypatch.setattr(CacheVocal, 'TRAMES_PAR_ECRITURE', 2)
+    cache.preparer(MoteurFactice(), ["c'est fait", "Spotify est lancé"])
+    
+    assert cache.jouer("c'est fait")
+    assert cache.jouer("Spotify est lancé")
+    assert not cache.jouer("autre chose")
+    
+    # Un seul flux pour un même format, réutilisé d'une phrase à l'autre
+    (flux,) = cache._audio.flux
+    assert flux.format_audio == {'format': 2, 'channels': 1, 'rate': 22050, 'output': True}
+    assert flux.ecrits == [b'\x01\x00\x02\x00', b'\x03\x00'] * 2
+    assert cache.lectures == 2
+    
+    cache.fermer()
+    assert flux.ferme
+
+
+def test_lecture_interrompue(cache):
+    cache.preparer(MoteurFactice(), ["c'est fait"])
+    interruption = threading.Event()
+    interruption.set()
+    
+    assert cache.jouer("c'est fait", interruption)
+    assert cache._audio.flux[0].ecrits == []
+
+
+def riff(*blocs):
+    corps = b'WAVE' + b''.join(
+        struct.pack('<4sI', identifiant, len(contenu)) + contenu + b'\x00' * (len(contenu) & 1)
+        for identifiant, contenu in blocs
+    )
+    return b'RIFF' + struct.pack('<I', len(corps)) + corps
+
+
+FMT_PCM = struct.pack('<HHIIHH', 1, 2, 48000, 192000, 4, 16)
+
+
+def test_entete_avec_bloc_intermediaire_impair():
+    contenu = riff((b'fmt ', FMT_PCM), (b'LIST', b'abc'), (b'data', b'\x00' * 8))
+    
+    assert CacheVocal._lire_entete(None, contenu) == (2, 48000, 2, len(contenu) - 8, 8)
+
+
+def test_entete_avec_taille_de_donnees_nulle():
+    contenu = riff((b'fmt ', FMT_PCM), (b'data', b'')) + b'\x00' * 6
+    
+    assert CacheVocal._lire_entete(None, contenu)[3:] == (len(contenu) - 6, 6)
+
+
+@pytest.mark.parametrize('contenu', [
+    b'',
+    b'FORM....AIFF',
+    riff((b'fmt ', struct.pack('<HHIIHH', 3, 1, 22050, 88200, 4, 32)), (b'data', b'\x00' * 4)),
+    riff((b'data', b'\x00' * 4)),
+])
+def test_entete_non_exploitable(contenu):
+    assert CacheVocal._lire_entete(None, contenu) is None
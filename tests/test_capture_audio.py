@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la capture découplée : tampon circulaire partagé entre le callback
+PyAudio et la boucle de reconnaissance.
+"""
+
+import threading
+import types
+
+import assistant_spotify as assistant
+from assistant_spotify import CaptureMicro, TamponCirculaire
+
+
+def test_lecture_dans_l_ordre_d_ecriture():
+    tampon = TamponCirculaire(16)
+    
+    tampon.ecrire(b"abcd")
+    tampon.ecrire(b"efgh")
+    
+    assert tampon.en_attente() == 4
+    assert tampon.lire(6, timeout=0) == b"abcdef"
+    assert tampon.lire(2, timeout=0) == b"gh"
+    assert tampon.trames_ecrites == 4
+    assert tampon.trames_perdues == 0
+
+
+def test_ecriture_a_cheval_sur_la_fin_du_tampon():
+    tampon = TamponCirculaire(8)
+    tampon.ecrire(b"abcdef")
+    assert tampon.lire(4, timeout=0) == b"abcd"
+    
+    tampon.ecrire(b"ghij")
+    
+    assert tampon.lire(6, timeout=0) == b"efghij"
+
+
+def test_debordement_ecrase_les_donnees_les_plus_anciennes():
+    tampon = TamponCirculaire(8)
+    tampon.ecrire(b"abcdef")
+    
+    tampon.ecrire(b"ghij")
+    
+    assert tampon.trames_perdues == 1
+    assert tampon.lire(8, timeout=0) == b"cdefghij"
+
+
+def test_bloc_plus_grand_que_le_tampon():
+    tampon = TamponCirculaire(4)
+    
+    tampon.ecrire(b"abcdefgh")
+    
+    assert tampon.lire(4, timeout=0) == b"efgh"
+    assert tampon.trames_perdues == 2
+    assert tampon.trames_ecrites == 4
+
+
+def test_capacite_arrondie_a_une_trame():
+    tampon = TamponCirculaire(7)
+    tampon.ecrire(b"abcdefgh")
+    
+    assert tampon.lire(8, timeout=0) == b""
+    assert tampon.lire(6, timeout=0) == b"cdefgh"
+
+
+def test_lecture_expire_sans_donnees_suffisantes():
+    tampon = TamponCirculaire(16)
+    tampon.ecrire(b"ab")
+    
+    assert tampon.lire(4, timeout=0.01) == b""
+    # Les données ne sont pas consommées par une lecture expirée
+    assert tampon.en_attente() == 1
+
+
+def test_fermeture_reveille_le_lecteur_et_rend_le_reliquat():
+    tampon = TamponCirculaire(16)
+    tampon.ecrire(b"ab")
+    lu = []
+    lecteur = threading.Thread(target=lambda: lu.append(tampon.lire(8)))
+    lecteur.start()
+    
+    tampon.fermer()
+    lecteur.join(timeout=1)
+    
+    assert lu == [b"ab"]
+    assert tampon.epuise
+
+
+def test_lecteur_reveille_par_l_ecriture():
+    tampon = TamponCirculaire(16)
+    lu = []
+    lecteur = threading.Thread(target=lambda: lu.append(tampon.lire(4, timeout=1)))
+    lecteur.start()
+    
+    tampon.ecrire(b"abcd")
+    lecteur.join(timeout=1)
+    
+    assert lu == [b"abcd"]
+
+
+def test_vider_ne_compte_pas_de_pertes():
+    tampon = TamponCirculaire(16)
+    tampon.ecrire(b"abcd")
+    
+    tampon.vider()
+    
+    assert tampon.en_attente() == 0
+    assert tampon.trames_perdues == 0
+
+
+def test_callback_copie_dans_le_tampon_et_compte_les_debordements(monkeypatch):
+    monkeypatch.setattr(assistant, 'pyaudio', types.SimpleNamespace(paInputOverflow=2, paContinue=0))
+    capture = CaptureMicro(sample_rate=16000, taille_bloc=4, duree_tampon=0.01)
+    
+    assert capture._callback(b"\x01\x00\x02\x00", 2, None, 0) == (None, 0)
+    capture._callback(b"\x03\x00", 1, None, 2)
+    
+    assert capture.lire(3, timeout=0) == b"\x01\x00\x02\x00\x03\x00"
+    assert capture.statistiques() == {
+        'trames_capturees': 3,
+        'trames_perdues': 0,
+        'trames_en_attente': 0,
+        'debordements_entree': 1,
+    }
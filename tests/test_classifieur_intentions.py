@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du classifieur d'intentions local : entraînement, sauvegarde et
+calibration du seuil de confiance en validation croisée.
+"""
+
+import math
+import zlib
+
+import numpy as np
+import pytest
+
+import assistant_spotify as assistant
+from classifieur_intentions import ClassifieurIntentions, calibrer_seuil, extraire_n_grammes, valider
+
+
+TEXTES = [
+    "mets en pause", "pause la musique", "arrete la musique", "coupe le son",
+    "passe au suivant", "chanson suivante", "morceau suivant", "la suivante",
+    "bonjour", "quel temps fait il", "merci beaucoup", "comment ca va",
+]
+ETIQUETTES = ['PAUSE'] * 4 + ['SUIVANT'] * 4 + ['IGNORE'] * 4
+
+
+def test_n_grammes_haches_avec_crc32():
+    # " ab " : bigrammes " a", "ab", "b " ; la case ne dépend pas de PYTHONHASHSEED
+    indices, occurrences = extraire_n_grammes("ab", (2,), 1024)
+    
+    attendus = sorted(zlib.crc32(n_gramme.encode('utf-8')) % 1024 for n_gramme in (" a", "ab", "b "))
+    assert indices.tolist() == attendus
+    assert occurrences.sum() == 3
+
+
+def test_entrainement_et_prediction():
+    classifieur = ClassifieurIntentions.entrainer(TEXTES, ETIQUETTES)
+    
+    intention, confiance = classifieur.predire("mets en pause")
+    assert intention == 'PAUSE'
+    assert 0.0 < confiance <= 1.0
+    assert classifieur.seuil is None
+
+
+def test_sauvegarde_conserve_le_seuil(tmp_path):
+    classifieur = ClassifieurIntentions.entrainer(TEXTES, ETIQUETTES)
+    
+    for seuil in (0.8, math.inf, None):
+        classifieur.seuil = seuil
+        classifieur.sauvegarder(tmp_path / "modele.npz")
+        recharge = ClassifieurIntentions.charger(tmp_path / "modele.npz")
+        assert recharge.seuil == seuil
+        assert recharge.classes == classifieur.classes
+        assert recharge.predire("passe au suivant") == pytest.approx(classifieur.predire("passe au suivant"))
+
+
+def test_modele_sans_seuil_reste_lisible(tmp_path):
+    classifieur = ClassifieurIntentions.entrainer(TEXTES, ETIQUETTES)
+    np.savez(
+        tmp_path / "ancien.npz",
+        classes=np.array(classifieur.classes),
+        log_prior=classifieur.log_prior,
+        log_vraisemblance=classifieur.log_vraisemblance,
+        tailles=np.array(classifieur.tailles),
+    )
+    
+    assert ClassifieurIntentions.charger(tmp_path / "ancien.npz").seuil is None
+
+
+def test_validation_predit_chaque_exemple_hors_entrainement():
+    predictions = valider(TEXTES, ETIQUETTES, plis=4)
+    
+    assert sorted(attendue for attendue, _, _ in predictions) == sorted(ETIQUETTES)
+    assert all(0.0 < confiance <= 1.0 for _, _, confiance in predictions)
+
+
+@pytest.mark.parametrize('predictions, seuil', [
+    # Toutes justes : le seuil descend jusqu'à la plus faible confiance
+    ([('A', 'A', 0.9), ('B', 'B', 0.6), ('A', 'A', 0.3)], 0.3),
+    # Une erreur à 0.5 : au-dessous, la précision tombe à 2/3
+    ([('A', 'A', 0.9), ('B', 'B', 0.8), ('A', 'B', 0.5)], 0.8),
+    # Confiances égales : retenues ou écartées ensemble
+    ([('A', 'A', 0.9), ('A', 'B', 0.9), ('B', 'B', 0.4)], math.inf),
+    # La plus confiante est fausse : aucun seuil n'atteint 95 %
+    ([('A', 'B', 0.9), ('B', 'B', 0.8)], math.inf),
+    ([], math.inf),
+])
+def test_calibration_du_seuil(predictions, seuil):
+    assert calibrer_seuil(predictions, 0.95) == seuil
+
+
+class ClassifieurFactice:
+    """Classifieur qui répond toujours la même intention avec la même confiance."""
+    
+    classes = ['PAUSE', 'IGNORE']
+    
+    def __init__(self, confiance, seuil):
+        self.confiance = confiance
+        self.seuil = seuil
+    
+    def predire(self, texte):
+        return 'PAUSE', self.confiance
+
+
+@pytest.mark.parametrize('confiance, seuil, decide', [
+    (0.7, 0.6, True),
+    (0.7, 0.8, False),
+    (1.0, math.inf, False),
+    # Modèle non calibré : CLASSIFIEUR_SEUIL (0.9)
+    (0.85, None, False),
+    (0.95, None, True),
+])
+def test_analyse_utilise_le_seuil_du_modele(monkeypatch, confiance, seuil, decide):
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR', ClassifieurFactice(confiance, seuil))
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR_SEUIL', 0.9)
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', assistant.CacheIntentions(fichier=None))
+    
+    resultat = assistant.analyser_commande("chut un instant", utiliser_ollama=False)
+    
+    assert resultat == (('PAUSE', {}) if decide else ('IGNORE', {}))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du client Ollama : connexions réutilisées, keep_alive et préchauffage.
+"""
+
+import assistant_spotify as assistant
+from assistant_spotify import ClientOllama
+
+
+def test_lister_modeles(ollama_local):
+    client = ClientOllama(ollama_local.url + '/')
+    
+    assert client.lister_modeles() == ['mistral:latest']
+    assert ollama_local.requetes == [('/api/tags', None)]
+
+
+def test_generer_ajoute_keep_alive_sans_modifier_la_requete(ollama_local):
+    client = ClientOllama(ollama_local.url, keep_alive='5m')
+    payload = {'model': 'mistral', 'prompt': 'bonjour', 'stream': False}
+    
+    assert client.generer(payload, timeout=5)['response'] == '{"intention": "IGNORE"}'
+    assert ollama_local.requetes[0][1]['keep_alive'] == '5m'
+    assert 'keep_alive' not in payload
+    
+    client.generer(dict(payload, keep_alive='-1'), timeout=5)
+    assert ollama_local.requetes[1][1]['keep_alive'] == '-1'
+
+
+def test_connexion_reutilisee_d_une_requete_a_l_autre(ollama_local):
+    client = ClientOllama(ollama_local.url)
+    
+    client.lister_modeles()
+    for _ in range(3):
+        client.generer({'model': 'mistral', 'prompt': 'bonjour', 'stream': False}, timeout=5)
+    
+    assert len(set(ollama_local.ports_clients)) == 1
+
+
+def test_session_creee_une_seule_fois():
+    client = ClientOllama()
+    
+    assert client.session is client.session
+
+
+def test_prechauffage_charge_le_modele_avec_les_options_de_classification(ollama_local):
+    client = ClientOllama(ollama_local.url)
+    
+    client.prechauffer('mistral:latest').join(timeout=5)
+    
+    chemin, requete = ollama_local.requetes[0]
+    assert chemin == '/api/generate'
+    assert requete['model'] == 'mistral:latest'
+    assert requete['prompt'] == ''
+    assert requete['stream'] is False
+    assert requete['options'] == assistant.OPTIONS_OLLAMA
+
+
+def test_prechauffage_avec_la_requete_de_classification(ollama_local):
+    client = ClientOllama(ollama_local.url)
+    payload = {'model': 'mistral:latest', 'system': 'consignes', 'prompt': 'bonjour', 'stream': True}
+    
+    client.prechauffer('mistral:latest', payload).join(timeout=5)
+    
+    requete = ollama_local.requetes[0][1]
+    assert requete['system'] == 'consignes'
+    assert requete['stream'] is False
+    assert payload['stream'] is True
+
+
+def test_prechauffage_sans_ollama_ne_leve_pas(capsys):
+    client = ClientOllama('http://127.0.0.1:9')
+    
+    client.prechauffer('mistral:latest').join(timeout=5)
+    
+    assert 'Préchauffage' in capsys.readouterr().out
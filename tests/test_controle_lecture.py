@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du pilotage de la lecture : routage des intentions vers le backend
+et validation anticipée des commandes sur les résultats partiels de Vosk.
+"""
+
+import json
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+from controle_lecture import ControleFactice, ControleIndisponible, ControleLecture, creer_controle
+
+
+@pytest.fixture
+def controle(monkeypatch):
+    """Lecteur factice installé comme backend de pilotage."""
+    controle = ControleFactice()
+    monkeypatch.setattr(assistant, 'CONTROLEUR_LECTURE', controle)
+    return controle
+
+
+def test_backend_incomplet_refuse_a_la_creation():
+    class SansVolume(ControleLecture):
+        def lecture(self):
+            pass
+        
+        def pause(self):
+            pass
+        
+        def suivant(self):
+            pass
+        
+        def precedent(self):
+            pass
+    
+    with pytest.raises(TypeError):
+        SansVolume()
+
+
+def test_creer_controle():
+    assert isinstance(creer_controle('factice'), ControleFactice)
+    with pytest.raises(ControleIndisponible):
+        creer_controle('inconnu')
+
+
+def test_lecteur_indisponible_relance_spotify(monkeypatch):
+    lancements = []
+    monkeypatch.setattr(assistant, 'CONTROLEUR_LECTURE', ControleFactice(disponible=False))
+    monkeypatch.setattr(assistant, 'lancer_spotify', lambda engine: lancements.append(engine))
+    
+    assistant.executer_action('LECTURE', None)
+    
+    assert lancements == [None]
+
+
+@pytest.mark.parametrize('intention, commande', [
+    ('LECTURE', 'lecture'),
+    ('PAUSE', 'pause'),
+    ('SUIVANT', 'suivant'),
+    ('PRECEDENT', 'precedent'),
+    ('VOLUME_PLUS', 'volume'),
+    ('VOLUME_MOINS', 'volume'),
+])
+def test_intention_routee_vers_le_backend(controle, intention, commande):
+    assistant.executer_action(intention, None)
+    
+    assert controle.commandes == [commande]
+
+
+def test_volume_change_dans_le_bon_sens(controle):
+    assistant.executer_action('VOLUME_PLUS', None)
+    assert controle.volume == pytest.approx(0.5 + assistant.PAS_VOLUME)
+    
+    assistant.executer_action('VOLUME_MOINS', None)
+    assistant.executer_action('VOLUME_MOINS', None)
+    assert controle.volume == pytest.approx(0.5 - assistant.PAS_VOLUME)
+
+
+def test_lecture_avec_parametres_ouvre_une_recherche(controle):
+    assistant.executer_action('LECTURE', None, {'artiste': 'daft punk'})
+    
+    assert controle.commandes == ['ouvrir']
+    assert controle.uri == assistant.URI_RECHERCHE.format(requete='daft%20punk')
+
+
+@pytest.mark.parametrize('texte, intention', [
+    ('spotify en pause', 'PAUSE'),
+    ('mets en pause', 'PAUSE'),
+    ('passe au suivant', 'SUIVANT'),
+    ('reviens au morceau précédent', 'PRECEDENT'),
+    ('monte le son', 'VOLUME_PLUS'),
+    ('baisse le volume', 'VOLUME_MOINS'),
+    ('lance spotify', 'ACTION_SPOTIFY'),
+])
+def test_mots_cles(texte, intention):
+    assert assistant.analyser_intention_mots_cles(texte) == intention
+
+
+@pytest.mark.parametrize('texte', [
+    "on fait une pause déjeuner",
+    "le jour suivant il pleuvait",
+    "un succès sans précédent",
+    "c'est plus fort que moi",
+    "parle moins fort",
+])
+def test_conversation_ordinaire_ignoree(texte):
+    assert assistant.CORRESPONDANCE_MOTS_CLES.analyser(texte) is None
+    assert assistant.CORRESPONDANCE_MOTS_CLES.analyser_partiel(texte) is None
+
+
+class ReconnaisseurScripte:
+    """
+    Reconnaisseur Vosk simulé : chaque bloc audio fait avancer d'un résultat
+    partiel, la finalisation renvoie la dernière phrase.
+    """
+    
+    def __init__(self, model, sample_rate, grammaire=None):
+        self.partiels = list(model.partiels)
+        self.dernier = ''
+    
+    def SetWords(self, actif):
+        pass
+    
+    def Reset(self):
+        self.dernier = ''
+    
+    def AcceptWaveform(self, data):
+        self.dernier = self.partiels.pop(0)
+        return False
+    
+    def PartialResult(self):
+        return json.dumps({'partial': self.dernier})
+    
+    def FinalResult(self):
+        return json.dumps({'text': self.dernier})
+
+
+class ModeleScripte:
+    """Modèle Vosk simulé qui connaît tous les mots."""
+    
+    def __init__(self, partiels):
+        self.partiels = partiels
+    
+    def vosk_model_find_word(self, mot):
+        return 0
+
+
+def decoder(monkeypatch, partiels):
+    monkeypatch.setattr(assistant, 'vosk', types.SimpleNamespace(KaldiRecognizer=ReconnaisseurScripte))
+    session = assistant.SessionReconnaissance(ModeleScripte(partiels), vad=False, validation_anticipee=True,
+                                              taille_lot=0)
+    evenements = []
+    for _ in partiels:
+        evenements += session.traiter(b'\x00\x00')
+    return evenements + session.terminer()
+
+
+def test_spotify_en_pause_n_est_pas_anticipe_comme_lancement(monkeypatch, controle):
+    evenements = decoder(monkeypatch, ['spotify', 'spotify', 'spotify', 'spotify en', 'spotify en pause',
+                                       'spotify en pause'])
+    
+    assert evenements == [('spotify en pause', 'PAUSE')]
+    
+    assistant.executer_action(evenements[0][1], None)
+    assert controle.commandes == ['pause']
+
+
+def test_commande_complete_anticipee(monkeypatch):
+    evenements = decoder(monkeypatch, ['lance', 'lance spotify', 'lance spotify'])
+    
+    assert evenements == [('lance spotify', 'ACTION_SPOTIFY')]
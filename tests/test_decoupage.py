@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du découpage de l'audio : lectures de capture regroupées en lots
+avant chaque appel au décodeur Vosk.
+"""
+
+import json
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+from benchmark_assistant import lire_decoupages
+
+
+class ReconnaisseurEnregistreur:
+    """Reconnaisseur Vosk simulé qui note les blocs reçus et les finalisations."""
+    
+    def __init__(self, model, sample_rate, grammaire=None):
+        self.appels = model.appels
+    
+    def SetWords(self, actif):
+        pass
+    
+    def Reset(self):
+        self.appels.append('reset')
+    
+    def AcceptWaveform(self, data):
+        self.appels.append(bytes(data))
+        return False
+    
+    def PartialResult(self):
+        return json.dumps({'partial': ''})
+    
+    def FinalResult(self):
+        self.appels.append('final')
+        return json.dumps({'text': ''})
+
+
+class VadFactice:
+    """VAD simulé : laisse tout passer et signale une fin de segment à la demande."""
+    
+    def __init__(self):
+        self.fin_segment = False
+    
+    def filtrer(self, data):
+        return [data], self.fin_segment
+    
+    def reinitialiser(self):
+        pass
+
+
+def ouvrir_session(monkeypatch, taille_lot):
+    monkeypatch.setattr(assistant, 'vosk', types.SimpleNamespace(KaldiRecognizer=ReconnaisseurEnregistreur))
+    modele = types.SimpleNamespace(appels=[], vosk_model_find_word=lambda mot: 0)
+    return assistant.SessionReconnaissance(modele, grammaire=False, vad=False, validation_anticipee=False,
+                                           taille_lot=taille_lot), modele.appels
+
+
+def test_lectures_regroupees_en_lots(monkeypatch):
+    session, appels = ouvrir_session(monkeypatch, taille_lot=3)
+    
+    for trame in (b'a0', b'b0', b'c0', b'd0', b'e0', b'f0', b'g0'):
+        session.traiter(trame)
+    
+    assert appels == [b'a0b0c0', b'd0e0f0']
+
+
+def test_lot_depasse_par_une_lecture_plus_grande(monkeypatch):
+    session, appels = ouvrir_session(monkeypatch, taille_lot=2)
+    
+    session.traiter(b'a0')
+    session.traiter(b'b0c0d0')
+    
+    assert appels == [b'a0b0c0d0']
+
+
+def test_sans_lot_chaque_lecture_est_decodee(monkeypatch):
+    session, appels = ouvrir_session(monkeypatch, taille_lot=0)
+    
+    session.traiter(b'a0')
+    session.traiter(b'b0c0')
+    
+    assert appels == [b'a0', b'b0c0']
+
+
+def test_lot_entame_decode_avant_la_finalisation(monkeypatch):
+    session, appels = ouvrir_session(monkeypatch, taille_lot=10)
+    session.traiter(b'a0b0')
+    
+    session.terminer()
+    
+    assert appels == [b'a0b0', 'final']
+
+
+def test_lot_entame_decode_a_la_fin_du_segment(monkeypatch):
+    session, appels = ouvrir_session(monkeypatch, taille_lot=10)
+    session.vad = VadFactice()
+    session.traiter(b'a0')
+    
+    session.vad.fin_segment = True
+    session.traiter(b'b0')
+    
+    assert appels == [b'a0b0', 'final']
+
+
+def test_reinitialisation_abandonne_le_lot(monkeypatch):
+    session, appels = ouvrir_session(monkeypatch, taille_lot=10)
+    session.traiter(b'a0b0')
+    
+    session.reinitialiser()
+    session.terminer()
+    
+    assert appels == ['reset', 'final']
+
+
+@pytest.mark.parametrize('texte, decoupages', [
+    ("4000:4000,800:3200", [(4000, 4000), (800, 3200)]),
+    ("800, 1600:", [(800, 800), (1600, 1600)]),
+    ("400:0,", [(400, 0)]),
+])
+def test_lire_decoupages(texte, decoupages):
+    assert lire_decoupages(texte) == decoupages
+
+
+def test_lire_decoupages_invalide():
+    with pytest.raises(ValueError):
+        lire_decoupages("800:lot")
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du démarrage : import différé des dépendances lourdes et chargements
+menés en parallèle.
+"""
+
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import ModuleDiffere, modules_manquants
+from metriques import RegistreMetriques
+
+
+def test_module_importe_au_premier_acces(monkeypatch):
+    module = types.ModuleType('module_differe_test')
+    module.valeur = 42
+    imports = []
+    
+    def importer(nom):
+        imports.append(nom)
+        return module
+    
+    monkeypatch.setattr(assistant.importlib, 'import_module', importer)
+    differe = ModuleDiffere('module_differe_test')
+    assert imports == []
+    
+    assert differe.valeur == 42
+    assert differe.valeur == 42
+    assert imports == ['module_differe_test']
+
+
+def test_import_unique_depuis_plusieurs_threads(monkeypatch):
+    imports = []
+    
+    def importer(nom):
+        imports.append(nom)
+        time.sleep(0.05)
+        return sys
+    
+    monkeypatch.setattr(assistant.importlib, 'import_module', importer)
+    differe = ModuleDiffere('sys')
+    threads = [threading.Thread(target=lambda: differe.platform) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert imports == ['sys']
+
+
+def test_modules_manquants():
+    assert modules_manquants(('json', 'module_introuvable_pour_le_test')) == ['module_introuvable_pour_le_test']
+
+
+def test_arret_avant_le_demarrage_si_un_module_manque(monkeypatch, capsys):
+    monkeypatch.setattr(assistant, 'modules_manquants', lambda: ['vosk', 'pyaudio'])
+    monkeypatch.setattr(assistant, 'TravailleurVocal', lambda **options: pytest.fail("démarrage lancé"))
+    
+    with pytest.raises(SystemExit) as erreur:
+        assistant.main_loop()
+    
+    assert erreur.value.code == 1
+    assert 'vosk, pyaudio' in capsys.readouterr().out
+
+
+def test_chargements_menes_en_parallele(monkeypatch):
+    DUREE = 0.2
+    appels = []
+    
+    def chargement(nom, resultat=True):
+        def charger(*args, **kwargs):
+            appels.append(nom)
+            time.sleep(DUREE)
+            return resultat
+        return charger
+    
+    class VoixIndisponible:
+        def __init__(self, **options):
+            pass
+        
+        # Voix impossible à initialiser : main_loop s'arrête juste après le démarrage
+        demarrer = staticmethod(chargement('voix', False))
+    
+    monkeypatch.setattr(assistant, 'modules_manquants', lambda: [])
+    monkeypatch.setattr(assistant, 'METRIQUES', RegistreMetriques())
+    monkeypatch.setattr(assistant, 'METRIQUES_FICHIER', None)
+    monkeypatch.setattr(assistant, 'METRIQUES_PORT', None)
+    monkeypatch.setattr(assistant, 'CACHE_VOCAL_DOSSIER', None)
+    monkeypatch.setattr(assistant, 'TravailleurVocal', VoixIndisponible)
+    for nom in ('charger_modele_vosk', 'verifier_ollama', 'charger_classifieur', 'charger_index_exemples',
+                'ouvrir_controle_lecture'):
+        monkeypatch.setattr(assistant, nom, chargement(nom))
+    
+    debut = time.perf_counter()
+    with pytest.raises(SystemExit):
+        assistant.main_loop()
+    
+    assert sorted(appels) == sorted(['voix', 'charger_modele_vosk', 'verifier_ollama', 'charger_classifieur',
+                                     'charger_index_exemples', 'ouvrir_controle_lecture'])
+    # Six chargements de 0,2 s : bien moins que 1,2 s en série
+    assert time.perf_counter() - debut < 3 * DUREE
+    assert assistant.METRIQUES.resume()['demarrage']['nombre'] == 1
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la porte de détection d'activité vocale placée devant Vosk.
+"""
+
+import numpy as np
+import pytest
+
+from assistant_spotify import DetecteurActiviteVocale
+
+
+def bloc(amplitude, trames=10):
+    """Bloc PCM int16 d'amplitude constante."""
+    return np.full(trames, amplitude, dtype=np.int16).tobytes()
+
+
+@pytest.fixture
+def vad():
+    # À 1000 Hz, une milliseconde vaut une trame : pré-roll de 2 blocs, maintien de 2 blocs
+    return DetecteurActiviteVocale(seuil_rms=100, preroll_ms=20, hangover_ms=20, sample_rate=1000)
+
+
+def test_energie_rms():
+    assert DetecteurActiviteVocale.energie_rms(bloc(300)) == pytest.approx(300)
+    assert DetecteurActiviteVocale.energie_rms(np.array([3, -4], dtype=np.int16).tobytes()) == pytest.approx(12.5 ** 0.5)
+    assert DetecteurActiviteVocale.energie_rms(b"") == 0.0
+
+
+def test_silence_non_transmis(vad):
+    assert vad.filtrer(bloc(10)) == ([], False)
+    assert not vad.en_parole
+    assert vad.proportion_ignoree == 1.0
+
+
+def test_debut_de_parole_restitue_le_preroll(vad):
+    silences = [bloc(i) for i in (1, 2, 3)]
+    for silence in silences:
+        vad.filtrer(silence)
+    
+    blocs, fin = vad.filtrer(bloc(500))
+    
+    # Seuls les deux derniers blocs de silence tiennent dans le pré-roll
+    assert blocs == [silences[1], silences[2], bloc(500)]
+    assert not fin
+    assert vad.en_parole
+    assert vad.trames_ignorees == 10
+
+
+def test_maintien_puis_fin_de_parole(vad):
+    vad.filtrer(bloc(500))
+    
+    assert vad.filtrer(bloc(0)) == ([bloc(0)], False)
+    assert vad.filtrer(bloc(0)) == ([bloc(0)], True)
+    assert not vad.en_parole
+    assert vad.filtrer(bloc(0)) == ([], False)
+
+
+def test_parole_relance_le_maintien(vad):
+    vad.filtrer(bloc(500))
+    vad.filtrer(bloc(0))
+    vad.filtrer(bloc(500))
+    
+    assert vad.filtrer(bloc(0)) == ([bloc(0)], False)
+    assert vad.filtrer(bloc(0)) == ([bloc(0)], True)
+
+
+def test_reinitialiser_oublie_le_preroll(vad):
+    vad.filtrer(bloc(10))
+    vad.filtrer(bloc(500))
+    
+    vad.reinitialiser()
+    
+    assert not vad.en_parole
+    assert vad.filtrer(bloc(500)) == ([bloc(500)], False)
+
+
+def test_statistiques(vad):
+    vad.filtrer(bloc(10))
+    vad.filtrer(bloc(10))
+    vad.filtrer(bloc(10))
+    vad.filtrer(bloc(10))
+    
+    assert vad.statistiques() == {'trames_total': 40, 'trames_ignorees': 40, 'proportion_ignoree': 1.0}
+    
+    vad.filtrer(bloc(500))
+    
+    # Le pré-roll restitué (2 blocs) n'est plus compté comme ignoré
+    assert vad.statistiques() == {'trames_total': 50, 'trames_ignorees': 20, 'proportion_ignoree': 0.4}
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du disjoncteur Ollama : ouverture sur échecs, requête de sonde
+semi-ouverte et délai adaptatif.
+"""
+
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import DisjoncteurOllama
+
+
+def test_ouvert_apres_des_echecs_consecutifs():
+    disjoncteur = DisjoncteurOllama(echecs_max=3, pause=60)
+    
+    for _ in range(2):
+        assert disjoncteur.autoriser()
+        disjoncteur.echec()
+    assert disjoncteur.etat == DisjoncteurOllama.FERME
+    
+    disjoncteur.echec()
+    
+    assert disjoncteur.etat == DisjoncteurOllama.OUVERT
+    assert not disjoncteur.autoriser()
+    assert (disjoncteur.ouvertures, disjoncteur.refus) == (1, 1)
+
+
+def test_succes_remet_les_echecs_consecutifs_a_zero():
+    disjoncteur = DisjoncteurOllama(echecs_max=2, fenetre=20)
+    
+    for _ in range(5):
+        disjoncteur.echec()
+        disjoncteur.succes(0.1)
+    
+    assert disjoncteur.etat == DisjoncteurOllama.FERME
+
+
+def test_ouvert_sur_le_taux_d_echec_une_fois_la_fenetre_pleine():
+    disjoncteur = DisjoncteurOllama(echecs_max=10, taux_echec_max=0.5, fenetre=4, pause=60)
+    
+    disjoncteur.echec()
+    disjoncteur.succes(0.1)
+    disjoncteur.echec()
+    # 2 échecs sur 3 : fenêtre incomplète, pas encore de verdict
+    assert disjoncteur.etat == DisjoncteurOllama.FERME
+    
+    disjoncteur.succes(0.1)
+    
+    assert disjoncteur.etat == DisjoncteurOllama.FERME
+    disjoncteur.echec()
+    assert disjoncteur.etat == DisjoncteurOllama.OUVERT
+
+
+def ouvrir(pause):
+    disjoncteur = DisjoncteurOllama(echecs_max=1, pause=pause)
+    disjoncteur.echec()
+    return disjoncteur
+
+
+def test_une_seule_sonde_apres_la_pause():
+    disjoncteur = ouvrir(pause=0)
+    
+    assert disjoncteur.autoriser()
+    assert disjoncteur.etat == DisjoncteurOllama.SEMI_OUVERT
+    assert not disjoncteur.autoriser()
+    
+    disjoncteur.succes(0.1)
+    
+    assert disjoncteur.etat == DisjoncteurOllama.FERME
+    assert disjoncteur.autoriser() and disjoncteur.autoriser()
+
+
+def test_echec_de_la_sonde_rouvre():
+    disjoncteur = ouvrir(pause=0)
+    assert disjoncteur.autoriser()
+    
+    disjoncteur.pause = 60
+    disjoncteur.echec()
+    
+    assert disjoncteur.etat == DisjoncteurOllama.OUVERT
+    assert disjoncteur.ouvertures == 2
+    assert not disjoncteur.autoriser()
+
+
+def test_sonde_abandonnee_libere_la_place():
+    disjoncteur = ouvrir(pause=0)
+    assert disjoncteur.autoriser()
+    
+    disjoncteur.abandon()
+    
+    assert disjoncteur.etat == DisjoncteurOllama.SEMI_OUVERT
+    assert disjoncteur.autoriser()
+
+
+def test_pause_non_ecoulee():
+    disjoncteur = ouvrir(pause=60)
+    
+    assert not disjoncteur.autoriser()
+    assert disjoncteur.statistiques()['etat'] == DisjoncteurOllama.OUVERT
+
+
+@pytest.mark.parametrize('latences, timeout', [
+    ([0.5] * 4, 15.0),           # Trop peu de mesures : délai maximal
+    ([0.1] * 5, 2.0),            # Borné par le minimum
+    ([1.0] * 19 + [4.0], 3.0),   # 95e percentile : la mesure isolée la plus lente est écartée
+    ([10.0] * 5, 15.0),          # Borné par le maximum
+])
+def test_delai_adaptatif(latences, timeout):
+    disjoncteur = DisjoncteurOllama(timeout_max=15.0, timeout_min=2.0, facteur=3.0, percentile=95, fenetre=20)
+    
+    for latence in latences:
+        disjoncteur.succes(latence)
+    
+    assert disjoncteur.timeout() == pytest.approx(timeout)
+
+
+class OllamaEnPanne:
+    def __init__(self):
+        self.requetes = 0
+    
+    def generer(self, payload, timeout):
+        self.requetes += 1
+        raise assistant.requests.exceptions.Timeout("délai dépassé")
+
+
+def test_analyse_synchrone_passe_au_repli_local(monkeypatch):
+    client = OllamaEnPanne()
+    monkeypatch.setattr(assistant, 'CLIENT_OLLAMA', client)
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR', None)
+    monkeypatch.setattr(assistant, 'INDEX_EXEMPLES', None)
+    monkeypatch.setattr(assistant, 'OLLAMA_STREAMING', False)
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', assistant.CacheIntentions(fichier=None))
+    monkeypatch.setattr(assistant, 'DISJONCTEUR_OLLAMA', DisjoncteurOllama(echecs_max=2, pause=60))
+    
+    for _ in range(4):
+        assert assistant.analyser_commande("il fait beau dehors") == ('IGNORE', {})
+    
+    # Deux timeouts ouvrent le disjoncteur : les analyses suivantes n'attendent plus Ollama
+    assert client.requetes == 2
+    assert assistant.DISJONCTEUR_OLLAMA.refus == 2
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de l'évaluation hors ligne sur fichiers WAV : étiquettes, WER,
+percentiles, synthèse et décodage d'un fichier.
+"""
+
+import json
+import types
+import wave
+
+import pytest
+
+import assistant_spotify as assistant
+import evaluer_wav
+from evaluer_wav import afficher_rapport, lire_etiquettes, percentile, taux_erreur_mots
+
+
+def test_lire_etiquettes(tmp_path):
+    chemin = tmp_path / "etiquettes.tsv"
+    chemin.write_text(
+        "# fichier\tintention\ttranscription\n"
+        "a.wav\tACTION_SPOTIFY\tlance spotify\n"
+        "b.wav\tIGNORE\n"
+        "\n"
+        "c.wav\t\tquelle heure est il\n",
+        encoding='utf-8',
+    )
+    
+    assert lire_etiquettes(chemin) == {
+        'a.wav': ('ACTION_SPOTIFY', 'lance spotify'),
+        'b.wav': ('IGNORE', None),
+        'c.wav': (None, 'quelle heure est il'),
+    }
+
+
+@pytest.mark.parametrize('reference, hypothese, taux', [
+    ("lance spotify", "Lance Spotify !", 0.0),
+    ("lance spotify", "lance", 0.5),
+    ("mets en pause", "mets la pause", 1 / 3),
+    ("lance spotify", "lance donc spotify", 0.5),
+    ("", "", 0.0),
+    ("", "bonjour", 1.0),
+])
+def test_taux_erreur_mots(reference, hypothese, taux):
+    assert taux_erreur_mots(reference, hypothese) == pytest.approx(taux)
+
+
+@pytest.mark.parametrize('rang, valeur', [(0, 1), (50, 5), (95, 10), (100, 10)])
+def test_percentile(rang, valeur):
+    assert percentile(list(range(10, 0, -1)), rang) == valeur
+
+
+def test_percentile_sans_mesure():
+    assert percentile([], 95) == 0.0
+
+
+def test_synthese_du_rapport(capsys):
+    resultats = [
+        {'fichier': 'a.wav', 'transcription': 'lance spotify', 'intention': 'ACTION_SPOTIFY',
+         'facteur_temps_reel': 0.1, 'latence_intention_ms': 2.0},
+        {'fichier': 'b.wav', 'transcription': 'bonjour', 'intention': 'IGNORE',
+         'facteur_temps_reel': 0.3, 'latence_intention_ms': 40.0},
+        {'fichier': 'c.wav', 'erreur': 'format non supporté'},
+    ]
+    etiquettes = {'a.wav': ('ACTION_SPOTIFY', 'lance spotify'), 'b.wav': ('PAUSE', 'mets en pause')}
+    
+    synthese = afficher_rapport(resultats, etiquettes)
+    
+    assert synthese == {
+        'fichiers': 3,
+        'erreurs': 1,
+        'exactitude_intention': 0.5,
+        'wer_moyen': 0.5,
+        'rtf_moyen': pytest.approx(0.2),
+        'rtf_p95': 0.3,
+        'latence_intention_p50_ms': 2.0,
+        'latence_intention_p95_ms': 40.0,
+    }
+    assert resultats[1]['wer'] == 1.0
+    assert '1/2' in capsys.readouterr().out
+
+
+class ReconnaisseurTexte:
+    """Reconnaisseur Vosk simulé qui transcrit tout audio par la même phrase."""
+    
+    def __init__(self, model, sample_rate, grammaire=None):
+        self.texte = model.texte
+        self.audio = False
+    
+    def SetWords(self, actif):
+        pass
+    
+    def AcceptWaveform(self, data):
+        self.audio = True
+        return False
+    
+    def PartialResult(self):
+        return json.dumps({'partial': ''})
+    
+    def FinalResult(self):
+        texte, self.audio = (self.texte if self.audio else ''), False
+        return json.dumps({'text': texte})
+
+
+def ecrire_wav(chemin, duree):
+    with wave.open(str(chemin), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(assistant.SAMPLE_RATE)
+        wav.writeframes(b'\x10\x00' * int(duree * assistant.SAMPLE_RATE))
+
+
+@pytest.fixture
+def processus(monkeypatch):
+    """Processus d'évaluation initialisé sans Vosk ni Ollama."""
+    monkeypatch.setattr(assistant, 'vosk', types.SimpleNamespace(KaldiRecognizer=ReconnaisseurTexte))
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR', None)
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', assistant.CacheIntentions(fichier=None))
+    monkeypatch.setattr(evaluer_wav, '_MODELE', types.SimpleNamespace(texte='lance spotify'))
+    monkeypatch.setattr(evaluer_wav, '_OPTIONS', {'grammaire': False, 'vad': False, 'validation_anticipee': False,
+                                                  'ollama': False})
+
+
+def test_evaluer_fichier(tmp_path, processus):
+    ecrire_wav(tmp_path / "a.wav", 0.5)
+    
+    resultat = evaluer_wav.evaluer_fichier(str(tmp_path / "a.wav"))
+    
+    assert resultat['fichier'] == 'a.wav'
+    assert resultat['transcription'] == 'lance spotify'
+    assert resultat['intention'] == 'ACTION_SPOTIFY'
+    assert resultat['duree_audio'] == pytest.approx(0.5)
+    assert resultat['facteur_temps_reel'] > 0
+
+
+def test_fichier_illisible(tmp_path, processus):
+    (tmp_path / "c.wav").write_bytes(b"pas un wav")
+    
+    assert 'erreur' in evaluer_wav.evaluer_fichier(str(tmp_path / "c.wav"))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la classification en flux : lecture de la réponse NDJSON d'Ollama
+et arrêt dès que le début de la réponse suffit à trancher.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import ClientOllama
+
+
+@pytest.mark.parametrize('reponse, attendu', [
+    ('{"intention": "ACTION_SPOTIFY"', ('ACTION_SPOTIFY', {})),
+    ('{"intention": "ACTION_SPOT', None),
+    ('{"intention": "pause"', ('PAUSE', {})),
+    ('{"intention" :"SUIVANT", "artiste', ('SUIVANT', {})),
+    ('{"intention": "INCONNUE"', None),
+    # LECTURE attend ses paramètres : il faut lire l'objet jusqu'au bout
+    ('{"intention": "LECTURE"', None),
+])
+def test_intention_depuis_prefixe(reponse, attendu):
+    assert assistant.intention_depuis_prefixe(reponse) == attendu
+
+
+@pytest.mark.parametrize('reponse, attendu', [
+    ('{"intention": "LECTURE", "artiste": "daft punk"}', ('LECTURE', {'artiste': 'daft punk'})),
+    ('{"intention": "volume_plus"}', ('VOLUME_PLUS', {})),
+    ('{"intention": "INCONNUE"}', ('IGNORE', {})),
+    # Réponse tronquée ou sans sortie contrainte : chercher un code dans le texte
+    ('Intention : PAUSE', ('PAUSE', {})),
+    ('je ne sais pas', ('IGNORE', {})),
+])
+def test_interpreter_reponse_complete(reponse, attendu):
+    assert assistant.interpreter_reponse_ollama(reponse) == attendu
+
+
+@pytest.fixture
+def client(ollama_local, monkeypatch):
+    client = ClientOllama(ollama_local.url)
+    monkeypatch.setattr(assistant, 'CLIENT_OLLAMA', client)
+    return client
+
+
+def test_flux_reassemble_les_fragments(ollama_local, client):
+    ollama_local.fragments = ['{"intention": "', 'LEC', 'TURE", "artiste": "', 'daft punk"}']
+    
+    assert list(client.generer_flux({'model': 'mistral', 'prompt': 'x'}, timeout=5)) == ollama_local.fragments + ['']
+    assert assistant.classifier_flux({'model': 'mistral', 'prompt': 'x'}, timeout=5) == \
+        ('LECTURE', {'artiste': 'daft punk'})
+    assert ollama_local.requetes[0][1]['stream'] is True
+
+
+def test_flux_interrompu_des_que_l_intention_est_connue(ollama_local, client):
+    ollama_local.fragments = ['{"intention": "', 'PA', 'USE"']
+    ollama_local.suspendre = True
+    
+    debut = time.monotonic()
+    assert assistant.classifier_flux({'model': 'mistral', 'prompt': 'x'}, timeout=10) == ('PAUSE', {})
+    
+    assert time.monotonic() - debut < 2
+    assert ollama_local.deconnexions.wait(timeout=2)
+
+
+def test_flux_asynchrone_interrompu_des_que_l_intention_est_connue(ollama_local, client):
+    ollama_local.fragments = ['{"intention": "', 'SUIV', 'ANT"']
+    ollama_local.suspendre = True
+    
+    debut = time.monotonic()
+    resultat = asyncio.run(assistant.classifier_flux_async({'model': 'mistral', 'prompt': 'x'}, timeout=10))
+    
+    assert resultat == ('SUIVANT', {})
+    assert time.monotonic() - debut < 2
+    assert ollama_local.deconnexions.wait(timeout=2)
+
+
+def test_flux_asynchrone_lit_les_parametres(ollama_local, client):
+    ollama_local.fragments = ['{"intention": "LECTURE", ', '"playlist": "chill"}']
+    
+    resultat = asyncio.run(assistant.classifier_flux_async({'model': 'mistral', 'prompt': 'x'}, timeout=5))
+    
+    assert resultat == ('LECTURE', {'playlist': 'chill'})
+
+
+def test_erreur_signalee_dans_le_flux(ollama_local, client):
+    ollama_local.fragments = []
+    ollama_local.erreur = "model 'inconnu' not found"
+    
+    with pytest.raises(assistant.requests.exceptions.RequestException, match='not found'):
+        assistant.classifier_flux({'model': 'inconnu', 'prompt': 'x'}, timeout=5)
+    with pytest.raises(assistant.requests.exceptions.RequestException, match='not found'):
+        asyncio.run(assistant.classifier_flux_async({'model': 'inconnu', 'prompt': 'x'}, timeout=5))
+
+
+def test_connexion_asynchrone_refusee():
+    client = ClientOllama('http://127.0.0.1:9')
+    
+    async def lire():
+        return [fragment async for fragment in client.generer_flux_async({'prompt': 'x'}, timeout=2)]
+    
+    with pytest.raises(assistant.requests.exceptions.ConnectionError):
+        asyncio.run(lire())
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du décodage par grammaire restreinte : construction de la grammaire
+et repli sur le reconnaisseur à vocabulaire complet.
+"""
+
+import json
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+
+
+class ModeleVocabulaire:
+    """Modèle Vosk simulé qui ne connaît que les mots donnés."""
+    
+    def __init__(self, mots=()):
+        self.mots = set(mots)
+    
+    def vosk_model_find_word(self, mot):
+        return 0 if mot in self.mots else -1
+
+
+@pytest.fixture
+def commandes(monkeypatch):
+    monkeypatch.setattr(assistant, 'INTENTIONS_MOTS_CLES', {
+        'ACTION_SPOTIFY': ['lance spotify', 'ouvre spotify'],
+        'PAUSE': ['mets en pause', 'mets pause'],
+    })
+    monkeypatch.setattr(assistant, 'ORTHOGRAPHES_VOSK', {'spotify': ['spot if i', 'spot i fi']})
+    monkeypatch.setattr(assistant, '_PHRASES_HORS_VOCABULAIRE_SIGNALEES', set())
+
+
+def test_mots_inconnus_remplaces_par_leurs_orthographes(commandes):
+    modele = ModeleVocabulaire(['lance', 'ouvre', 'mets', 'en', 'pause', 'spot', 'if', 'i', 'fi'])
+    
+    assert assistant.construire_grammaire(modele) == [
+        'lance spot if i', 'lance spot i fi', 'ouvre spot if i', 'ouvre spot i fi',
+        'mets en pause', 'mets pause', '[unk]',
+    ]
+
+
+def test_mot_connu_garde_son_orthographe(commandes):
+    modele = ModeleVocabulaire(['lance', 'spotify', 'spot', 'if', 'i'])
+    
+    assert assistant.construire_grammaire(modele) == ['lance spotify', 'lance spot if i', '[unk]']
+
+
+def test_phrases_hors_vocabulaire_exclues_et_signalees_une_fois(commandes, capsys):
+    modele = ModeleVocabulaire(['mets', 'pause'])
+    
+    assert assistant.construire_grammaire(modele) == ['mets pause', '[unk]']
+    assert 'lance spotify, ouvre spotify, mets en pause' in capsys.readouterr().out
+    
+    assistant.construire_grammaire(modele)
+    assert capsys.readouterr().out == ''
+
+
+class ReconnaisseurEnregistreur:
+    """
+    Reconnaisseur Vosk simulé : la grammaire répond la phrase donnée, le
+    reconnaisseur complet transcrit l'audio rejoué.
+    """
+    
+    def __init__(self, model, sample_rate, grammaire=None):
+        self.grammaire = grammaire
+        self.audio = b''
+        self.reponse = model.reponse_grammaire if grammaire else 'quelle heure est il'
+    
+    def SetWords(self, actif):
+        pass
+    
+    def Reset(self):
+        self.audio = b''
+    
+    def AcceptWaveform(self, data):
+        self.audio += data
+        return False
+    
+    def PartialResult(self):
+        return json.dumps({'partial': ''})
+    
+    def FinalResult(self):
+        texte = self.reponse if self.audio else ''
+        self.audio = b''
+        return json.dumps({'text': texte})
+
+
+def session(monkeypatch, reponse_grammaire):
+    monkeypatch.setattr(assistant, 'vosk', types.SimpleNamespace(KaldiRecognizer=ReconnaisseurEnregistreur))
+    modele = ModeleVocabulaire(['lance', 'spotify'])
+    modele.reponse_grammaire = reponse_grammaire
+    return assistant.SessionReconnaissance(modele, vad=False, validation_anticipee=False, taille_lot=0)
+
+
+def test_commande_decodee_par_la_grammaire(monkeypatch):
+    decodeur = session(monkeypatch, 'lance spotify')
+    
+    decodeur.traiter(b'\x01\x00')
+    
+    assert decodeur.terminer() == [('lance spotify', None)]
+    assert decodeur.reconnaisseur_complet.audio == b''
+    assert decodeur.statistiques()['replis_vocabulaire_complet'] == 0
+
+
+def test_repli_sur_le_vocabulaire_complet(monkeypatch):
+    decodeur = session(monkeypatch, '[unk]')
+    
+    decodeur.traiter(b'\x01\x00')
+    decodeur.traiter(b'\x02\x00')
+    
+    assert decodeur.terminer() == [('quelle heure est il', None)]
+    assert decodeur.statistiques()['replis_vocabulaire_complet'] == 1
+
+
+def test_audio_rejoue_borne_a_la_duree_maximale(monkeypatch):
+    monkeypatch.setattr(assistant, 'DUREE_MAX_ENONCE', 2 / assistant.SAMPLE_RATE)
+    decodeur = session(monkeypatch, '[unk]')
+    rejoue = []
+    decodeur.reconnaisseur_complet.AcceptWaveform = lambda data: rejoue.append(data) or False
+    decodeur.reconnaisseur_complet.FinalResult = lambda: json.dumps({'text': 'bonjour'})
+    
+    for octet in (1, 2, 3):
+        decodeur.traiter(bytes([octet, 0]))
+    decodeur.terminer()
+    
+    # Seules les deux dernières trames tiennent dans DUREE_MAX_ENONCE
+    assert rejoue == [b'\x02\x00\x03\x00']
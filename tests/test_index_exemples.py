@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de l'index d'exemples vectorisés et de son chargement au démarrage.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import assistant_spotify as assistant
+from index_exemples import CacheVecteurs, IndexExemples, normaliser_vecteurs
+
+
+def vectoriser(textes):
+    """Embeddings factices : un axe par premier mot connu."""
+    axes = {'pause': 0, 'suivant': 1, 'bonjour': 2}
+    matrice = np.full((len(textes), 3), 0.01)
+    for ligne, texte in enumerate(textes):
+        matrice[ligne, axes.get(texte.split()[0], 2)] = 1.0
+    return matrice
+
+
+@pytest.fixture
+def index():
+    return IndexExemples.construire(
+        ['pause maintenant', 'pause', 'suivant merci', 'suivant', 'bonjour toi', 'bonjour'],
+        ['PAUSE', 'PAUSE', 'SUIVANT', 'SUIVANT', 'IGNORE', 'IGNORE'],
+        vectoriser, 'factice', taille_lot=2,
+    )
+
+
+def test_vecteurs_normalises():
+    assert np.linalg.norm(normaliser_vecteurs(np.array([[3.0, 4.0]])), axis=1) == pytest.approx([1.0])
+
+
+def test_recherche_du_plus_proche(index):
+    intention, similarite, exemple = index.rechercher(vectoriser(['suivant'])[0])
+    
+    assert intention == 'SUIVANT'
+    assert similarite == pytest.approx(1.0)
+    assert exemple.startswith('suivant')
+
+
+def test_evaluation(index):
+    assert index.evaluer() == (1.0, None)
+
+
+def test_sauvegarde_et_chargement(index, tmp_path):
+    chemin = str(tmp_path / 'index.npz')
+    index.sauvegarder(chemin)
+    charge = IndexExemples.charger(chemin)
+    
+    assert charge.etiquettes == index.etiquettes
+    assert charge.exemples == index.exemples
+    assert charge.modele == 'factice'
+    np.testing.assert_allclose(charge.matrice, index.matrice)
+
+
+def test_cache_vecteurs_lru():
+    cache = CacheVecteurs(taille_max=1)
+    cache.enregistrer('a', np.zeros(2))
+    cache.enregistrer('b', np.ones(2))
+    
+    assert cache.obtenir('a') is None
+    assert cache.obtenir('b') is not None
+    assert cache.statistiques() == {'entrees': 1, 'succes': 1, 'echecs': 1}
+
+
+class OllamaLent:
+    """Modèle d'embeddings qui ne répond qu'une fois libéré."""
+    
+    def __init__(self):
+        self.libere = threading.Event()
+    
+    def vectoriser(self, textes, modele, timeout):
+        self.libere.wait(5)
+        return vectoriser(textes)
+
+
+def test_chargement_en_arriere_plan(index, tmp_path, monkeypatch):
+    chemin = str(tmp_path / 'index.npz')
+    index.sauvegarder(chemin)
+    client = OllamaLent()
+    monkeypatch.setattr(assistant, 'INDEX_EXEMPLES_FICHIER', chemin)
+    monkeypatch.setattr(assistant, 'INDEX_EXEMPLES', None)
+    monkeypatch.setattr(assistant, 'CLIENT_OLLAMA', client)
+    
+    assert assistant.charger_index_exemples(attendre=False)
+    # Rendu sans attendre le modèle d'embeddings, et indisponible jusque-là
+    assert assistant.INDEX_EXEMPLES is None
+    
+    client.libere.set()
+    for fil in threading.enumerate():
+        if fil.name == 'index-exemples':
+            fil.join(5)
+    assert assistant.INDEX_EXEMPLES is not None
+    assert assistant.INDEX_EXEMPLES.modele == 'factice'
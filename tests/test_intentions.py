@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de l'analyse d'intention : mots-clés, puis Ollama pour les paramètres.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import assistant_spotify as assistant
+
+
+class OllamaFactice:
+    """Client Ollama simulé qui répond toujours la même intention."""
+    
+    def __init__(self, reponse):
+        self.reponse = reponse
+        self.textes = []
+    
+    def generer(self, payload, timeout):
+        self.textes.append(payload['prompt'])
+        return {'response': json.dumps(self.reponse, ensure_ascii=False)}
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """Chaîne d'analyse sans classifieur ni index, avec un Ollama simulé."""
+    client = OllamaFactice({'intention': 'LECTURE', 'artiste': 'daft punk'})
+    monkeypatch.setattr(assistant, 'CLIENT_OLLAMA', client)
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR', None)
+    monkeypatch.setattr(assistant, 'INDEX_EXEMPLES', None)
+    monkeypatch.setattr(assistant, 'OLLAMA_STREAMING', False)
+    monkeypatch.setattr(assistant, 'DISJONCTEUR_OLLAMA', assistant.DisjoncteurOllama())
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', assistant.CacheIntentions(fichier=None))
+    return client
+
+
+def test_spotify_dans_une_phrase_longue_laisse_ollama_extraire_les_parametres(ollama):
+    texte = "mets du daft punk sur spotify"
+    
+    assert assistant.analyser_intention_mots_cles(texte) is None
+    assert assistant.analyser_commande(texte) == ('LECTURE', {'artiste': 'daft punk'})
+    assert len(ollama.textes) == 1
+
+
+def test_commande_par_mots_cles_sans_ollama(ollama):
+    assert assistant.analyser_commande("lance spotify") == ('ACTION_SPOTIFY', {})
+    assert ollama.textes == []
+
+
+def test_moteur_asynchrone_laisse_ollama_extraire_les_parametres(ollama, monkeypatch):
+    async def classifier_flux_async(payload, timeout):
+        return 'LECTURE', {'artiste': 'daft punk'}
+    
+    monkeypatch.setattr(assistant, 'classifier_flux_async', classifier_flux_async)
+    moteur = assistant.MoteurIntentions()
+    
+    async def analyser():
+        moteur._verrou_llm = asyncio.Lock()
+        return await moteur.analyser("mets du daft punk sur spotify")
+    
+    assert asyncio.run(analyser()) == ('LECTURE', {'artiste': 'daft punk'})
+    assert moteur.gagnants['ollama'] == 1
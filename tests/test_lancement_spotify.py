@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la détection de Spotify (procfs simulé) et de la chaîne de
+lancement (commandes simulées dans le PATH).
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+import assistant_spotify as assistant
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    """Arborescence /proc simulée : ajouter(pid, nom) y crée un processus."""
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    racine = tmp_path / 'proc'
+    racine.mkdir()
+    (racine / 'self').mkdir()
+    
+    def ajouter(pid, nom):
+        (racine / str(pid)).mkdir()
+        (racine / str(pid) / 'comm').write_text(nom + '\n', encoding='utf-8')
+    
+    ajouter(1, 'systemd')
+    ajouter.racine = str(racine)
+    return ajouter
+
+
+@pytest.fixture
+def horloge(monkeypatch):
+    """Horloge monotone simulée, avancée à la main."""
+    instant = [1000.0]
+    monkeypatch.setattr(assistant.time, 'monotonic', lambda: instant[0])
+    return instant
+
+
+def test_detection_par_proc(proc):
+    detecteur = assistant.DetecteurProcessus(ttl=0, racine_proc=proc.racine)
+    assert not detecteur.est_lance()
+    
+    proc(4242, 'Spotify')
+    assert detecteur.est_lance()
+
+
+def test_resultat_reutilise_pendant_le_ttl(proc, horloge):
+    detecteur = assistant.DetecteurProcessus(ttl=2.0, racine_proc=proc.racine)
+    assert not detecteur.est_lance()
+    
+    proc(4242, 'spotify')
+    horloge[0] += 1.0
+    assert not detecteur.est_lance()
+    assert detecteur.detections == 1
+    
+    horloge[0] += 1.5
+    assert detecteur.est_lance()
+    assert detecteur.detections == 2
+
+
+def test_invalidation_force_une_nouvelle_detection(proc, horloge):
+    detecteur = assistant.DetecteurProcessus(ttl=2.0, racine_proc=proc.racine)
+    assert not detecteur.est_lance()
+    
+    proc(4242, 'spotify')
+    detecteur.invalider()
+    assert detecteur.est_lance()
+    assert detecteur.detections == 2
+
+
+def test_marquer_impose_le_resultat(proc, horloge):
+    detecteur = assistant.DetecteurProcessus(ttl=2.0, racine_proc=proc.racine)
+    detecteur.marquer(True)
+    
+    assert detecteur.est_lance()
+    assert detecteur.detections == 0
+
+
+@pytest.fixture
+def chemin(tmp_path, monkeypatch):
+    """
+    PATH réduit à des commandes simulées : creer(nom, code) y crée un script
+    qui note son nom dans le journal puis se termine avec ce code de retour.
+    """
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    dossier = tmp_path / 'bin'
+    dossier.mkdir()
+    journal = tmp_path / 'journal'
+    monkeypatch.setenv('PATH', str(dossier))
+    
+    def creer(nom, code):
+        script = dossier / nom
+        script.write_text(f"#!/bin/sh\necho {nom} >> '{journal}'\nexit {code}\n", encoding='utf-8')
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    
+    def lus():
+        return journal.read_text(encoding='utf-8').split() if journal.exists() else []
+    
+    creer.journal = lus
+    return creer
+
+
+@pytest.mark.skipif(not os.path.exists('/bin/sh'), reason="scripts shell indisponibles")
+def test_methodes_selon_le_path(chemin):
+    chemin('spotify', 0)
+    chemin('snap', 0)
+    
+    noms = [nom for nom, _ in assistant.methodes_lancement_spotify()]
+    
+    assert noms == ['commande', 'snap', 'uri']
+
+
+@pytest.mark.skipif(not os.path.exists('/bin/sh'), reason="scripts shell indisponibles")
+def test_methode_gagnante_retenue(chemin, tmp_path):
+    chemin('spotify', 1)
+    chemin('flatpak', 0)
+    fichier = str(tmp_path / 'lanceur.json')
+    
+    lanceur = assistant.LanceurSpotify(fichier=fichier)
+    assert lanceur.lancer() == 'flatpak'
+    assert chemin.journal() == ['spotify', 'flatpak']
+    
+    # Exécution suivante : la méthode retenue est relue et essayée d'abord
+    lanceur = assistant.LanceurSpotify(fichier=fichier)
+    assert lanceur.methode_preferee == 'flatpak'
+    assert lanceur.lancer() == 'flatpak'
+    assert chemin.journal() == ['spotify', 'flatpak', 'flatpak']
+
+
+@pytest.mark.skipif(not os.path.exists('/bin/sh'), reason="scripts shell indisponibles")
+def test_echec_de_toutes_les_methodes(chemin, tmp_path):
+    chemin('spotify', 1)
+    fichier = tmp_path / 'lanceur.json'
+    
+    lanceur = assistant.LanceurSpotify(fichier=str(fichier))
+    
+    assert lanceur.lancer() is None
+    assert lanceur.methode_preferee is None
+    assert not fichier.exists()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Tests des histogrammes de latence et de leurs exports JSON et Prometheus.
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metriques import HistogrammeLatence, RegistreMetriques
+
+
+@pytest.fixture
+def histogramme():
+    histogramme = HistogrammeLatence((10, 20, 100))
+    for duree in (5, 15, 15, 50):
+        histogramme.ajouter(duree)
+    return histogramme
+
+
+def test_cases_inclusives_a_droite():
+    histogramme = HistogrammeLatence((10, 20))
+    
+    histogramme.ajouter(10)
+    histogramme.ajouter(10.5)
+    histogramme.ajouter(25)
+    
+    assert histogramme.comptes == [1, 1, 1]
+
+
+@pytest.mark.parametrize('rang, valeur', [(25, 10), (50, 15), (75, 20), (100, 50)])
+def test_percentile_interpole_dans_la_case(histogramme, rang, valeur):
+    # p100 est borné par le maximum observé plutôt que par la borne de la case
+    assert histogramme.percentile(rang) == pytest.approx(valeur)
+
+
+def test_percentile_au_dela_de_la_derniere_borne():
+    histogramme = HistogrammeLatence((10,))
+    histogramme.ajouter(30)
+    
+    assert histogramme.percentile(50) == pytest.approx(20)
+
+
+def test_resume(histogramme):
+    assert histogramme.resume() == {
+        'nombre': 4,
+        'moyenne_ms': pytest.approx(21.25),
+        'p50_ms': pytest.approx(15),
+        'p95_ms': pytest.approx(50),
+        'p99_ms': pytest.approx(50),
+        'max_ms': 50,
+    }
+    assert HistogrammeLatence().resume()['p95_ms'] == 0.0
+
+
+def test_mesurer_enregistre_meme_en_cas_d_exception():
+    registre = RegistreMetriques()
+    
+    with registre.mesurer('asr'):
+        pass
+    with pytest.raises(ValueError):
+        with registre.mesurer('asr'):
+            raise ValueError
+    
+    assert registre.resume()['asr']['nombre'] == 2
+
+
+def test_enregistrer_convertit_en_millisecondes():
+    registre = RegistreMetriques((10, 100))
+    
+    registre.enregistrer('intention', 0.05)
+    
+    assert registre.resume() == {'intention': {
+        'nombre': 1, 'moyenne_ms': pytest.approx(50), 'p50_ms': pytest.approx(50),
+        'p95_ms': pytest.approx(50), 'p99_ms': pytest.approx(50), 'max_ms': pytest.approx(50),
+    }}
+
+
+def test_export_json(tmp_path):
+    registre = RegistreMetriques()
+    registre.enregistrer('asr', 0.002)
+    chemin = str(tmp_path / "metriques.json")
+    
+    registre.exporter_json(chemin)
+    
+    with open(chemin, encoding='utf-8') as f:
+        contenu = json.load(f)
+    assert contenu['etapes']['asr']['nombre'] == 1
+    assert not (tmp_path / "metriques.json.tmp").exists()
+
+
+def test_texte_prometheus_cumulatif():
+    registre = RegistreMetriques((10, 100))
+    for duree in (0.005, 0.05, 0.5):
+        registre.enregistrer('asr', duree)
+    
+    assert registre.texte_prometheus().splitlines()[2:] == [
+        'assistant_etape_duree_secondes_bucket{etape="asr",le="0.01"} 1',
+        'assistant_etape_duree_secondes_bucket{etape="asr",le="0.1"} 2',
+        'assistant_etape_duree_secondes_bucket{etape="asr",le="+Inf"} 3',
+        'assistant_etape_duree_secondes_sum{etape="asr"} 0.555000',
+        'assistant_etape_duree_secondes_count{etape="asr"} 3',
+    ]
+
+
+def test_serveur_http():
+    registre = RegistreMetriques()
+    registre.enregistrer('asr', 0.002)
+    serveur = registre.demarrer_serveur_http(0)
+    url = f"http://127.0.0.1:{serveur.server_address[1]}"
+    try:
+        with urllib.request.urlopen(url + '/metrics', timeout=5) as reponse:
+            assert 'assistant_etape_duree_secondes_count{etape="asr"} 1' in reponse.read().decode('utf-8')
+        with urllib.request.urlopen(url + '/metrics.json', timeout=5) as reponse:
+            assert json.loads(reponse.read())['asr']['nombre'] == 1
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + '/autre', timeout=5)
+    finally:
+        registre.arreter_serveur_http()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du moteur d'intentions asynchrone : remplacement des analyses
+périmées et concurrence entre classifieur local et Ollama.
+"""
+
+import asyncio
+import time
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+from metriques import RegistreMetriques
+
+
+class OllamaAsynchrone:
+    """
+    classifier_flux_async simulé : répond `reponse`, ou reste en attente
+    jusqu'à son annulation si le texte contient `bloquant`.
+    """
+    
+    def __init__(self, reponse=('IGNORE', {}), bloquant=None):
+        self.reponse = reponse
+        self.bloquant = bloquant
+        self.textes = []
+        self.annulees = []
+    
+    async def __call__(self, payload, timeout):
+        texte = payload['prompt']
+        self.textes.append(texte)
+        try:
+            if self.bloquant and self.bloquant in texte:
+                await asyncio.sleep(30)
+            return self.reponse
+        except asyncio.CancelledError:
+            self.annulees.append(texte)
+            raise
+
+
+class ClassifieurFactice:
+    def __init__(self, intention, confiance):
+        self.resultat = (intention, confiance)
+        self.seuil = 0.5
+    
+    def predire(self, texte):
+        return self.resultat
+
+
+@pytest.fixture
+def contexte(monkeypatch):
+    """Chaîne d'analyse sans classifieur ni index, avec un Ollama asynchrone simulé."""
+    ollama = OllamaAsynchrone()
+    monkeypatch.setattr(assistant, 'classifier_flux_async', ollama)
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR', None)
+    monkeypatch.setattr(assistant, 'INDEX_EXEMPLES', None)
+    monkeypatch.setattr(assistant, 'DISJONCTEUR_OLLAMA', assistant.DisjoncteurOllama())
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', assistant.CacheIntentions(fichier=None))
+    monkeypatch.setattr(assistant, 'METRIQUES', RegistreMetriques())
+    return types.SimpleNamespace(ollama=ollama, monkeypatch=monkeypatch)
+
+
+@pytest.fixture
+def moteur(contexte):
+    moteur = assistant.MoteurIntentions(timeout=5)
+    moteur.demarrer()
+    yield moteur
+    moteur.arreter()
+
+
+def analyser(moteur, texte):
+    """Exécute une seule analyse dans une boucle asyncio temporaire."""
+    async def _analyser():
+        moteur._verrou_llm = asyncio.Lock()
+        return await moteur.analyser(texte)
+    
+    return asyncio.run(_analyser())
+
+
+def attendre(condition, delai=5):
+    fin = time.monotonic() + delai
+    while not condition():
+        assert time.monotonic() < fin, "condition jamais remplie"
+        time.sleep(0.01)
+
+
+def test_nouvelle_phrase_annule_l_analyse_precedente(contexte, moteur):
+    contexte.ollama.bloquant = 'heure'
+    premiere = moteur.soumettre("quelle heure est-il maintenant")
+    attendre(lambda: moteur.requetes_ollama == 1)
+    
+    seconde = moteur.soumettre("raconte moi une blague")
+    
+    assert seconde.result(timeout=5) == ('IGNORE', {})
+    assert premiere.cancelled()
+    assert contexte.ollama.annulees == ["quelle heure est-il maintenant"]
+    statistiques = moteur.statistiques()
+    assert (statistiques['remplacees'], statistiques['requetes_ollama'], statistiques['requetes_ollama_annulees']) == \
+        (1, 2, 1)
+
+
+def test_annulation_explicite(contexte, moteur):
+    contexte.ollama.bloquant = 'heure'
+    futur = moteur.soumettre("quelle heure est-il maintenant")
+    attendre(lambda: moteur.requetes_ollama == 1)
+    
+    moteur.annuler()
+    
+    attendre(futur.done)
+    assert futur.cancelled()
+    attendre(lambda: moteur.requetes_ollama_annulees == 1)
+
+
+def test_mots_cles_sans_requete(contexte, moteur):
+    assert moteur.soumettre("lance spotify").result(timeout=5) == ('ACTION_SPOTIFY', {})
+    assert contexte.ollama.textes == []
+    assert moteur.gagnants == {'mots_cles': 1}
+
+
+def test_classifieur_sur_l_emporte_et_annule_ollama(contexte):
+    contexte.ollama.bloquant = 'heure'
+    contexte.monkeypatch.setattr(assistant, 'CLASSIFIEUR', ClassifieurFactice('IGNORE', 0.9))
+    moteur = assistant.MoteurIntentions(timeout=5)
+    
+    assert analyser(moteur, "quelle heure est-il maintenant") == ('IGNORE', {})
+    assert moteur.gagnants == {'classifieur': 1}
+    assert contexte.ollama.annulees == ["quelle heure est-il maintenant"]
+    assert moteur.requetes_ollama_annulees == 1
+
+
+def test_classifieur_peu_sur_laisse_ollama_repondre(contexte):
+    contexte.ollama.reponse = ('ACTION_SPOTIFY', {})
+    contexte.monkeypatch.setattr(assistant, 'CLASSIFIEUR', ClassifieurFactice('IGNORE', 0.2))
+    moteur = assistant.MoteurIntentions(timeout=5)
+    
+    assert analyser(moteur, "il fait beau dehors") == ('ACTION_SPOTIFY', {})
+    assert moteur.gagnants == {'ollama': 1}
+    assert assistant.CACHE_INTENTIONS.obtenir("il fait beau dehors") == ('ACTION_SPOTIFY', {})
+
+
+def test_disjoncteur_ouvert_repli_local_sans_requete(contexte):
+    disjoncteur = assistant.DisjoncteurOllama(echecs_max=1, pause=60)
+    disjoncteur.echec()
+    contexte.monkeypatch.setattr(assistant, 'DISJONCTEUR_OLLAMA', disjoncteur)
+    moteur = assistant.MoteurIntentions(timeout=5)
+    
+    assert analyser(moteur, "il fait beau dehors") == ('IGNORE', {})
+    assert moteur.gagnants == {'repli_local': 1}
+    assert contexte.ollama.textes == []
+
+
+def test_arret_annule_l_analyse_en_cours(contexte):
+    contexte.ollama.bloquant = 'heure'
+    moteur = assistant.MoteurIntentions(timeout=5)
+    moteur.demarrer()
+    futur = moteur.soumettre("quelle heure est-il maintenant")
+    attendre(lambda: moteur.requetes_ollama == 1)
+    
+    moteur.arreter()
+    
+    assert futur.cancelled()
+    assert contexte.ollama.annulees == ["quelle heure est-il maintenant"]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la détection d'intention par mots-clés : normalisation, distance
+d'édition et correction des mots cibles mal transcrits.
+"""
+
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import CorrespondanceMotsCles, distance_edition, normaliser_texte
+
+
+def test_normalisation():
+    assert normaliser_texte("  Démarre   Spotify ! ") == "demarre spotify"
+    assert normaliser_texte("Arrête-la, s'il te plaît") == "arrete la s il te plait"
+
+
+@pytest.mark.parametrize('a, b, distance', [
+    ('spotify', 'spotify', 0),
+    ('spotifi', 'spotify', 1),
+    ('spotifai', 'spotify', 2),
+    ('chat', 'chien', 3),
+])
+def test_distance_edition(a, b, distance):
+    assert distance_edition(a, b, 5) == distance
+
+
+def test_distance_edition_bornee():
+    assert distance_edition('spotify', 'sportif', 1) == 2
+    assert distance_edition('a', 'abcdef', 2) == 3
+
+
+@pytest.fixture
+def correspondance():
+    return CorrespondanceMotsCles(
+        {'LANCER': ['lance spotify', 'ouvre spotify'], 'PAUSE': ['spotify en pause', 'mets en pause']},
+        {'spotify': 2},
+        ('lance', 'ouvre'),
+        {'spotify': ['spot if i']},
+    )
+
+
+def test_correspondance_exacte_sans_accents_ni_casse(correspondance):
+    assert correspondance.analyser("Euh, LANCE Spotify !") == ('LANCER', 0)
+    assert correspondance.analyser("bonjour") is None
+
+
+def test_phrase_la_plus_longue_prioritaire(correspondance):
+    assert correspondance.analyser("spotify en pause") == ('PAUSE', 0)
+
+
+def test_orthographe_du_modele_exacte(correspondance):
+    assert correspondance.analyser("spot if i en pause") == ('PAUSE', 0)
+
+
+@pytest.mark.parametrize('texte, distance', [
+    ("lance spotifaï", 2),
+    ("ouvre spoti fi", 1),
+    ("lance spot ify", 0),
+])
+def test_correction_apres_un_verbe_de_commande(correspondance, texte, distance):
+    assert correspondance.analyser(texte) == ('LANCER', distance)
+
+
+@pytest.mark.parametrize('texte', ["je suis sportif", "sport if", "spotifaï en pause", "lance spotifaïlle"])
+def test_pas_de_correction_hors_commande(correspondance, texte):
+    assert correspondance.analyser(texte) is None
+
+
+@pytest.mark.parametrize('texte, intention', [
+    ("lance spotifaï", ('ACTION_SPOTIFY', 2)),
+    ("je suis sportif", None),
+    ("sport if", None),
+])
+def test_correspondance_de_l_assistant(texte, intention):
+    assert assistant.CORRESPONDANCE_MOTS_CLES.analyser(texte) == intention
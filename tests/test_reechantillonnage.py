@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du rééchantillonnage polyphase et de l'ouverture du micro à son
+format natif.
+"""
+
+import types
+import wave
+
+import numpy as np
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import CaptureMicro, ReechantillonneurPolyphase, SourceAudioFichier
+
+
+def sinus(frequence, frequence_echantillonnage, duree=1.0, canaux=1):
+    t = np.arange(int(duree * frequence_echantillonnage)) / frequence_echantillonnage
+    signal = (8000 * np.sin(2 * np.pi * frequence * t)).astype(np.int16)
+    return np.repeat(signal, canaux).tobytes()
+
+
+def frequence_dominante(pcm, frequence_echantillonnage):
+    signal = np.frombuffer(pcm, dtype=np.int16).astype(np.float64)
+    spectre = np.abs(np.fft.rfft(signal * np.hanning(len(signal))))
+    return np.argmax(spectre) * frequence_echantillonnage / len(signal)
+
+
+@pytest.mark.parametrize('entree, rapport', [(48000, (1, 3)), (44100, (160, 441)), (16000, (1, 1))])
+def test_rapport_reduit(entree, rapport):
+    reechantillonneur = ReechantillonneurPolyphase(entree, 16000)
+    
+    assert (reechantillonneur.interpolation, reechantillonneur.decimation) == rapport
+    assert reechantillonneur.identite == (rapport == (1, 1))
+
+
+@pytest.mark.parametrize('entree', [48000, 44100, 8000])
+def test_flux_en_blocs_identique_au_signal_entier(entree):
+    audio = sinus(440, entree, duree=0.5)
+    entier = ReechantillonneurPolyphase(entree).traiter(audio)
+    
+    reechantillonneur = ReechantillonneurPolyphase(entree)
+    # Blocs de tailles irrégulières, dont un vide et d'autres trop courts pour produire une sortie
+    decoupes = [0, 2, 6, 6, 1000, 1002, 4410, 7000, len(audio)]
+    en_blocs = b''.join(reechantillonneur.traiter(audio[debut:fin]) for debut, fin in zip(decoupes, decoupes[1:]))
+    
+    assert en_blocs == entier
+
+
+@pytest.mark.parametrize('entree', [48000, 44100, 22050])
+def test_frequence_et_duree_conservees(entree):
+    reechantillonneur = ReechantillonneurPolyphase(entree, 16000)
+    
+    sortie = reechantillonneur.traiter(sinus(1000, entree))
+    
+    # Le retard du filtre retient au plus une fenêtre d'échantillons
+    assert 16000 - reechantillonneur.taille_fenetre <= len(sortie) // 2 <= 16000
+    assert frequence_dominante(sortie, 16000) == pytest.approx(1000, abs=5)
+
+
+def test_frequence_au_dela_de_nyquist_attenuee():
+    sortie = ReechantillonneurPolyphase(48000, 16000).traiter(sinus(12000, 48000))
+    
+    residu = np.abs(np.frombuffer(sortie, dtype=np.int16)[200:]).max()
+    assert residu < 8000 * 0.05
+
+
+def test_stereo_mixee_en_mono():
+    gauche = np.full(300, 1000, dtype=np.int16)
+    droite = np.full(300, 3000, dtype=np.int16)
+    stereo = np.column_stack((gauche, droite)).tobytes()
+    
+    assert ReechantillonneurPolyphase(16000, 16000, canaux=2).traiter(stereo) == np.full(300, 2000, np.int16).tobytes()
+    continu = np.frombuffer(ReechantillonneurPolyphase(48000, 16000, canaux=2).traiter(stereo * 10), dtype=np.int16)
+    assert np.abs(continu[100:] - 2000).max() <= 20
+
+
+def test_identite_renvoie_les_memes_octets():
+    audio = sinus(440, 16000, duree=0.1)
+    
+    assert ReechantillonneurPolyphase(16000, 16000).traiter(audio) == audio
+
+
+def test_source_wav_ramenee_a_16_khz_mono(tmp_path):
+    chemin = str(tmp_path / "stereo_48k.wav")
+    with wave.open(chemin, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(48000)
+        wav.writeframes(sinus(700, 48000, canaux=2))
+    
+    source = SourceAudioFichier.depuis_wav(chemin, vitesse=0, silence_final=0)
+    
+    # Fin du signal vidée du filtre : rien n'est tronqué, seul un peu de silence s'ajoute
+    assert 16000 <= len(source.audio) // 2 <= 16000 + 100
+    assert frequence_dominante(source.audio, 16000) == pytest.approx(700, abs=5)
+
+
+def test_source_wav_8_bits_refusee(tmp_path):
+    chemin = str(tmp_path / "8_bits.wav")
+    with wave.open(chemin, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(1)
+        wav.setframerate(16000)
+        wav.writeframes(bytes(100))
+    
+    with pytest.raises(ValueError):
+        SourceAudioFichier.depuis_wav(chemin)
+
+
+class PyAudioFactice:
+    """PyAudio simulé pour un micro qui n'accepte que son format natif."""
+    
+    def __init__(self, frequences_acceptees=(48000,), canaux=2):
+        self.frequences_acceptees = frequences_acceptees
+        self.canaux = canaux
+    
+    def get_default_input_device_info(self):
+        return {'index': 0, 'defaultSampleRate': 48000.0, 'maxInputChannels': self.canaux}
+    
+    def is_format_supported(self, rate, **options):
+        if rate not in self.frequences_acceptees:
+            raise ValueError("Invalid sample rate")
+        return True
+
+
+@pytest.fixture
+def pyaudio_factice(monkeypatch):
+    module = types.SimpleNamespace(paInt16=8, paInputOverflow=2, paContinue=0)
+    monkeypatch.setattr(assistant, 'pyaudio', module)
+    return module
+
+
+def test_micro_ouvert_en_16_khz_si_accepte(pyaudio_factice):
+    capture = CaptureMicro()
+    capture._audio = PyAudioFactice(frequences_acceptees=(16000, 48000))
+    
+    capture._choisir_format()
+    
+    assert (capture.frequence_peripherique, capture.canaux_peripherique) == (16000, 1)
+    assert capture.reechantillonneur is None
+
+
+@pytest.mark.parametrize('canaux_micro, canaux_ouverts', [(1, 1), (2, 2), (8, 2)])
+def test_micro_ouvert_au_format_natif(pyaudio_factice, canaux_micro, canaux_ouverts):
+    capture = CaptureMicro()
+    capture._audio = PyAudioFactice(canaux=canaux_micro)
+    
+    capture._choisir_format()
+    
+    assert (capture.frequence_peripherique, capture.canaux_peripherique) == (48000, canaux_ouverts)
+    assert capture.reechantillonneur.canaux == canaux_ouverts
+    
+    # Le callback écrit dans le tampon l'audio ramené à 16 kHz mono
+    capture._callback(sinus(440, 48000, duree=0.1, canaux=canaux_ouverts), 4800, None, 0)
+    assert 1600 - capture.reechantillonneur.taille_fenetre <= capture.tampon.en_attente() <= 1600
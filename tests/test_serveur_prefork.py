@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du serveur prefork : mesures /proc, répartition des connexions sur
+les processus de travail et service de bout en bout par un processus forké.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+from serveur_prefork import FIN_CONNEXION, ServeurPrefork, Travailleur, lire_memoire, lire_temps_cpu
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32' or not hasattr(socket, 'send_fds'),
+                                reason="fork et transmission de sockets Unix")
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason="/proc indisponible")
+def test_mesures_du_processus_courant():
+    memoire = lire_memoire(os.getpid())
+    
+    assert memoire['rss_mo'] > 0
+    assert 0 < memoire['pss_mo'] <= memoire['rss_mo']
+    assert lire_temps_cpu(os.getpid()) > 0
+
+
+def test_mesures_d_un_processus_inexistant():
+    assert lire_memoire(2 ** 30) == {}
+    assert lire_temps_cpu(2 ** 30) is None
+
+
+@pytest.fixture
+def serveur():
+    """Serveur sans processus forkés : chaque travailleur est un canal local."""
+    serveur = ServeurPrefork(model=None, nb_processus=0, clients_max=2)
+    cotes_enfants = []
+    for pid in (2 ** 30, 2 ** 30 + 1):
+        canal_parent, canal_enfant = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        serveur.travailleurs[canal_parent.fileno()] = Travailleur(pid, canal_parent)
+        cotes_enfants.append(canal_enfant)
+    yield serveur, cotes_enfants
+    for travailleur in serveur.travailleurs.values():
+        travailleur.canal.close()
+    for canal in cotes_enfants:
+        canal.close()
+
+
+def test_connexion_confiee_au_travailleur_le_moins_charge(serveur):
+    serveur, enfants = serveur
+    premier, second = serveur.travailleurs.values()
+    premier.actifs = 1
+    
+    client, connexion = socket.socketpair()
+    serveur._repartir(connexion)
+    
+    assert (premier.actifs, second.actifs, second.total) == (1, 1, 1)
+    _, descripteurs, _, _ = socket.recv_fds(enfants[1], 1, 1)
+    with socket.socket(fileno=descripteurs[0]) as transmise:
+        transmise.sendall(b'ok')
+    assert client.recv(2) == b'ok'
+    client.close()
+
+
+def test_connexion_refusee_au_dela_de_clients_max(serveur):
+    serveur, _ = serveur
+    for travailleur in serveur.travailleurs.values():
+        travailleur.actifs = 1
+    
+    client, connexion = socket.socketpair()
+    serveur._repartir(connexion)
+    
+    assert json.loads(client.recv(4096)) == {'type': 'erreur', 'message': 'trop de clients'}
+    assert serveur.connexions_refusees == 1
+    client.close()
+
+
+def test_fin_de_connexion_signalee_par_le_travailleur(serveur):
+    serveur, enfants = serveur
+    travailleur = next(iter(serveur.travailleurs.values()))
+    travailleur.actifs = 3
+    
+    enfants[0].sendall(FIN_CONNEXION * 2)
+    serveur._lire_canal(travailleur)
+    
+    assert travailleur.actifs == 1
+
+
+class ReconnaisseurFactice:
+    """Reconnaisseur Vosk simulé : tout l'audio reçu forme un seul énoncé."""
+    
+    def __init__(self, model, sample_rate, grammaire=None):
+        self.octets = 0
+    
+    def SetWords(self, actif):
+        pass
+    
+    def AcceptWaveform(self, data):
+        self.octets += len(data)
+        return False
+    
+    def PartialResult(self):
+        return json.dumps({'partial': ''})
+    
+    def FinalResult(self):
+        return json.dumps({'text': 'lance spotify' if self.octets else ''})
+
+
+def test_connexion_servie_par_un_processus_forke(monkeypatch):
+    monkeypatch.setattr(assistant, 'vosk', types.SimpleNamespace(KaldiRecognizer=ReconnaisseurFactice))
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR', None)
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', assistant.CacheIntentions(fichier=None))
+    serveur = ServeurPrefork(model=object(), nb_processus=1,
+                             options={'ollama': False, 'grammaire': False, 'vad': False})
+    port = serveur.demarrer(port=0)
+    reponses = []
+    termine = threading.Event()
+    
+    def client():
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=10) as connexion:
+                connexion.sendall(b'\x00\x00' * 1600)
+                connexion.shutdown(socket.SHUT_WR)
+                fichier = connexion.makefile('rb')
+                reponses.extend(json.loads(ligne) for ligne in fichier)
+        finally:
+            termine.set()
+    
+    def rapport():
+        # Appelé périodiquement par servir() : l'arrêter une fois le client servi
+        if termine.is_set():
+            raise KeyboardInterrupt
+    
+    serveur.afficher_rapport = rapport
+    threading.Thread(target=client, daemon=True).start()
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            serveur.servir(intervalle_rapport=0.05)
+        (travailleur,) = serveur.travailleurs.values()
+        assert travailleur.total == 1
+    finally:
+        serveur.arreter()
+    
+    assert reponses == [{'type': 'enonce', 'texte': 'lance spotify', 'intention': 'ACTION_SPOTIFY',
+                         'parametres': {}}]
+    assert serveur.travailleurs == {}
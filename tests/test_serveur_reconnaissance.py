@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du serveur de reconnaissance multi-clients avec un reconnaisseur Vosk simulé.
+"""
+
+import asyncio
+import json
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+from serveur_reconnaissance import ServeurReconnaissance
+
+
+class ReconnaisseurFactice:
+    """Reconnaisseur Vosk simulé : tout l'audio reçu forme un seul énoncé."""
+    
+    def __init__(self, model, sample_rate, grammaire=None):
+        if model.defaillant:
+            raise RuntimeError("modèle défaillant")
+        self.octets = 0
+    
+    def SetWords(self, actif):
+        pass
+    
+    def AcceptWaveform(self, data):
+        self.octets += len(data)
+        return False
+    
+    def PartialResult(self):
+        return json.dumps({'partial': ''})
+    
+    def FinalResult(self):
+        return json.dumps({'text': 'quelle heure est il' if self.octets else ''})
+
+
+@pytest.fixture(autouse=True)
+def vosk_factice(monkeypatch):
+    monkeypatch.setattr(assistant, 'vosk', types.SimpleNamespace(KaldiRecognizer=ReconnaisseurFactice))
+    monkeypatch.setattr(assistant, 'CLASSIFIEUR', None)
+    monkeypatch.setattr(assistant, 'CACHE_INTENTIONS', assistant.CacheIntentions(fichier=None))
+
+
+async def echanger(serveur, audio):
+    """Envoie l'audio, ferme l'écriture et renvoie les lignes JSON reçues."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', serveur.port)
+    writer.write(audio)
+    await writer.drain()
+    writer.write_eof()
+    lignes = [json.loads(ligne) for ligne in (await reader.read()).splitlines()]
+    writer.close()
+    return lignes
+
+
+def executer(model, scenario, **options):
+    async def principal():
+        serveur = ServeurReconnaissance(model, clients_max=1, utiliser_ollama=False,
+                                        grammaire=False, vad=False, **options)
+        await serveur.demarrer(port=0)
+        try:
+            return await scenario(serveur)
+        finally:
+            serveur.fermer()
+    return asyncio.run(principal())
+
+
+def test_enonce_analyse_et_renvoye():
+    async def scenario(serveur):
+        lignes = await echanger(serveur, b'\x00\x00' * 1600)
+        return lignes, serveur.statistiques()
+    
+    lignes, statistiques = executer(types.SimpleNamespace(defaillant=False), scenario)
+    
+    assert lignes == [{'type': 'enonce', 'texte': 'quelle heure est il', 'intention': 'IGNORE', 'parametres': {}}]
+    assert statistiques['connexions'] == 1
+
+
+def test_echec_de_session_libere_la_place():
+    async def scenario(serveur):
+        for _ in range(3):
+            assert await echanger(serveur, b'\x00\x00') == []
+        return serveur.clients_actifs, serveur.connexions_refusees
+    
+    assert executer(types.SimpleNamespace(defaillant=True), scenario) == (0, 0)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la synthèse vocale dans un thread dédié : priorités, remplacement
+des messages de même clé, expiration et interruption.
+"""
+
+import threading
+import time
+
+import pytest
+
+import assistant_spotify as assistant
+from assistant_spotify import PRIORITE_BASSE, PRIORITE_NORMALE, PRIORITE_URGENTE, TravailleurVocal
+
+
+class MoteurFactice:
+    """
+    Moteur pyttsx3 simulé : runAndWait reste bloqué tant que `libre` n'est
+    pas levé, puis signale un mot prononcé.
+    """
+    
+    def __init__(self):
+        self.dits = []
+        self.arrets = 0
+        self.libre = threading.Event()
+        self.libre.set()
+        self.en_cours = threading.Event()
+        self._rappels = {}
+    
+    def connect(self, nom, rappel):
+        self._rappels[nom] = rappel
+    
+    def say(self, texte):
+        self.dits.append(texte)
+    
+    def runAndWait(self):
+        self.en_cours.set()
+        self.libre.wait(5)
+        self._rappels['started-word']('started-word', 0, 0)
+        self.en_cours.clear()
+    
+    def stop(self):
+        self.arrets += 1
+
+
+@pytest.fixture
+def moteur():
+    return MoteurFactice()
+
+
+@pytest.fixture
+def travailleur(moteur):
+    travailleur = TravailleurVocal(lambda: moteur, marge_muet=0)
+    assert travailleur.demarrer()
+    yield travailleur
+    moteur.libre.set()
+    travailleur.arreter(timeout=5)
+
+
+def occuper(travailleur, moteur):
+    """Fait parler le travailleur jusqu'à ce que moteur.libre soit levé."""
+    moteur.libre.clear()
+    travailleur.annoncer("premier")
+    assert moteur.en_cours.wait(5)
+
+
+def test_messages_prononces_par_ordre_de_priorite(travailleur, moteur):
+    occuper(travailleur, moteur)
+    
+    travailleur.annoncer("bienvenue", PRIORITE_BASSE)
+    travailleur.annoncer("c'est fait", PRIORITE_NORMALE)
+    travailleur.annoncer("erreur", PRIORITE_URGENTE)
+    travailleur.annoncer("c'est reparti", PRIORITE_NORMALE)
+    moteur.libre.set()
+    
+    assert travailleur.attendre(timeout=5)
+    assert moteur.dits == ["premier", "erreur", "c'est fait", "c'est reparti", "bienvenue"]
+
+
+def test_seul_le_dernier_message_d_une_cle_est_prononce(travailleur, moteur):
+    occuper(travailleur, moteur)
+    
+    travailleur.annoncer("volume 40", cle='volume')
+    travailleur.annoncer("volume 50", cle='volume')
+    travailleur.annoncer("c'est fait")
+    travailleur.annoncer("c'est fait")
+    moteur.libre.set()
+    
+    assert travailleur.attendre(timeout=5)
+    assert moteur.dits == ["premier", "volume 50", "c'est fait"]
+    assert travailleur.statistiques()['remplaces'] == 2
+
+
+def test_message_trop_ancien_abandonne(moteur):
+    travailleur = TravailleurVocal(lambda: moteur, expiration=-1, marge_muet=0)
+    travailleur.demarrer()
+    
+    travailleur.annoncer("trop tard")
+    assert travailleur.attendre(timeout=5)
+    travailleur.arreter(timeout=5)
+    
+    assert moteur.dits == []
+    assert travailleur.statistiques()['expires'] == 1
+
+
+def test_interruption_de_la_phrase_en_cours(travailleur, moteur):
+    occuper(travailleur, moteur)
+    
+    travailleur.annoncer("Spotify ne répond pas", PRIORITE_URGENTE, interrompre=True)
+    moteur.libre.set()
+    
+    assert travailleur.attendre(timeout=5)
+    assert moteur.arrets == 1
+    assert moteur.dits == ["premier", "Spotify ne répond pas"]
+    assert travailleur.statistiques()['interrompus'] == 1
+
+
+def test_muet_pendant_et_juste_apres_la_parole(moteur):
+    travailleur = TravailleurVocal(lambda: moteur, marge_muet=0.2)
+    travailleur.demarrer()
+    assert not travailleur.muet
+    
+    occuper(travailleur, moteur)
+    assert travailleur.muet
+    moteur.libre.set()
+    assert travailleur.attendre(timeout=5)
+    
+    # Le micro entend encore la fin de la phrase
+    assert travailleur.muet
+    time.sleep(0.25)
+    assert not travailleur.muet
+    travailleur.arreter(timeout=5)
+
+
+def test_arret_prononce_les_messages_en_attente(moteur):
+    travailleur = TravailleurVocal(lambda: moteur, marge_muet=0)
+    travailleur.demarrer()
+    occuper(travailleur, moteur)
+    travailleur.annoncer("au revoir", PRIORITE_BASSE)
+    
+    moteur.libre.set()
+    travailleur.arreter(timeout=5)
+    
+    assert moteur.dits == ["premier", "au revoir"]
+
+
+def test_moteur_indisponible():
+    def echec():
+        raise RuntimeError("pas de pilote audio")
+    
+    travailleur = TravailleurVocal(echec)
+    
+    assert not travailleur.demarrer()
+    travailleur.annoncer("bonjour")
+    assert not travailleur.attendre(timeout=1)
+
+
+def test_parler_ne_bloque_pas_avec_un_travailleur(travailleur, moteur):
+    occuper(travailleur, moteur)
+    
+    assistant.parler(travailleur, "c'est fait")
+    
+    assert moteur.dits == ["premier"]
+    moteur.libre.set()
+    assert travailleur.attendre(timeout=5)
+    assert moteur.dits == ["premier", "c'est fait"]
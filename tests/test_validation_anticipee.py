@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la validation anticipée : une commande est déclenchée sur les
+résultats partiels de Vosk dès qu'elle est stable.
+"""
+
+import json
+import types
+
+import pytest
+
+import assistant_spotify as assistant
+
+
+class ReconnaisseurPartiels:
+    """
+    Reconnaisseur Vosk simulé : chaque bloc audio fait avancer d'un résultat
+    partiel ; un partiel None termine l'énoncé sur le partiel précédent.
+    """
+    
+    def __init__(self, model, sample_rate, grammaire=None):
+        self.partiels = list(model.partiels)
+        self.dernier = ''
+    
+    def SetWords(self, actif):
+        pass
+    
+    def Reset(self):
+        self.dernier = ''
+    
+    def AcceptWaveform(self, data):
+        partiel = self.partiels.pop(0)
+        if partiel is None:
+            return True
+        self.dernier = partiel
+        return False
+    
+    def PartialResult(self):
+        return json.dumps({'partial': self.dernier})
+    
+    def Result(self):
+        texte, self.dernier = self.dernier, ''
+        return json.dumps({'text': texte})
+    
+    def FinalResult(self):
+        return self.Result()
+
+
+def decoder(monkeypatch, partiels, validation_anticipee=True):
+    monkeypatch.setattr(assistant, 'vosk', types.SimpleNamespace(KaldiRecognizer=ReconnaisseurPartiels))
+    modele = types.SimpleNamespace(partiels=partiels, vosk_model_find_word=lambda mot: 0)
+    session = assistant.SessionReconnaissance(modele, vad=False, validation_anticipee=validation_anticipee,
+                                              taille_lot=0)
+    evenements = []
+    for _ in partiels:
+        evenements += session.traiter(b'\x00\x00')
+    return session, evenements + session.terminer()
+
+
+def test_un_seul_partiel_ne_suffit_pas(monkeypatch):
+    monkeypatch.setattr(assistant, 'PARTIELS_STABLES', 2)
+    
+    session, evenements = decoder(monkeypatch, ['mets en pause', None])
+    
+    assert evenements == [('mets en pause', None)]
+    assert session.statistiques()['validations_anticipees'] == 0
+
+
+def test_commande_stable_declenchee_une_seule_fois(monkeypatch):
+    monkeypatch.setattr(assistant, 'PARTIELS_STABLES', 2)
+    
+    session, evenements = decoder(monkeypatch, ['mets en', 'mets en pause', 'mets en pause', 'mets en pause', None])
+    
+    # Le résultat final de l'énoncé déjà exécuté n'est pas analysé une seconde fois
+    assert evenements == [('mets en pause', 'PAUSE')]
+    assert session.statistiques() == {'enonces': 1, 'replis_vocabulaire_complet': 0, 'validations_anticipees': 1}
+
+
+def test_intention_changeante_recompte_la_stabilite(monkeypatch):
+    monkeypatch.setattr(assistant, 'PARTIELS_STABLES', 2)
+    
+    _, evenements = decoder(monkeypatch, ['mets pause', 'monte le son', 'monte le son'])
+    
+    assert evenements == [('monte le son', 'VOLUME_PLUS')]
+
+
+def test_enonce_suivant_de_nouveau_anticipe(monkeypatch):
+    monkeypatch.setattr(assistant, 'PARTIELS_STABLES', 1)
+    
+    session, evenements = decoder(monkeypatch, ['monte le son', None, 'baisse le son', None])
+    
+    assert evenements == [('monte le son', 'VOLUME_PLUS'), ('baisse le son', 'VOLUME_MOINS')]
+    assert session.statistiques()['validations_anticipees'] == 2
+
+
+def test_sans_validation_anticipee(monkeypatch):
+    _, evenements = decoder(monkeypatch, ['monte le son', 'monte le son', None], validation_anticipee=False)
+    
+    assert evenements == [('monte le son', None)]
+
+
+@pytest.mark.parametrize('texte', ['', 'quelle heure est il'])
+def test_partiel_sans_commande(texte):
+    assert assistant.CORRESPONDANCE_MOTS_CLES.analyser_partiel(texte) is None
+
+
+def test_debut_d_une_commande_plus_longue_attendu():
+    correspondance = assistant.CorrespondanceMotsCles(
+        {'PAUSE': ['mets pause'], 'LECTURE': ['mets pause puis reprends']}, {}, (), {}
+    )
+    
+    # "mets pause" peut encore devenir "mets pause puis reprends"
+    assert correspondance.analyser_partiel('mets pause') is None
+    assert correspondance.analyser_partiel('mets pause puis reprends') == 'LECTURE'
+    assert correspondance.analyser('mets pause') == ('PAUSE', 0)